@@ -0,0 +1,106 @@
+"""
+Micro-benchmark: conversion DataFrame -> parametres executemany
+
+Compare la boucle iterrows() historique de save_to_mysql_optimized()
+a la conversion colonnaire dataframe_to_db_params().
+
+Usage:
+    python benchmarks/bench_conversion.py
+    python benchmarks/bench_conversion.py --sizes 10000 100000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etl_stocks import columns_order, dataframe_to_db_params  # noqa: E402
+
+
+def make_frame(n_rows, seed=42):
+    """DataFrame synthetique au format de sortie de fetch_stock_data_corrected()"""
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n_rows).cumsum()
+    df = pd.DataFrame({
+        'date': pd.date_range('1990-01-01', periods=n_rows, freq='h').date,
+        'ticker': 'AAPL',
+        'type': 'stock',
+        'sector': 'Technologie',
+        'name': 'Apple Inc.',
+        'country': 'USA',
+        'continent': 'North America',
+        'open': close + rng.standard_normal(n_rows),
+        'high': close + 2,
+        'low': close - 2,
+        'close': close,
+        'volume': rng.integers(1_000, 10_000_000, n_rows),
+        'adj_close': close,
+        'last_updated': datetime.now(),
+    })
+    return df[columns_order]
+
+
+def legacy_conversion(df_clean):
+    """Boucle historique: une Series par ligne et un cast Python par cellule"""
+    data_tuples = []
+    error_rows = 0
+    for idx, row in df_clean.iterrows():
+        try:
+            data_tuples.append((
+                row['date'],
+                str(row['ticker']),
+                str(row['type']),
+                str(row['sector']),
+                str(row['name']),
+                str(row['country']),
+                str(row['continent']),
+                float(row['open']),
+                float(row['high']),
+                float(row['low']),
+                float(row['close']),
+                int(row['volume']),
+                float(row['adj_close']),
+                row['last_updated']
+            ))
+        except Exception:
+            error_rows += 1
+    return data_tuples, error_rows
+
+
+def best_of(func, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} | {'iterrows (s)':>12} | {'colonnaire (s)':>14} | {'gain':>7}")
+    print("-" * 54)
+    for n_rows in args.sizes:
+        df = make_frame(n_rows)
+
+        # Verification: memes valeurs numeriques et meme nombre de lignes
+        legacy_rows, _ = legacy_conversion(df.head(1000))
+        vector_rows, _ = dataframe_to_db_params(df.head(1000))
+        assert len(legacy_rows) == len(vector_rows)
+        assert all(a[7:13] == b[7:13] for a, b in zip(legacy_rows, vector_rows))
+
+        legacy_time = best_of(legacy_conversion, df, args.repeat)
+        vector_time = best_of(dataframe_to_db_params, df, args.repeat)
+        print(f"{n_rows:>10,} | {legacy_time:>12.3f} | {vector_time:>14.3f} | {legacy_time / vector_time:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
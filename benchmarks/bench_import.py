@@ -0,0 +1,103 @@
+"""
+Benchmark du temps d'import de etl_stocks (python -X importtime)
+
+Criteres d'acceptation, verifies dans un processus neuf, sans .env ni variables
+DB_* et depuis un repertoire de travail vide:
+    - l'import reussit et n'affiche rien (aucune validation, aucun exit)
+    - aucun fichier n'est cree (pas de dossier logs/, pas de cache)
+    - pandas, numpy, yfinance, pymysql et dotenv ne sont pas importes
+    - le temps d'import cumule reste sous --max-ms
+
+Le temps d'import des dependances lourdes est affiche pour comparaison.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --repeat 10 --max-ms 80
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'yfinance', 'pymysql', 'dotenv']
+
+
+def import_time(statement, cwd, env):
+    """
+    Execute statement sous -X importtime; retourne (stdout, {module racine: cumul en us},
+    ensemble des modules importes)
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=cwd, env=env, capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Echec de '{statement}':\n{completed.stderr[-2000:]}")
+
+    cumulative = {}
+    imported = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        imported.add(module)
+        # Modules de premier niveau (non indentes): cumul de leur import complet
+        if not name[1:].startswith(' '):
+            cumulative[module] = int(cumulative_us)
+    return completed.stdout, cumulative, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, default=150.0, help="Budget du temps d'import de etl_stocks")
+    args = parser.parse_args()
+
+    # Environnement minimal: aucune variable DB_*/PIPELINE_*, pas de .env dans le repertoire courant
+    env = {var: value for var, value in os.environ.items()
+           if not var.startswith(('DB_', 'PIPELINE_', 'LOG_', 'YF_'))}
+    env['PYTHONPATH'] = REPO_DIR
+    failures = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        timings = []
+        for _ in range(args.repeat):
+            stdout, cumulative, imported = import_time('import etl_stocks', workdir, env)
+            timings.append(cumulative['etl_stocks'] / 1000)
+
+        if stdout.strip():
+            failures.append(f"sortie a l'import: {stdout.strip()[:200]!r}")
+        created = os.listdir(workdir)
+        if created:
+            failures.append(f"fichiers crees a l'import: {created}")
+        heavy_imported = [module for module in HEAVY_MODULES if module in imported]
+        if heavy_imported:
+            failures.append(f"dependances lourdes importees: {heavy_imported}")
+
+        _, eager, _ = import_time('import ' + ', '.join(HEAVY_MODULES), workdir, env)
+
+    best = min(timings)
+    if best > args.max_ms:
+        failures.append(f"import en {best:.1f} ms > budget {args.max_ms:.0f} ms")
+
+    print(f"import etl_stocks: {best:.1f} ms (meilleur de {args.repeat}, budget {args.max_ms:.0f} ms)")
+    print("Dependances lourdes (import direct, pour comparaison):")
+    for module in HEAVY_MODULES:
+        if module in eager:
+            print(f"  {module:<10} {eager[module] / 1000:>8.1f} ms")
+    print(f"  {'total':<10} {sum(eager.values()) / 1000:>8.1f} ms (numpy et pymysql inclus dans pandas/yfinance)")
+
+    if failures:
+        print("\nECHEC:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nImport sans effet de bord: OK")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
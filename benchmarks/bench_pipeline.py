@@ -0,0 +1,198 @@
+"""
+Benchmark de bout en bout du pipeline, hors ligne
+
+Source OHLCV synthetique deterministe (N tickers x M annees) a la place de yfinance,
+base SQLite temporaire a la place de MySQL (chargeur executemany). Chaque echelle tourne
+dans un processus dedie pour que le pic RSS soit mesure independamment.
+
+Mesures par echelle (timers de RunMetrics, cf. PIPELINE_METRICS):
+    extract   lignes/s de l'etape fetch (generation synthetique incluse)
+    transform lignes/s de transform_raw_prices()
+    load      lignes/s de la conversion + ecriture en base
+    total     lignes/s de bout en bout (temps mur)
+    memoire   pic RSS du processus et plus gros bloc detenu par etape
+
+Une reference (baseline.json) est conservee a cote de ce script: un debit inferieur
+ou une memoire superieure a la reference au-dela de --tolerance est signale comme
+regression (code de sortie 1). Les debits dependent de la machine: regenerer la
+reference avec --save-baseline apres un changement d'environnement.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --scales 10x1 50x5 --extraction concurrent
+    python benchmarks/bench_pipeline.py --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_SCALES = ['10x1', '50x5', '200x10']
+# Date de fin fixe: memes donnees d'un lancement a l'autre
+END_DATE = '2025-01-01'
+THROUGHPUT_KEYS = ['extract_rows_per_sec', 'transform_rows_per_sec', 'load_rows_per_sec', 'total_rows_per_sec']
+MEMORY_KEYS = ['peak_rss_mb']
+
+
+def parse_scale(scale):
+    n_tickers, years = scale.lower().split('x')
+    return int(n_tickers), int(years)
+
+
+def run_scale(n_tickers, years, extraction, seed, workdir):
+    """Execute le pipeline sur une echelle dans le processus courant et retourne les mesures"""
+    sys.path.insert(0, os.path.dirname(BENCH_DIR))
+    sys.path.insert(0, BENCH_DIR)
+    import etl_stocks
+    from sqlite_db import SQLiteConnection
+    from synthetic_source import SyntheticSource, synthetic_tickers
+
+    # === SOURCE ET BASE DE SUBSTITUTION ===
+    etl_stocks.yf = SyntheticSource(seed=seed)
+    mapping = synthetic_tickers(n_tickers)
+    etl_stocks.TICKER_MAPPING.update(mapping)
+    # Base sur disque: le pic RSS mesure le pipeline, pas les tables de la base locale
+    db = SQLiteConnection(os.path.join(workdir, 'bench.sqlite'))
+    etl_stocks._db_connection = db
+
+    etl_stocks.PIPELINE_CONFIG.update({
+        'cache_mode': 'off',
+        'load_mode': 'full',
+        'db_loader': 'executemany',
+        'async_extraction': extraction == 'async',
+        'download_batch_size': 50 if extraction == 'batched' else 0,
+        'max_workers': 8 if extraction == 'concurrent' else 1,
+    })
+
+    end_date = pd.Timestamp(END_DATE)
+    start_date = (end_date - pd.DateOffset(years=years)).strftime('%Y-%m-%d')
+    tickers = list(mapping)
+    windows = {ticker: (start_date, END_DATE) for ticker in tickers}
+
+    etl_stocks._stage_memory.clear()
+    etl_stocks.METRICS.reset(True)
+    stats = {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+    started = time.perf_counter()
+    etl_stocks.process_tickers(tickers, windows, stats)
+    wall_seconds = time.perf_counter() - started
+
+    run = etl_stocks.METRICS.build_report({
+        'duration_seconds': wall_seconds, 'tickers': n_tickers,
+        'success': stats['success'], 'errors': stats['errors'], 'rows': stats['rows'],
+    })[-1]
+    loaded_rows = db.row_count()
+    if stats['errors'] or loaded_rows != stats['rows']:
+        raise RuntimeError(f"Run incoherent: {stats['errors']} erreurs, {loaded_rows} lignes en base "
+                           f"pour {stats['rows']} comptees")
+
+    rows = stats['rows']
+    stages = run['stage_seconds']
+    load_seconds = stages['convert'] + stages['db_write']
+    return {
+        'rows': rows,
+        'wall_seconds': round(wall_seconds, 3),
+        'extract_rows_per_sec': round(rows / stages['fetch']) if stages['fetch'] else None,
+        'transform_rows_per_sec': round(rows / stages['transform']) if stages['transform'] else None,
+        'load_rows_per_sec': round(rows / load_seconds) if load_seconds else None,
+        'total_rows_per_sec': round(rows / wall_seconds),
+        'peak_rss_mb': round(run['peak_rss_bytes'] / 1024 / 1024, 1) if run['peak_rss_bytes'] else None,
+        'stage_memory_mb': {stage: round(nbytes / 1024 / 1024, 2)
+                            for stage, nbytes in run['stage_memory_bytes'].items()},
+    }
+
+
+def run_scale_subprocess(scale, extraction, seed):
+    """Lance une echelle dans un processus neuf (pic RSS independant des echelles precedentes)"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', scale, '--extraction', extraction, '--seed', str(seed)],
+        capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Echelle {scale} en echec:\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def find_regressions(results, baseline, tolerance):
+    """Compare chaque mesure a la reference; retourne la liste des regressions"""
+    regressions = []
+    for scale, measures in results.items():
+        reference = baseline.get('scales', {}).get(scale)
+        if reference is None:
+            continue
+        for key in THROUGHPUT_KEYS:
+            if measures.get(key) and reference.get(key) and measures[key] < reference[key] * (1 - tolerance):
+                regressions.append(f"{scale} {key}: {measures[key]:,} < reference {reference[key]:,}")
+        for key in MEMORY_KEYS:
+            if measures.get(key) and reference.get(key) and measures[key] > reference[key] * (1 + tolerance):
+                regressions.append(f"{scale} {key}: {measures[key]:,} > reference {reference[key]:,}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', nargs='+', default=DEFAULT_SCALES, help='Echelles NxM (tickers x annees)')
+    parser.add_argument('--extraction', choices=['sequential', 'concurrent', 'batched', 'async'], default='sequential')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Enregistre les mesures comme reference')
+    parser.add_argument('--tolerance', type=float, default=0.30, help='Ecart tolere avant regression (0.30 = 30%%)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with tempfile.TemporaryDirectory() as workdir:
+            print(json.dumps(run_scale(*parse_scale(args.child), args.extraction, args.seed, workdir)))
+        return 0
+
+    print(f"{'echelle':>8} | {'lignes':>10} | {'extract/s':>10} | {'transform/s':>11} | "
+          f"{'load/s':>9} | {'total/s':>9} | {'pic RSS Mo':>10}")
+    print("-" * 84)
+    results = {}
+    for scale in args.scales:
+        measures = results[scale] = run_scale_subprocess(scale, args.extraction, args.seed)
+        print(f"{scale:>8} | {measures['rows']:>10,} | {measures['extract_rows_per_sec']:>10,} | "
+              f"{measures['transform_rows_per_sec']:>11,} | {measures['load_rows_per_sec']:>9,} | "
+              f"{measures['total_rows_per_sec']:>9,} | {measures['peak_rss_mb']:>10}")
+
+    if args.save_baseline:
+        baseline = {
+            'meta': {'python': platform.python_version(), 'machine': platform.machine(),
+                     'extraction': args.extraction, 'seed': args.seed, 'end_date': END_DATE},
+            'scales': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2)
+            baseline_file.write('\n')
+        print(f"\nReference enregistree: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nAucune reference: lancer avec --save-baseline pour en creer une")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get('meta', {}).get('extraction') != args.extraction:
+        print(f"\nReference mesuree en mode {baseline.get('meta', {}).get('extraction')}, comparaison ignoree")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nREGRESSIONS (tolerance {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nAucune regression par rapport a la reference (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Base locale de substitution: connexion SQLite exposant l'interface pymysql utilisee
+par etl_stocks (cursor/execute/executemany/commit/rollback/ping/open).
+
+Les requetes MySQL sont traduites a la volee: parametres %s -> ?, options de table
+(ENGINE, CHARSET) retirees, INDEX en ligne convertis en CREATE INDEX. REPLACE INTO
+et les agregats GROUP BY sont compris tels quels par SQLite. LOAD DATA LOCAL INFILE
+n'a pas d'equivalent: seul le chargeur executemany peut etre mesure ainsi.
+"""
+import re
+import sqlite3
+
+_INLINE_INDEX = re.compile(r',\s*INDEX\s+(\w+)\s*\(([^)]*)\)', re.IGNORECASE)
+_TABLE_OPTIONS = re.compile(r'\)\s*ENGINE\s*=.*$', re.IGNORECASE | re.DOTALL)
+_CREATE_TABLE = re.compile(r'CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE)
+
+
+def translate(query):
+    """Traduit une requete MySQL; retourne (requete SQLite, CREATE INDEX a executer ensuite)"""
+    query = query.strip()
+    indexes = []
+    table = _CREATE_TABLE.match(query)
+    if table:
+        indexes = [f'CREATE INDEX IF NOT EXISTS {name} ON {table.group(1)} ({columns})'
+                   for name, columns in _INLINE_INDEX.findall(query)]
+        query = _TABLE_OPTIONS.sub(')', _INLINE_INDEX.sub('', query))
+    return query.replace('%s', '?'), indexes
+
+
+class SQLiteCursor:
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def execute(self, query, args=None):
+        query, indexes = self._connection.translate(query)
+        self._cursor.execute(query, tuple(args) if args is not None else ())
+        for index in indexes:
+            self._cursor.execute(index)
+        return self._cursor.rowcount
+
+    def executemany(self, query, seq_of_args):
+        query, _ = self._connection.translate(query)
+        self._cursor.executemany(query, seq_of_args)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class SQLiteConnection:
+    """Remplace la connexion pymysql persistante de etl_stocks (etl_stocks._db_connection)"""
+
+    def __init__(self, path=':memory:'):
+        self.raw = sqlite3.connect(path, check_same_thread=False)
+        self.raw.execute('PRAGMA journal_mode = WAL')
+        self.raw.execute('PRAGMA synchronous = NORMAL')
+        self.open = True
+        self._translated = {}
+
+    def translate(self, query):
+        translated = self._translated.get(query)
+        if translated is None:
+            translated = self._translated[query] = translate(query)
+        return translated
+
+    def cursor(self):
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=True):
+        return True
+
+    def close(self):
+        self.raw.close()
+        self.open = False
+
+    def row_count(self, table='historical_prices'):
+        return self.raw.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
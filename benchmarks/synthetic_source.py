@@ -0,0 +1,94 @@
+"""
+Source OHLCV synthetique et deterministe, interchangeable avec le module yfinance
+
+Expose la meme interface que celle utilisee par etl_stocks:
+    source.Ticker(symbol).history(start=..., end=...)
+    source.download(tickers, start=..., end=..., group_by='column', ...)
+
+Les prix d'un ticker ne dependent que de (seed, ticker, date): deux runs, ou deux
+fenetres qui se recouvrent, rendent exactement les memes valeurs.
+"""
+import zlib
+
+import numpy as np
+import pandas as pd
+
+EXCHANGE_TZ = 'America/New_York'
+
+
+def synthetic_tickers(n_tickers):
+    """Symboles SYN0000..SYNnnnn et metadonnees au format TICKER_MAPPING"""
+    sectors = ['Technologie', 'Finance', 'Energie', 'Industrie', 'Sante']
+    mapping = {}
+    for i in range(n_tickers):
+        symbol = f'SYN{i:04d}'
+        mapping[symbol] = {'sector': sectors[i % len(sectors)], 'type': 'stock', 'name': f'Synthetic {i}',
+                           'country': 'USA', 'continent': 'North America'}
+    return mapping
+
+
+class SyntheticSource:
+    """Marche aleatoire geometrique par ticker, jours ouvres uniquement"""
+
+    def __init__(self, seed=42, origin='1990-01-01'):
+        self.seed = seed
+        self.origin = pd.Timestamp(origin)
+        self.calls = 0
+        self._calendars = {}
+
+    def _business_days(self, end):
+        """Jours ouvres [origin, end), calcules une fois par date de fin"""
+        days = self._calendars.get(end)
+        if days is None:
+            all_days = np.arange(self.origin.to_datetime64().astype('datetime64[D]'),
+                                 pd.Timestamp(end).to_datetime64().astype('datetime64[D]'))
+            days = self._calendars[end] = pd.DatetimeIndex(all_days[np.is_busday(all_days)].astype('datetime64[ns]'))
+        return days
+
+    def _bars(self, ticker, start, end):
+        # Serie complete depuis l'origine, tronquee ensuite: meme valeur pour une date donnee
+        days = self._business_days(end)
+        # Un generateur par champ: les n premiers tirages ne dependent pas de la date de fin
+        returns_rng, spread_rng, open_rng, volume_rng = \
+            np.random.default_rng([self.seed, zlib.crc32(ticker.encode())]).spawn(4)
+        returns = returns_rng.normal(0.0003, 0.015, len(days))
+        close = 50.0 * np.exp(np.cumsum(returns))
+        spread = np.abs(spread_rng.normal(0, 0.01, len(days))) * close
+        open_ = close * (1 + open_rng.normal(0, 0.005, len(days)))
+        volume = volume_rng.integers(100_000, 50_000_000, len(days))
+
+        keep = days >= pd.Timestamp(start)
+        index = days[keep].tz_localize(EXCHANGE_TZ).rename('Date')
+        return pd.DataFrame({
+            'Open': open_[keep],
+            'High': np.maximum(open_, close)[keep] + spread[keep],
+            'Low': np.minimum(open_, close)[keep] - spread[keep],
+            'Close': close[keep],
+            'Volume': volume[keep],
+            'Dividends': 0.0,
+            'Stock Splits': 0.0,
+        }, index=index)
+
+    def Ticker(self, ticker):
+        return _SyntheticTicker(self, ticker)
+
+    def download(self, tickers, start=None, end=None, **kwargs):
+        """Format large yf.download(group_by='column'): colonnes MultiIndex (Price, Ticker)"""
+        self.calls += 1
+        if isinstance(tickers, str):
+            tickers = tickers.split()
+        frames = {ticker: self._bars(ticker, start, end).drop(columns=['Dividends', 'Stock Splits'])
+                  for ticker in tickers}
+        data = pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+        return data.swaplevel(axis=1).sort_index(axis=1, level=0, sort_remaining=False)
+
+
+class _SyntheticTicker:
+
+    def __init__(self, source, ticker):
+        self.source = source
+        self.ticker = ticker
+
+    def history(self, start=None, end=None, **kwargs):
+        self.source.calls += 1
+        return self.source._bars(self.ticker, start, end)
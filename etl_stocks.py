@@ -1,49 +1,163 @@
-import pandas as pd
-import pymysql
+import importlib
 import logging
 import traceback
 import os
+import sys
 from datetime import datetime
-import yfinance as yf
 import time
-from dotenv import load_dotenv
+import queue
+import random
+import csv
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import json
+import shutil
+import uuid
+import zlib
+from urllib.parse import quote, unquote
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-# === CHARGEMENT DES VARIABLES D'ENVIRONNEMENT ===
-load_dotenv()
+# === DEPENDANCES LOURDES IMPORTEES A LA DEMANDE ===
+class _LazyModule:
+    """
+    Import differe d'une dependance lourde: le module n'est importe qu'au premier
+    acces a un attribut, puis remplace le proxy dans les globales de ce module.
+    importlib.import_module prend le verrou d'import (sur depuis les threads).
+    """
+
+    def __init__(self, name, alias):
+        self._name = name
+        self._alias = alias
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        if globals().get(self._alias) is self:
+            globals()[self._alias] = module
+        return getattr(module, attr)
 
-# Vérification que le fichier .env est bien chargé
-if not os.getenv('DB_HOST'):
-    print("ERREUR: Fichier .env non trouvé ou mal configuré!")
-    print("Créez un fichier .env avec les variables de configuration.")
-    exit(1)
+pd = _LazyModule('pandas', 'pd')
+np = _LazyModule('numpy', 'np')
+pymysql = _LazyModule('pymysql', 'pymysql')
+yf = _LazyModule('yfinance', 'yf')
+# asyncio ne sert qu'a l'extraction asynchrone (PIPELINE_ASYNC_EXTRACTION)
+asyncio = _LazyModule('asyncio', 'asyncio')
+# Dependance optionnelle: uniquement pour le sink Parquet (PIPELINE_SINK=parquet ou both)
+pa = _LazyModule('pyarrow', 'pa')
+pq = _LazyModule('pyarrow.parquet', 'pq')
+ds = _LazyModule('pyarrow.dataset', 'ds')
 
-print("[DOTENV] Variables d'environnement chargées avec succès")
+# Logger du module: aucun handler tant que setup_logging() n'a pas ete appele
+logger = logging.getLogger(__name__)
 
 # === CONFIGURATION LOGS ROBUSTE ===
+_run_timestamp = None
+# Thread d'ecriture des logs en mode LOG_QUEUE (QueueListener), None sinon
+_log_listener = None
+_log_atexit_registered = False
+
+class _RecordQueueHandler(logging.Handler):
+    """
+    Depose l'enregistrement brut dans la file (QueueHandler sans prepare()): le message
+    %-style n'est formate que par le thread d'ecriture, jamais par le thread appelant
+    """
+
+    def __init__(self, log_queue):
+        super().__init__()
+        self.queue = log_queue
+
+    def emit(self, record):
+        self.queue.put_nowait(record)
+
+class RepetitiveLogFilter(logging.Filter):
+    """
+    Limite les messages repetitifs (meme gabarit %-style, ticker different) a rate_per_sec
+    par gabarit et par seconde, pour INFO et en dessous; avertissements, erreurs et messages
+    sans arguments passent toujours. Le premier message accepte apres une suppression
+    indique le nombre de messages omis.
+    """
+
+    def __init__(self, rate_per_sec):
+        super().__init__()
+        self.rate_per_sec = rate_per_sec
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not record.args:
+            return True
+        with self._lock:
+            # Fenetre d'une seconde par gabarit: [debut, acceptes, omis]
+            window = self._windows.get(record.msg)
+            if window is None or record.created - window[0] >= 1.0:
+                omitted = window[2] if window is not None else 0
+                self._windows[record.msg] = [record.created, 1, 0]
+                if omitted and isinstance(record.args, tuple):
+                    record.msg = f"{record.msg} (+%d messages similaires omis)"
+                    record.args = record.args + (omitted,)
+                return True
+            if window[1] < self.rate_per_sec:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+def stop_log_listener():
+    """Vide la file et arrete le thread d'ecriture (fin de processus)"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def flush_logging():
+    """Ecrit les enregistrements en file (fin d'une partition: un processus fils ne lance pas atexit)"""
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener.start()
+
+def get_run_timestamp():
+    """Horodatage du run, partage par le fichier log et le rapport de metriques"""
+    global _run_timestamp
+    if _run_timestamp is None:
+        _run_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return _run_timestamp
+
 def setup_logging():
     """Configure le système de logging avec variables d'environnement"""
+    global _log_listener, _log_atexit_registered
     
     # Récupération des paramètres depuis .env
     log_dir = os.getenv('LOG_DIRECTORY', 'logs')
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
     log_to_file = os.getenv('LOG_TO_FILE', 'True').lower() == 'true'
     log_to_console = os.getenv('LOG_TO_CONSOLE', 'True').lower() == 'true'
+    # File + thread d'ecriture: aucune E/S de log dans les threads d'extraction et de chargement
+    log_queue = os.getenv('LOG_QUEUE', 'False').lower() == 'true'
+    # Messages repetitifs par gabarit et par seconde (0 = pas de limite)
+    log_rate_limit = int(os.getenv('LOG_RATE_LIMIT_PER_SEC', 0))
     
     # Créer le dossier logs s'il n'existe pas
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
     
     # Nom du fichier log avec timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_filename = os.path.join(log_dir, f"etl_pipeline_{timestamp}.log")
+    log_filename = os.path.join(log_dir, f"etl_pipeline_{get_run_timestamp()}.log")
     
     # Configuration du logger principal
     logger = logging.getLogger(__name__)
     logger.setLevel(getattr(logging, log_level))
     
-    # Supprimer les handlers existants
+    # Supprimer les handlers et filtres existants (et le thread d'ecriture precedent)
+    stop_log_listener()
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        handler.close()
+    for log_filter in logger.filters[:]:
+        logger.removeFilter(log_filter)
+    handlers = []
     
     # === HANDLER FICHIER (si activé) ===
     if log_to_file:
@@ -53,7 +167,7 @@ def setup_logging():
             '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
     # === HANDLER CONSOLE (si activé) ===
     if log_to_console:
@@ -63,7 +177,27 @@ def setup_logging():
             '%(asctime)s - %(levelname)s - %(message)s'
         )
         console_handler.setFormatter(console_formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
+
+    # === FILE D'ATTENTE (si activee): handlers servis par un thread d'ecriture ===
+    if log_queue and handlers:
+        # Import a la demande: logging.handlers alourdirait l'import du module
+        import atexit
+        from logging.handlers import QueueListener
+
+        records = queue.SimpleQueue()
+        _log_listener = QueueListener(records, *handlers, respect_handler_level=True)
+        _log_listener.start()
+        if not _log_atexit_registered:
+            atexit.register(stop_log_listener)
+            _log_atexit_registered = True
+        logger.addHandler(_RecordQueueHandler(records))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+    if log_rate_limit > 0:
+        logger.addFilter(RepetitiveLogFilter(log_rate_limit))
     
     # Log de démarrage
     logger.info("=" * 80)
@@ -71,41 +205,129 @@ def setup_logging():
     if log_to_file:
         logger.info(f"[INIT] Fichier log: {log_filename}")
     logger.info(f"[INIT] Niveau de log: {log_level}")
+    if log_queue:
+        logger.info("[INIT] Ecriture des logs en file (thread dedie)")
+    if log_rate_limit > 0:
+        logger.info(f"[INIT] Messages repetitifs limites a {log_rate_limit}/s par gabarit")
     logger.info("=" * 80)
     
     return logger
 
-# === INITIALISATION DU LOGGER ===
-logger = setup_logging()
-
 # === CONFIGURATION MYSQL DEPUIS .ENV ===
-MYSQL_CONFIG = {
-    "host": os.getenv('DB_HOST'),
-    "port": int(os.getenv('DB_PORT', 3306)),
-    "user": os.getenv('DB_USER'),
-    "password": os.getenv('DB_PASSWORD'),
-    "database": os.getenv('DB_DATABASE')
-}
-
-# Validation de la configuration MySQL
-required_db_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_DATABASE']
-missing_vars = [var for var in required_db_vars if not os.getenv(var)]
-if missing_vars:
-    logger.error(f"[CONFIG] Variables manquantes dans .env: {missing_vars}")
-    exit(1)
-
-logger.info(f"[CONFIG] Configuration MySQL chargée - Host: {MYSQL_CONFIG['host']}")
+def build_mysql_config():
+    """Parametres de connexion MySQL lus dans l'environnement"""
+    return {
+        "host": os.getenv('DB_HOST'),
+        "port": int(os.getenv('DB_PORT', 3306)),
+        "user": os.getenv('DB_USER'),
+        "password": os.getenv('DB_PASSWORD'),
+        "database": os.getenv('DB_DATABASE')
+    }
 
 # === CONFIGURATION PIPELINE DEPUIS .ENV ===
-PIPELINE_CONFIG = {
-    'max_retries': int(os.getenv('PIPELINE_MAX_RETRIES', 3)),
-    'sleep_between_retries': int(os.getenv('PIPELINE_SLEEP_BETWEEN_RETRIES', 2)),
-    'yf_timeout': int(os.getenv('YF_TIMEOUT', 30)),
-    'yf_threads': os.getenv('YF_THREADS', 'True').lower() == 'true',
-    'yf_auto_adjust': os.getenv('YF_AUTO_ADJUST', 'True').lower() == 'true'
-}
+def env_list(name):
+    """Variable d'environnement 'a, b, c' -> ['a', 'b', 'c'] (vide -> [])"""
+    return [item.strip() for item in os.getenv(name, '').split(',') if item.strip()]
+
+def build_pipeline_config():
+    """Parametres du pipeline lus dans l'environnement (valeurs par defaut sinon)"""
+    return {
+        'max_retries': int(os.getenv('PIPELINE_MAX_RETRIES', 3)),
+        'sleep_between_retries': int(os.getenv('PIPELINE_SLEEP_BETWEEN_RETRIES', 2)),
+        'yf_timeout': int(os.getenv('YF_TIMEOUT', 30)),
+        # Threads internes de yf.download (mode groupe uniquement)
+        'yf_threads': os.getenv('YF_THREADS', 'True').lower() == 'true',
+        'yf_auto_adjust': os.getenv('YF_AUTO_ADJUST', 'True').lower() == 'true',
+        # Telechargements simultanes: > 1 active l'extraction concurrente (opt-in: N requetes
+        # simultanees vers Yahoo exposent au throttling HTTP 429)
+        'max_workers': int(os.getenv('PIPELINE_MAX_WORKERS', 1)),
+        # Mode de chargement: 'full' (annee glissante) ou 'incremental' (delta depuis la derniere date)
+        'load_mode': os.getenv('PIPELINE_LOAD_MODE', 'full').lower(),
+        # Jours re-telecharges avant la derniere date chargee (corrections tardives)
+        'incremental_overlap_days': int(os.getenv('PIPELINE_INCREMENTAL_OVERLAP_DAYS', 3)),
+        # Chargeur MySQL: 'executemany' (REPLACE INTO) ou 'load_data' (LOAD DATA LOCAL INFILE + fusion)
+        'db_loader': os.getenv('PIPELINE_DB_LOADER', 'executemany').lower(),
+        # Lignes accumulees (plusieurs tickers) avant chaque commit MySQL
+        'commit_rows': int(os.getenv('PIPELINE_COMMIT_ROWS', 5000)),
+        # Taille des blocs transmis au chargement (borne la memoire des gros historiques)
+        'chunk_rows': int(os.getenv('PIPELINE_CHUNK_ROWS', 50000)),
+        # Tickers par appel yf.download en mode groupe (0 ou 1 = un appel par ticker)
+        'download_batch_size': int(os.getenv('PIPELINE_DOWNLOAD_BATCH_SIZE', 0)),
+        # Cache local des reponses yfinance: 'off', 'readwrite' ou 'replay' (aucun acces reseau)
+        'cache_mode': os.getenv('PIPELINE_CACHE_MODE', 'off').lower(),
+        'cache_path': os.getenv('PIPELINE_CACHE_PATH', os.path.join('cache', 'yf_cache.sqlite')),
+        # Duree de validite des derniers jours telecharges (les jours scelles n'expirent jamais)
+        'cache_ttl_seconds': int(os.getenv('PIPELINE_CACHE_TTL_SECONDS', 900)),
+        # Jours precedant le telechargement encore revisables par Yahoo (seuls retelecharges a expiration)
+        'cache_unsettled_days': int(os.getenv('PIPELINE_CACHE_UNSETTLED_DAYS', 2)),
+        'cache_max_mb': int(os.getenv('PIPELINE_CACHE_MAX_MB', 500)),
+        # Extraction asynchrone avec limiteur de debit adaptatif (AIMD)
+        'async_extraction': os.getenv('PIPELINE_ASYNC_EXTRACTION', 'False').lower() == 'true',
+        # Tickers en cours au plus en mode asynchrone (le debit reste plafonne par le limiteur)
+        'async_max_in_flight': int(os.getenv('PIPELINE_ASYNC_MAX_IN_FLIGHT', 8)),
+        'rate_limit_per_sec': float(os.getenv('PIPELINE_RATE_LIMIT_PER_SEC', 4)),
+        'max_backoff_seconds': float(os.getenv('PIPELINE_MAX_BACKOFF_SECONDS', 60)),
+        # Rapport de metriques par ticker et par etape (JSONL a cote du fichier log)
+        'metrics_enabled': os.getenv('PIPELINE_METRICS', 'False').lower() == 'true',
+        # Fichier texte Prometheus (collecteur textfile de node_exporter), vide = desactive
+        'prometheus_textfile': os.getenv('PIPELINE_PROMETHEUS_TEXTFILE', ''),
+        # Indicateurs precalcules (rendements, moyennes mobiles, volatilite) dans price_analytics
+        'analytics_enabled': os.getenv('PIPELINE_ANALYTICS', 'True').lower() == 'true',
+        # Agregats journaliers par secteur / pays / continent (tables *_daily_stats)
+        'aggregates_enabled': os.getenv('PIPELINE_AGGREGATES', 'True').lower() == 'true',
+        # Destination des donnees: 'mysql', 'parquet' (lac local) ou 'both'
+        'sink': os.getenv('PIPELINE_SINK', 'mysql').lower(),
+        'parquet_path': os.getenv('PIPELINE_PARQUET_PATH', os.path.join('lake', 'historical_prices')),
+        'parquet_compression': os.getenv('PIPELINE_PARQUET_COMPRESSION', 'zstd'),
+        # Fichiers par partition au-dela desquels la partition est compactee en un seul fichier
+        'parquet_compact_files': int(os.getenv('PIPELINE_PARQUET_COMPACT_FILES', 8)),
+        # Schema MySQL: 'wide' (table historical_prices) ou 'normalized' (tickers + daily_prices + vue)
+        'schema_mode': os.getenv('PIPELINE_SCHEMA_MODE', 'wide').lower(),
+        # Partitionnement annuel de daily_prices (schema normalise, applique a la creation)
+        'partition_by_year': os.getenv('PIPELINE_PARTITION_BY_YEAR', 'False').lower() == 'true',
+        # Detection des changements: empreinte par ligne, seules les lignes nouvelles/modifiees sont ecrites
+        'change_detection': os.getenv('PIPELINE_CHANGE_DETECTION', 'True').lower() == 'true',
+        # Univers de tickers: vide (TICKER_MAPPING integre), fichier .csv/.yaml ou 'table:<nom>' (MySQL)
+        'universe_source': os.getenv('PIPELINE_UNIVERSE', ''),
+        # Filtres de l'univers (listes separees par des virgules, vide = pas de filtre)
+        'universe_sectors': env_list('PIPELINE_UNIVERSE_SECTORS'),
+        'universe_types': env_list('PIPELINE_UNIVERSE_TYPES'),
+        'universe_countries': env_list('PIPELINE_UNIVERSE_COUNTRIES'),
+        # Partition deterministe de l'univers entre plusieurs processus: crc32(ticker) % count == index
+        'shard_count': int(os.getenv('PIPELINE_SHARD_COUNT', 1)),
+        'shard_index': int(os.getenv('PIPELINE_SHARD_INDEX', 0)),
+        # Processus de chargement (un par partition, chacun avec sa connexion MySQL); --workers prioritaire
+        'processes': int(os.getenv('PIPELINE_PROCESSES', 1)),
+        # Points de reprise par ticker (SQLite local, tables etl_runs / etl_run_tickers) pour --resume
+        'checkpoint_enabled': os.getenv('PIPELINE_CHECKPOINT', 'True').lower() == 'true',
+        'checkpoint_path': os.getenv('PIPELINE_CHECKPOINT_PATH', os.path.join('cache', 'etl_runs.sqlite')),
+        # Controles qualite vectorises avant chargement (lignes rejetees -> table price_quarantine)
+        'validation_enabled': os.getenv('PIPELINE_VALIDATION', 'True').lower() == 'true',
+        # Variation de cloture d'un jour a l'autre au-dela de laquelle la ligne est rejetee (0 = desactive)
+        'max_daily_jump': float(os.getenv('PIPELINE_VALIDATION_MAX_JUMP', 0.5)),
+        # Jours ouvres manquants entre deux lignes au-dela desquels un trou est signale
+        'max_gap_days': int(os.getenv('PIPELINE_VALIDATION_MAX_GAP_DAYS', 5)),
+        # Mode intraday (--intraday): intervalles charges, chacun dans sa table intraday_prices_<intervalle>
+        'intraday_intervals': env_list('PIPELINE_INTRADAY_INTERVALS') or ['5m'],
+        # Retention des barres intraday en jours (partitions journalieres plus anciennes supprimees)
+        'intraday_retention_days': int(os.getenv('PIPELINE_INTRADAY_RETENTION_DAYS', 30)),
+        # Barres accumulees (plusieurs tickers) avant chaque INSERT IGNORE + commit
+        'intraday_batch_rows': int(os.getenv('PIPELINE_INTRADAY_BATCH_ROWS', 20000)),
+        # Store local memmap (un fichier par ticker et par champ), alimente apres chaque ecriture reussie
+        'memmap_store': os.getenv('PIPELINE_MEMMAP_STORE', 'False').lower() == 'true',
+        'memmap_path': os.getenv('PIPELINE_MEMMAP_PATH', os.path.join('store', 'timeseries')),
+        # Taille maximale du cache LRU de l'API de lecture (PriceReader), en Mo
+        'read_cache_mb': int(os.getenv('PIPELINE_READ_CACHE_MB', 256)),
+        # Actions sur titres: dividendes/divisions stockes, adj_close derive de facteurs cumules
+        # (telechargement non ajuste, YF_AUTO_ADJUST ignore)
+        'corporate_actions': os.getenv('PIPELINE_CORPORATE_ACTIONS', 'False').lower() == 'true',
+        # Ajustement des divisions (clotures Yahoo non ajustees deja corrigees des divisions)
+        'adjust_splits': os.getenv('PIPELINE_ADJUST_SPLITS', 'False').lower() == 'true'
+    }
 
-logger.info(f"[CONFIG] Configuration pipeline chargée - Max retries: {PIPELINE_CONFIG['max_retries']}")
+# Lecture pure de l'environnement courant; init_pipeline() les recharge apres le .env
+MYSQL_CONFIG = build_mysql_config()
+PIPELINE_CONFIG = build_pipeline_config()
 
 # ... reste de ton TICKER_MAPPING et code existant ...
 # === MAPPING DES TICKERS AVEC MÉTADONNÉES ===
@@ -156,10 +378,110 @@ TICKER_MAPPING = {
     'MRK': {'sector': 'Sante', 'type': 'stock', 'name': 'Merck & Co. Inc.', 'country': 'USA', 'continent': 'North America'}
 }
 
-# Validation du mapping
-print(f"[INIT] Pipeline configure pour {len(TICKER_MAPPING)} tickers")
 TICKERS = list(TICKER_MAPPING.keys())
-logger.info(f"[INIT] Tickers selectionnes: {TICKERS}")
+
+# === UNIVERS DE TICKERS (CSV / YAML / TABLE MYSQL) ===
+# Univers par defaut: copie du mapping integre (TICKER_MAPPING est remplace en place)
+DEFAULT_TICKER_MAPPING = dict(TICKER_MAPPING)
+UNIVERSE_COLUMNS = ['sector', 'type', 'name', 'country', 'continent']
+UNIVERSE_DEFAULTS = {'sector': 'Unknown', 'type': 'stock', 'name': 'Unknown',
+                     'country': 'Unknown', 'continent': 'Unknown'}
+# Ordre de chargement: priorite croissante (colonne 'priority' sinon selon le type), indices d'abord
+TYPE_PRIORITY = {'index': 0}
+DEFAULT_PRIORITY = 100
+
+def read_universe_csv(path):
+    """Lignes d'un CSV a entete: ticker, sector, type, name, country, continent[, priority]"""
+    with open(path, newline='', encoding='utf-8-sig') as universe_file:
+        return list(csv.DictReader(universe_file))
+
+def read_universe_yaml(path):
+    """
+    YAML au format TICKER_MAPPING ({ticker: {sector: ..., ...}})
+    ou liste d'entrees [{ticker: ..., sector: ..., ...}]
+    """
+    try:
+        import yaml
+    except ImportError as err:
+        raise ImportError(f"PyYAML requis pour un univers YAML ({path}): pip install pyyaml") from err
+    with open(path, encoding='utf-8') as universe_file:
+        content = yaml.safe_load(universe_file) or []
+    if isinstance(content, dict):
+        return [{'ticker': ticker, **(info or {})} for ticker, info in content.items()]
+    return content
+
+def read_universe_table(table):
+    """Lignes d'une table MySQL (par exemple la dimension tickers du schema normalise)"""
+    if not table.isidentifier():
+        raise ValueError(f"Nom de table d'univers invalide: {table!r}")
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT ticker, {', '.join(UNIVERSE_COLUMNS)} FROM {table}")
+            return [dict(zip(['ticker'] + UNIVERSE_COLUMNS, row)) for row in cursor.fetchall()]
+
+def read_universe_rows(source):
+    """Lignes brutes de l'univers selon la source (fichier .csv/.yaml/.yml ou 'table:<nom>')"""
+    if source.startswith('table:'):
+        return read_universe_table(source[len('table:'):])
+    extension = os.path.splitext(source)[1].lower()
+    if extension == '.csv':
+        return read_universe_csv(source)
+    if extension in ('.yaml', '.yml'):
+        return read_universe_yaml(source)
+    raise ValueError(f"Source d'univers non reconnue: {source!r} (.csv, .yaml/.yml ou table:<nom>)")
+
+def shard_of(ticker, shard_count):
+    """Partition d'un ticker: stable entre processus et entre runs (crc32, pas hash())"""
+    return zlib.crc32(ticker.encode('utf-8')) % shard_count
+
+def load_ticker_universe(source=None):
+    """
+    Univers filtre (secteur / type / pays), restreint a la partition du processus
+    et trie par priorite. Retourne un dict ticker -> metadonnees au format TICKER_MAPPING.
+    Un seul passage sur les lignes: lineaire pour des univers de plusieurs dizaines de milliers de symboles.
+    """
+    source = PIPELINE_CONFIG['universe_source'] if source is None else source
+    if source:
+        rows = read_universe_rows(source)
+    else:
+        rows = [{'ticker': ticker, **info} for ticker, info in DEFAULT_TICKER_MAPPING.items()]
+
+    filters = {
+        'sector': set(PIPELINE_CONFIG['universe_sectors']),
+        'type': set(PIPELINE_CONFIG['universe_types']),
+        'country': set(PIPELINE_CONFIG['universe_countries']),
+    }
+    filters = {column: values for column, values in filters.items() if values}
+    shard_count = max(1, PIPELINE_CONFIG['shard_count'])
+    shard_index = PIPELINE_CONFIG['shard_index']
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"PIPELINE_SHARD_INDEX={shard_index} hors de [0, {shard_count})")
+
+    entries = {}
+    for row in rows:
+        ticker = str(row.get('ticker') or '').strip()
+        if not ticker:
+            continue
+        info = {column: str(row.get(column) or UNIVERSE_DEFAULTS[column]).strip() for column in UNIVERSE_COLUMNS}
+        if any(info[column] not in values for column, values in filters.items()):
+            continue
+        if shard_count > 1 and shard_of(ticker, shard_count) != shard_index:
+            continue
+        priority = row.get('priority')
+        priority = int(priority) if priority not in (None, '') else TYPE_PRIORITY.get(info['type'], DEFAULT_PRIORITY)
+        # Doublon: la derniere ligne l'emporte, a la position de la premiere
+        entries[ticker] = (priority, info)
+
+    ordered = sorted(entries.items(), key=lambda item: item[1][0])
+    return {ticker: info for ticker, (_, info) in ordered}
+
+def apply_ticker_universe(source=None):
+    """Remplace en place TICKER_MAPPING et TICKERS par l'univers configure"""
+    universe = load_ticker_universe(source)
+    TICKER_MAPPING.clear()
+    TICKER_MAPPING.update(universe)
+    TICKERS[:] = list(universe)
+    return universe
 
 # Structure des colonnes finales
 columns_order = [
@@ -174,28 +496,90 @@ def get_rolling_year_dates():
     start_date = (today - pd.Timedelta(days=365)).strftime("%Y-%m-%d")
     return start_date, end_date
 
+def get_last_loaded_dates():
+    """
+    Derniere date chargee par ticker, en une seule requete groupee
+    (lue dans le lac Parquet quand MySQL n'est pas une destination)
+    """
+    if not uses_mysql_sink():
+        try:
+            lake = read_parquet_lake(columns=['date'], deduplicate=False)
+        except ImportError as err:
+            logger.warning(f"[INCREMENTAL] pyarrow indisponible, chargement complet: {err}")
+            return {}
+        return {ticker: last_date.date() for ticker, last_date in lake.groupby('ticker')['date'].max().items()}
+
+    try:
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                if uses_normalized_schema():
+                    # Parcours de la cle primaire (ticker_id, date) puis jointure sur la dimension
+                    cursor.execute("SELECT t.ticker, last.max_date FROM "
+                                   "(SELECT ticker_id, MAX(date) AS max_date FROM daily_prices GROUP BY ticker_id) last "
+                                   "JOIN tickers t ON t.ticker_id = last.ticker_id")
+                else:
+                    cursor.execute("SELECT ticker, MAX(date) FROM historical_prices GROUP BY ticker")
+                return {ticker: last_date for ticker, last_date in cursor.fetchall() if last_date}
+    except pymysql.Error as err:
+        # Table absente (premier lancement) ou base indisponible: chargement complet
+        logger.warning(f"[INCREMENTAL] Dernieres dates indisponibles, chargement complet: {err}")
+        return {}
+
+def get_extraction_windows(tickers):
+    """
+    Calcule la fenetre (start_date, end_date) a extraire pour chaque ticker.
+    En mode incremental, seule la periode manquante (plus un recouvrement)
+    est demandee; les nouveaux tickers retombent sur l'annee glissante.
+    Un ticker deja a jour recoit None.
+    """
+    start_date, end_date = get_rolling_year_dates()
+    windows = {ticker: (start_date, end_date) for ticker in tickers}
+
+    if PIPELINE_CONFIG['load_mode'] != 'incremental':
+        return windows
+
+    last_dates = get_last_loaded_dates()
+    overlap = pd.Timedelta(days=PIPELINE_CONFIG['incremental_overlap_days'])
+    delta_count = 0
+
+    for ticker in tickers:
+        last_date = last_dates.get(ticker)
+        if last_date is None:
+            continue
+
+        delta_start = max((pd.Timestamp(last_date) - overlap).strftime("%Y-%m-%d"), start_date)
+        if delta_start >= end_date:
+            windows[ticker] = None
+        else:
+            windows[ticker] = (delta_start, end_date)
+        delta_count += 1
+
+    logger.info(f"[INCREMENTAL] {delta_count} tickers en delta, "
+                f"{len(tickers) - delta_count} en chargement complet")
+    return windows
+
 def flatten_multiindex_columns(data, ticker):
     """
     Fonction specialisee pour aplatir les colonnes multi-indexees de yfinance 2.51+
     """
     try:
         if isinstance(data.columns, pd.MultiIndex):
-            logger.info(f"{ticker}: [MULTIINDEX] Colonnes multi-indexees detectees")
-            logger.debug(f"{ticker}: Colonnes originales: {data.columns.tolist()}")
+            logger.info("%s: [MULTIINDEX] Colonnes multi-indexees detectees", ticker)
+            logger.debug("%s: Colonnes originales: %s", ticker, data.columns)
             
             # Methode 1: Prendre le premier niveau (noms des colonnes standard)
             data.columns = data.columns.get_level_values(0)
-            logger.info(f"{ticker}: [FLATTEN] Colonnes aplaties: {list(data.columns)}")
+            logger.info("%s: [FLATTEN] Colonnes aplaties: %s", ticker, data.columns)
             
         elif hasattr(data.columns, 'droplevel'):
             # Methode alternative si get_level_values ne fonctionne pas
-            logger.info(f"{ticker}: [MULTIINDEX] Tentative droplevel pour colonnes complexes")
+            logger.info("%s: [MULTIINDEX] Tentative droplevel pour colonnes complexes", ticker)
             data.columns = data.columns.droplevel(1)
             
         return data
         
     except Exception as e:
-        logger.warning(f"{ticker}: [WARN] Erreur aplatissement colonnes: {e}")
+        logger.warning("%s: [WARN] Erreur aplatissement colonnes: %s", ticker, e)
         # Fallback: renommer manuellement si possible
         try:
             if len(data.columns) >= 6:  # Au minimum OHLCV + Date
@@ -206,369 +590,3727 @@ def flatten_multiindex_columns(data, ticker):
                     else:
                         new_columns.append(col)
                 data.columns = new_columns
-                logger.info(f"{ticker}: [FALLBACK] Fallback reussi: {list(data.columns)}")
+                logger.info("%s: [FALLBACK] Fallback reussi: %s", ticker, list(data.columns))
         except Exception as fallback_error:
-            logger.error(f"{ticker}: [ERROR] Echec fallback: {fallback_error}")
+            logger.error("%s: [ERROR] Echec fallback: %s", ticker, fallback_error)
         
         return data
 
-def fetch_stock_data_corrected(ticker, start_date, end_date, max_retries=3):
+# === CACHE LOCAL DES REPONSES BRUTES (SQLITE) ===
+RAW_CACHE_COLUMNS = {
+    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close',
+    'Volume': 'volume', 'Dividends': 'dividends', 'Stock Splits': 'stock_splits'
+}
+_cache_lock = threading.Lock()
+_cache_initialized = False
+
+def _cache_connect():
+    """Connexion SQLite au cache (une par appel, utilisable depuis les threads d'extraction)"""
+    global _cache_initialized
+    cache_path = PIPELINE_CONFIG['cache_path']
+    if not _cache_initialized:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+    conn = sqlite3.connect(cache_path, timeout=30)
+    if not _cache_initialized:
+        with _cache_lock:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("PRAGMA journal_mode = WAL")
+            # ticker: cle du cache (ticker et mode d'ajustement, cf. cache_key)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS raw_prices (
+                    ticker TEXT NOT NULL, date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+                    dividends REAL, stock_splits REAL,
+                    PRIMARY KEY (ticker, date)
+                ) WITHOUT ROWID
+            """)
+            # Plage [start_date, end_date) couverte par ticker, et date du telechargement
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    ticker TEXT PRIMARY KEY, start_date TEXT NOT NULL, end_date TEXT NOT NULL,
+                    fetched_at REAL NOT NULL, last_access REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            _cache_initialized = True
+    return conn
+
+def cache_fetch_start(coverage, start_date, end_date, now):
+    """
+    Debut de la partie de [start_date, end_date) a telecharger, d'apres la plage couverte
+    (start_date, end_date, fetched_at) du ticker. Les jours anterieurs de plus de
+    cache_unsettled_days au telechargement sont scelles; les suivants expirent apres
+    cache_ttl_seconds. Retourne None si le cache sert toute la fenetre.
+    """
+    if coverage is None or coverage[0] > start_date or coverage[1] <= start_date:
+        return start_date
+    fetch_start = coverage[1] if coverage[1] < end_date else None
+    if now - coverage[2] > PIPELINE_CONFIG['cache_ttl_seconds']:
+        fetched_day = pd.Timestamp(datetime.fromtimestamp(coverage[2])).normalize()
+        settled_end = (fetched_day - pd.Timedelta(days=PIPELINE_CONFIG['cache_unsettled_days'])).strftime("%Y-%m-%d")
+        if settled_end < min(coverage[1], end_date):
+            fetch_start = min(settled_end, fetch_start or end_date)
+    return None if fetch_start is None else max(fetch_start, start_date)
+
+def cache_key(ticker):
+    """
+    Cle du cache: ticker et mode d'ajustement des reponses (auto_adjust de Yahoo ou cours bruts
+    du mode actions). Les reponses d'un mode ne sont jamais servies dans l'autre; celles
+    des cles anterieures (ticker seul) ne sont plus lues et sortent par eviction.
+    """
+    return f"{ticker}|{'adjusted' if yf_auto_adjust() else 'raw'}"
+
+def cache_get(ticker, start_date, end_date, replay=False):
+    """
+    Lecture du cache pour [start_date, end_date).
+    En mode replay, les lignes presentes sont rendues sans controle de couverture.
+    Retourne (DataFrame au format yfinance ou None, debut de la fenetre a telecharger ou None):
+    le DataFrame couvre [start_date, debut), seul [debut, end_date) reste a telecharger.
+    """
+    key = cache_key(ticker)
+    conn = _cache_connect()
+    try:
+        now = time.time()
+        fetch_start = None
+        if not replay:
+            row = conn.execute(
+                "SELECT start_date, end_date, fetched_at FROM coverage WHERE ticker = ?", (key,)
+            ).fetchone()
+            fetch_start = cache_fetch_start(row, start_date, end_date, now)
+            if fetch_start == start_date:
+                return None, start_date
+
+        data = pd.read_sql_query(
+            f"SELECT date, {', '.join(RAW_CACHE_COLUMNS.values())} FROM raw_prices "
+            "WHERE ticker = ? AND date >= ? AND date < ? ORDER BY date",
+            conn, params=(key, start_date, fetch_start or end_date)
+        )
+        if replay and data.empty:
+            return None, None
+
+        with _cache_lock:
+            conn.execute("UPDATE coverage SET last_access = ? WHERE ticker = ?", (now, key))
+            conn.commit()
+    finally:
+        conn.close()
+
+    data.index = pd.DatetimeIndex(pd.to_datetime(data.pop('date')), name='Date')
+    logger.debug("%s: [CACHE] %d lignes servies depuis le cache", ticker, len(data))
+    return data.rename(columns={v: k for k, v in RAW_CACHE_COLUMNS.items()}), fetch_start
+
+def cache_put(ticker, start_date, end_date, data, record_empty=False):
+    """
+    Enregistre une reponse brute yfinance et etend la plage couverte du ticker.
+    Une reponse vide n'est enregistree qu'avec record_empty (fin de fenetre sans
+    nouvelle seance): seule la plage couverte et sa fraicheur sont mises a jour.
+    """
+    empty = data is None or data.empty
+    if empty and not record_empty:
+        return
+
+    key = cache_key(ticker)
+    rows = []
+    if not empty:
+        frame = data.rename(columns=RAW_CACHE_COLUMNS).reindex(columns=list(RAW_CACHE_COLUMNS.values()))
+        dates = pd.DatetimeIndex(data.index).strftime("%Y-%m-%d")
+        rows = list(zip([key] * len(frame), dates, *(frame[col].tolist() for col in frame.columns)))
+    now = time.time()
+
+    conn = _cache_connect()
+    try:
+        with _cache_lock:
+            if rows:
+                # La reponse fait foi sur sa fenetre: les seances disparues ne sont pas conservees
+                conn.execute(
+                    "DELETE FROM raw_prices WHERE ticker = ? AND date >= ? AND date < ?", (key, start_date, end_date)
+                )
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO raw_prices VALUES ({', '.join(['?'] * 9)})", rows
+                )
+            row = conn.execute(
+                "SELECT start_date, end_date, fetched_at FROM coverage WHERE ticker = ?", (key,)
+            ).fetchone()
+            if row is not None and row[0] <= end_date and start_date <= row[1]:
+                # Plages contigues: union; la fraicheur suit la plage qui va le plus loin
+                fetched_at = now if end_date >= row[1] else row[2]
+                start_date, end_date = min(row[0], start_date), max(row[1], end_date)
+            else:
+                fetched_at = now
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?)",
+                (key, start_date, end_date, fetched_at, now)
+            )
+            conn.commit()
+            _cache_evict(conn)
+    finally:
+        conn.close()
+
+def _cache_evict(conn):
+    """Eviction par taille: supprime les tickers les moins recemment lus"""
+    max_bytes = PIPELINE_CONFIG['cache_max_mb'] * 1024 * 1024
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+
+    def used_bytes():
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    if used_bytes() <= max_bytes:
+        return
+
+    evicted = 0
+    for (ticker,) in conn.execute("SELECT ticker FROM coverage ORDER BY last_access").fetchall():
+        conn.execute("DELETE FROM raw_prices WHERE ticker = ?", (ticker,))
+        conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+        conn.commit()
+        evicted += 1
+        if used_bytes() <= max_bytes:
+            break
+    conn.execute("PRAGMA incremental_vacuum")
+    logger.info(f"[CACHE] Eviction de {evicted} tickers (taille max {PIPELINE_CONFIG['cache_max_mb']} Mo)")
+
+def download_history(ticker, start_date, end_date):
+    """
+    Telechargement yfinance d'un ticker en passant par le cache local si active.
+    En mode replay, aucun acces reseau: un cache manquant donne un DataFrame vide.
+    """
+    cache_mode = PIPELINE_CONFIG['cache_mode']
+    fetch_start = start_date
+    if cache_mode in ('readwrite', 'replay'):
+        cached, fetch_start = cache_get(ticker, start_date, end_date, replay=cache_mode == 'replay')
+        if cached is not None and fetch_start is None:
+            return cached
+        if cache_mode == 'replay':
+            logger.warning(f"{ticker}: [CACHE] Absent du cache (mode replay)")
+            return pd.DataFrame()
+
+    # === MÉTHODE ALTERNATIVE : Utiliser Ticker object ===
+    ticker_obj = yf.Ticker(ticker)
+    data = ticker_obj.history(start=fetch_start, end=end_date, auto_adjust=yf_auto_adjust())
+
+    if cache_mode == 'readwrite':
+        # Fin de fenetre vide (aucune nouvelle seance): le telechargement est tout de meme
+        # enregistre pour ne pas etre repete a chaque execution
+        cache_put(ticker, fetch_start, end_date, data, record_empty=fetch_start > start_date)
+        if fetch_start > start_date:
+            # Seuls les derniers jours ont ete telecharges: fenetre complete relue depuis le cache
+            return cache_get(ticker, start_date, end_date, replay=True)[0]
+    return data
+
+def transform_raw_prices(data, ticker):
+    """
+    Transforme un DataFrame brut yfinance (index Date, colonnes OHLCV) au format columns_order.
+    Retourne None si les prix sont invalides (le telechargement doit etre retente).
+    """
+    # === VÉRIFICATION DES VRAIES DONNÉES ===
+    # Afficher les vraies valeurs pour debug
+    if not data.empty:
+        sample_close = data['Close'].iloc[0] if 'Close' in data.columns else 0
+        logger.debug("%s: [DEBUG] Exemple Close = %s", ticker, sample_close)
+        if sample_close == 0:
+            logger.error(f"{ticker}: [ERROR] Données Close = 0, problème de récupération!")
+
+    # === RENOMMAGE SIMPLE (les colonnes de .history() sont déjà simples) ===
+    logger.debug("%s: [COLUMNS] Colonnes disponibles: %s", ticker, data.columns)
+
+    column_mapping = {
+        'Open': 'open',
+        'High': 'high',
+        'Low': 'low',
+        'Close': 'close',
+        'Volume': 'volume'
+    }
+
+    # === VÉRIFICATION DES VRAIES VALEURS ===
+    if 'Close' in data.columns and not data['Close'].empty:
+        avg_close = data['Close'].mean()
+        logger.info("%s: [VALIDATION] Prix moyen Close = %.2f", ticker, avg_close)
+        if avg_close == 0:
+            logger.error(f"{ticker}: [ERROR] Prix moyen = 0, données invalides!")
+            return None
+
+    # === CONSTRUCTION DIRECTE DU RESULTAT (une seule allocation, types numeriques conserves) ===
+    dates = pd.DatetimeIndex(data.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+
+    mapping = TICKER_MAPPING.get(ticker, {})
+    columns = {
+        'date': dates.normalize(),
+        'ticker': ticker,
+        'type': mapping.get('type', 'Unknown'),
+        'sector': mapping.get('sector', 'Unknown'),
+        'name': mapping.get('name', ticker),
+        'country': mapping.get('country', 'Unknown'),
+        'continent': mapping.get('continent', 'Unknown'),
+    }
+    # Colonnes manquantes: valeurs par defaut (0.0 pour les prix, 0 pour le volume)
+    for old_name, new_name in column_mapping.items():
+        if old_name in data.columns:
+            columns[new_name] = data[old_name].to_numpy(dtype='int64' if new_name == 'volume' else 'float64',
+                                                        na_value=0 if new_name == 'volume' else np.nan)
+        else:
+            columns[new_name] = 0 if new_name == 'volume' else 0.0
+
+    # === ADJ_CLOSE: cloture brute, ajustee ensuite par apply_corporate_actions() si active ===
+    columns['adj_close'] = columns['close']
+    columns['last_updated'] = pd.Timestamp(datetime.now())
+    result_columns = columns_order
+    if PIPELINE_CONFIG['corporate_actions']:
+        for old_name, new_name in (('Dividends', 'dividends'), ('Stock Splits', 'stock_splits')):
+            columns[new_name] = (data[old_name].to_numpy(dtype='float64', na_value=0)
+                                 if old_name in data.columns else 0.0)
+        result_columns = columns_order + ACTION_COLUMNS
+
+    result = pd.DataFrame(columns, columns=result_columns)
+    raw_bytes = data.memory_usage(index=True).sum()
+    METRICS.incr(ticker, 'bytes_fetched', int(raw_bytes))
+    record_stage_memory('extract', raw_bytes)
+    record_stage_memory('transform', result.memory_usage(index=True).sum())
+
+    logger.info("%s: [SUCCESS] %d lignes valides préparées", ticker, len(result))
+    return result
+
+def compute_backoff(attempt):
+    """
+    Backoff exponentiel avec jitter: base * 2^attempt, plafonne a max_backoff_seconds,
+    puis multiplie par un facteur aleatoire [0.5, 1.5) pour desynchroniser les workers
+    """
+    delay = min(PIPELINE_CONFIG['sleep_between_retries'] * (2 ** attempt), PIPELINE_CONFIG['max_backoff_seconds'])
+    return delay * random.uniform(0.5, 1.5)
+
+def fetch_stock_data_corrected(ticker, start_date, end_date, max_retries=None):
     """
     Version corrigée pour récupérer les vraies données
     """
+    if max_retries is None:
+        max_retries = PIPELINE_CONFIG['max_retries']
+
     for attempt in range(max_retries):
         try:
-            logger.info(f"[FETCH] [{attempt + 1}/{max_retries}] Téléchargement {ticker}")
+            logger.info("[FETCH] [%d/%d] Téléchargement %s", attempt + 1, max_retries, ticker)
+            METRICS.incr(ticker, 'attempts')
             
-            # === MÉTHODE ALTERNATIVE : Utiliser Ticker object ===
-            ticker_obj = yf.Ticker(ticker)
-            data = ticker_obj.history(start=start_date, end=end_date)
+            # Ticker object yfinance, via le cache local si active
+            with METRICS.timer('fetch', ticker):
+                data = download_history(ticker, start_date, end_date)
             
             # Vérification des données vides
             if data is None or data.empty:
                 logger.warning(f"{ticker}: [WARN] Aucune donnée (tentative {attempt + 1})")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
+                # En mode replay, une nouvelle tentative relirait le meme cache
+                if attempt < max_retries - 1 and PIPELINE_CONFIG['cache_mode'] != 'replay':
+                    time.sleep(compute_backoff(attempt))
                     continue
                 return pd.DataFrame(columns=columns_order)
             
-            logger.info(f"{ticker}: [DATA] {len(data)} lignes récupérées")
-            
-            # === VÉRIFICATION DES VRAIES DONNÉES ===
-            # Afficher les vraies valeurs pour debug
-            if not data.empty:
-                sample_close = data['Close'].iloc[0] if 'Close' in data.columns else 0
-                logger.info(f"{ticker}: [DEBUG] Exemple Close = {sample_close}")
-                if sample_close == 0:
-                    logger.error(f"{ticker}: [ERROR] Données Close = 0, problème de récupération!")
-            
-            # === PRÉPARATION SANS APLATISSEMENT FORCÉ ===
-            data = data.reset_index()
-            data['ticker'] = ticker
-            data['last_updated'] = datetime.now()
-            
-            # === ENRICHISSEMENT AVEC MÉTADONNÉES ===
-            mapping = TICKER_MAPPING.get(ticker, {})
-            data['sector'] = mapping.get('sector', 'Unknown')
-            data['type'] = mapping.get('type', 'Unknown')
-            data['name'] = mapping.get('name', ticker)
-            data['country'] = mapping.get('country', 'Unknown')
-            data['continent'] = mapping.get('continent', 'Unknown')
-            
-            # === RENOMMAGE SIMPLE (les colonnes de .history() sont déjà simples) ===
-            logger.info(f"{ticker}: [COLUMNS] Colonnes disponibles: {list(data.columns)}")
-            
-            # Renommage direct
-            column_mapping = {
-                'Date': 'date',
-                'Open': 'open',
-                'High': 'high', 
-                'Low': 'low',
-                'Close': 'close',
-                'Volume': 'volume'
-            }
-            
-            for old_name, new_name in column_mapping.items():
-                if old_name in data.columns:
-                    data = data.rename(columns={old_name: new_name})
-                    logger.debug(f"{ticker}: [RENAME] {old_name} -> {new_name}")
+            logger.info("%s: [DATA] %d lignes récupérées", ticker, len(data))
             
-            # === ADJ_CLOSE depuis les dividendes ===
-            if 'close' in data.columns:
-                # Calculer adj_close manuellement si nécessaire
-                data['adj_close'] = data['close']  # Simplification
-                logger.debug(f"{ticker}: [ADJCLOSE] adj_close = close")
-            
-            # === VÉRIFICATION DES VRAIES VALEURS ===
-            if 'close' in data.columns and not data['close'].empty:
-                avg_close = data['close'].mean()
-                logger.info(f"{ticker}: [VALIDATION] Prix moyen Close = {avg_close:.2f}")
-                if avg_close == 0:
-                    logger.error(f"{ticker}: [ERROR] Prix moyen = 0, données invalides!")
-                    continue
-            
-            # === CRÉATION DES COLONNES MANQUANTES ===
-            for col in columns_order:
-                if col not in data.columns:
-                    if col in ['open', 'high', 'low', 'close', 'adj_close']:
-                        data[col] = 0.0
-                    elif col == 'volume':
-                        data[col] = 0
-                    elif col == 'last_updated':
-                        data[col] = datetime.now()
-                    elif col == 'date':
-                        data[col] = datetime.now().date()
-                    else:
-                        data[col] = 'Unknown'
-            
-            # === CONVERSION DES DATES ===
-            if 'date' in data.columns:
-                data['date'] = pd.to_datetime(data['date']).dt.date
-            data['last_updated'] = pd.to_datetime(data['last_updated'])
-            
-            # === NETTOYAGE FINAL ===
-            data = data.where(pd.notnull(data), None)
-            result = data[columns_order].copy()
-            
-            logger.info(f"{ticker}: [SUCCESS] {len(result)} lignes valides préparées")
+            with METRICS.timer('transform', ticker):
+                result = transform_raw_prices(data, ticker)
+            if result is None:
+                continue
             return result
             
         except Exception as e:
             logger.error(f"{ticker}: [ERROR] Erreur tentative {attempt + 1}: {str(e)}")
             if attempt < max_retries - 1:
-                time.sleep(3)
+                time.sleep(compute_backoff(attempt))
             else:
                 traceback.print_exc()
     
     return pd.DataFrame(columns=columns_order)
 
-def save_to_mysql_optimized(df):
+def fetch_stock_data_batch(tickers, start_date, end_date):
     """
-    Sauvegarde optimisee avec gestion des NULL et contraintes MySQL
+    Extraction groupee de plusieurs tickers: cache local d'abord, puis un seul
+    appel yf.download pour les tickers manquants.
+    Retourne (dict ticker -> DataFrame au format columns_order, liste des tickers en echec)
     """
-    if df.empty:
-        logger.warning("[MYSQL] DataFrame vide, aucune insertion")
-        return False
+    # Tickers deja presents dans le cache: pas de telechargement
+    frames = {}
+    fetch_starts = {}
+    cache_mode = PIPELINE_CONFIG['cache_mode']
+    if cache_mode in ('readwrite', 'replay'):
+        for ticker in tickers:
+            with METRICS.timer('fetch', ticker):
+                cached, fetch_start = cache_get(ticker, start_date, end_date, replay=cache_mode == 'replay')
+            if cached is not None and not cached.empty and fetch_start is None:
+                frames[ticker] = cached
+            elif fetch_start is not None:
+                fetch_starts[ticker] = fetch_start
+    to_download = [ticker for ticker in tickers if ticker not in frames]
+    for ticker in tickers:
+        METRICS.incr(ticker, 'attempts')
 
-    try:
-        with pymysql.connect(**MYSQL_CONFIG) as conn:
-            with conn.cursor() as cursor:
-                # === CREATION DE LA TABLE OPTIMISEE ===
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS historical_prices (
-                        date DATE NOT NULL,
-                        ticker VARCHAR(20) NOT NULL,
-                        type VARCHAR(20) NOT NULL DEFAULT 'stock',
-                        sector VARCHAR(50) NOT NULL DEFAULT 'Unknown',
-                        name VARCHAR(100) NOT NULL DEFAULT 'Unknown',
-                        country VARCHAR(50) NOT NULL DEFAULT 'Unknown',
-                        continent VARCHAR(50) NOT NULL DEFAULT 'Unknown',
-                        open FLOAT NOT NULL DEFAULT 0,
-                        high FLOAT NOT NULL DEFAULT 0,
-                        low FLOAT NOT NULL DEFAULT 0,
-                        close FLOAT NOT NULL DEFAULT 0,
-                        volume BIGINT NOT NULL DEFAULT 0,
-                        adj_close FLOAT NOT NULL DEFAULT 0,
-                        last_updated DATETIME NOT NULL,
-                        PRIMARY KEY (date, ticker),
-                        INDEX idx_sector_date (sector, date),
-                        INDEX idx_country (country),
-                        INDEX idx_type (type),
-                        INDEX idx_continent (continent)
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-                """)
-                
-                
-                # === VALIDATION DES COLONNES ===
-                missing_columns = [col for col in columns_order if col not in df.columns]
-                if missing_columns:
-                    logger.error(f"[MYSQL] Colonnes manquantes: {missing_columns}")
-                    return False
+    if to_download and cache_mode != 'replay':
+        # Un appel groupe par debut de fenetre (cache partiellement expire: derniers jours seulement)
+        groups = {}
+        for ticker in to_download:
+            groups.setdefault(fetch_starts.get(ticker, start_date), []).append(ticker)
+        # Duree des appels groupes repartie a parts egales entre les tickers du lot
+        with METRICS.timer('fetch', to_download):
+            for group_start, group in groups.items():
+                frames.update(download_batch_frames(group, group_start, end_date))
+        if cache_mode == 'readwrite':
+            for ticker in to_download:
+                group_start = fetch_starts.get(ticker, start_date)
+                cache_put(ticker, group_start, end_date, frames.get(ticker), record_empty=group_start > start_date)
+                if group_start > start_date:
+                    frames[ticker] = cache_get(ticker, start_date, end_date, replay=True)[0]
 
-                # === PREPARATION FINALE DES DONNEES ===
-                df_clean = df[columns_order].copy()
-                
-                # Remplacement des None par des valeurs par defaut pour respecter NOT NULL
-                default_values = {
-                    'type': 'stock',
-                    'sector': 'Unknown',
-                    'name': 'Unknown',
-                    'country': 'Unknown',
-                    'continent': 'Unknown',
-                    'open': 0.0,
-                    'high': 0.0,
-                    'low': 0.0,
-                    'close': 0.0,
-                    'volume': 0,
-                    'adj_close': 0.0
-                }
-                
-                for col, default_val in default_values.items():
-                    if col in df_clean.columns:
-                        df_clean[col] = df_clean[col].fillna(default_val)
-                
-                # Conversion finale des types
-                numeric_cols = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
-                for col in numeric_cols:
-                    try:
-                        if col == 'volume':
-                            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0).astype('int64')
-                        else:
-                            df_clean[col] = pd.to_numeric(df_clean[col], errors='coerce').fillna(0.0)
-                    except Exception as e:
-                        logger.warning(f"[MYSQL] Erreur conversion finale {col}: {e}")
-                        df_clean[col] = 0 if col == 'volume' else 0.0
-                
-                # Conversion des dates
-                df_clean['date'] = pd.to_datetime(df_clean['date']).dt.date
-                df_clean['last_updated'] = pd.to_datetime(df_clean['last_updated'])
+    results = {}
+    failed = []
+    for ticker in tickers:
+        frame = frames.get(ticker)
+        result = None
+        if frame is not None and not frame.empty:
+            with METRICS.timer('transform', ticker):
+                result = transform_raw_prices(frame, ticker)
+        if result is None:
+            failed.append(ticker)
+        else:
+            logger.info("%s: [SUCCESS] %d lignes valides préparées (lot)", ticker, len(result))
+            results[ticker] = result
 
-                # === INSERTION OPTIMISEE AVEC GESTION D'ERREURS ===
-                sql_query = """
-                    REPLACE INTO historical_prices 
-                    (date, ticker, type, sector, name, country, continent, 
-                     open, high, low, close, volume, adj_close, last_updated)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                # Conversion en tuples avec validation
-                data_tuples = []
-                error_rows = 0
-                
-                for idx, row in df_clean.iterrows():
-                    try:
-                        tuple_data = (
-                            row['date'],
-                            str(row['ticker']),
-                            str(row['type']),
-                            str(row['sector']),
-                            str(row['name']),
-                            str(row['country']),
-                            str(row['continent']),
-                            float(row['open']),
-                            float(row['high']),
-                            float(row['low']),
-                            float(row['close']),
-                            int(row['volume']),
-                            float(row['adj_close']),
-                            row['last_updated']
-                        )
-                        data_tuples.append(tuple_data)
-                    except Exception as e:
-                        error_rows += 1
-                        logger.warning(f"[MYSQL] Erreur ligne {idx}: {e}")
-                        continue
-                
-                if error_rows > 0:
-                    logger.warning(f"[MYSQL] {error_rows} lignes ignorees a cause d'erreurs de conversion")
-                
-                if data_tuples:
-                    cursor.executemany(sql_query, data_tuples)
-                    conn.commit()
-                    logger.info(f"[MYSQL] {len(data_tuples)} lignes inserees/mises a jour en base")
-                    return True
-                else:
-                    logger.warning("[MYSQL] Aucune donnee valide a inserer")
-                    return False
+    if failed:
+        logger.warning(f"[FETCH] [BATCH] {len(failed)} tickers en echec dans le lot: {failed}")
+    return results, failed
 
-    except pymysql.Error as err:
-        logger.error(f"[MYSQL] Erreur MySQL: {err}")
-        return False
-    except Exception as e:
-        logger.error(f"[MYSQL] Erreur generale save_to_mysql: {e}")
-        traceback.print_exc()
-        return False
-    
-    def test_dotenv_configuration():
-     """Test complet de la configuration dotenv"""
-    logger.info("[TEST] Début des tests de configuration dotenv")
-    
-    # Test 1: Variables d'environnement chargées
-    required_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_DATABASE']
-    for var in required_vars:
-        value = os.getenv(var)
-        if value:
-            if 'PASSWORD' in var:
-                logger.info(f"[TEST] {var}: ✓ (masqué pour sécurité)")
-            else:
-                logger.info(f"[TEST] {var}: ✓ ({value})")
-        else:
-            logger.error(f"[TEST] {var}: ✗ MANQUANT")
-            return False
-    
-    # Test 2: Connexion MySQL
+def download_batch_frames(tickers, start_date, end_date):
+    """
+    Appel yf.download groupe et demultiplexage vectorise du MultiIndex (Price, Ticker).
+    Retourne un dict ticker -> DataFrame brut (tickers absents = echec)
+    """
+    logger.info(f"[FETCH] [BATCH] Telechargement groupe de {len(tickers)} tickers")
     try:
-        with pymysql.connect(**MYSQL_CONFIG) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("SELECT 1")
-                result = cursor.fetchone()
-                if result[0] == 1:
-                    logger.info("[TEST] Connexion MySQL: ✓")
-                else:
-                    logger.error("[TEST] Connexion MySQL: ✗")
-                    return False
+        data = yf.download(
+            tickers, start=start_date, end=end_date, group_by='column',
+            auto_adjust=yf_auto_adjust(), actions=PIPELINE_CONFIG['corporate_actions'],
+            threads=PIPELINE_CONFIG['yf_threads'], timeout=PIPELINE_CONFIG['yf_timeout'], progress=False
+        )
     except Exception as e:
-        logger.error(f"[TEST] Connexion MySQL: ✗ - {e}")
-        return False
-    
-    # Test 3: Configuration pipeline
-    logger.info(f"[TEST] Max retries: {PIPELINE_CONFIG['max_retries']}")
-    logger.info(f"[TEST] Sleep between retries: {PIPELINE_CONFIG['sleep_between_retries']}s")
-    logger.info(f"[TEST] YFinance timeout: {PIPELINE_CONFIG['yf_timeout']}s")
-    
-    if not test_dotenv_configuration():
-     logger.error("[INIT] Échec des tests dotenv, arrêt du script")
-    exit(1)
-def main():
-    """Pipeline ETL principal"""
-    
-    
-    logger.info("[MAIN] Démarrage du pipeline ETL")
-    
-    start_time = datetime.now()
-    logger.info("=" * 80)
-    logger.info("[PIPELINE] DÉBUT - CONFIGURATION DOTENV")
-    logger.info("=" * 80)
-    
-    # === DÉMARRAGE DU PIPELINE ===
-    start_time = datetime.now()
-    logger.info("=" * 80)
-    logger.info("[PIPELINE] DÉBUT - TOUS LES TESTS RÉUSSIS")
-    logger.info("=" * 80)
-    # ... reste de ton code existant ...
+        logger.error(f"[FETCH] [BATCH] Echec du telechargement groupe: {e}")
+        return {}
 
-    
-    try:
-        # === INITIALISATION ===
-        start_date, end_date = get_rolling_year_dates()
-        logger.info(f"[PIPELINE] Periode d'extraction: {start_date} au {end_date}")
-        
-        # Statistiques par secteur
-        sectors = {}
-        for ticker, info in TICKER_MAPPING.items():
-            sector = info['sector']
-            if sector not in sectors:
-                sectors[sector] = []
-            sectors[sector].append(ticker)
-        
-        logger.info("[PIPELINE] Repartition par secteur:")
-        for sector, tickers_list in sectors.items():
-            logger.info(f"  [SECTOR] {sector}: {len(tickers_list)} tickers")
-        
-        # === TRAITEMENT DES DONNEES ===
-        success_count = 0
-        error_count = 0
-        total_rows_inserted = 0
-        sector_stats = {}
+    if data is None or data.empty:
+        logger.warning("[FETCH] [BATCH] Aucune donnee pour le lot")
+        return {}
 
-        for i, ticker in enumerate(TICKERS, 1):
-            sector = TICKER_MAPPING[ticker]['sector']
-            
-            logger.info("-" * 60)
-            logger.info(f"[PROCESS] [{i:2d}/{len(TICKERS)}] {ticker} ({sector})")
-            
-            # Extraction avec gestion multi-index
-            df_ticker = fetch_stock_data_corrected(ticker, start_date, end_date)
-            
-            if not df_ticker.empty:
-                # Sauvegarde optimisee
-                if save_to_mysql_optimized(df_ticker):
-                    success_count += 1
-                    total_rows_inserted += len(df_ticker)
-                    
-                    # Statistiques par secteur
-                    if sector not in sector_stats:
-                        sector_stats[sector] = {'success': 0, 'rows': 0}
-                    sector_stats[sector]['success'] += 1
-                    sector_stats[sector]['rows'] += len(df_ticker)
-                    
-                    logger.info(f"[SUCCESS] {ticker}: {len(df_ticker)} lignes -> Base de donnees")
+    if isinstance(data.columns, pd.MultiIndex) and data.columns.nlevels == 2:
+        # Format large (Date x (Price, Ticker)) -> format long (Date, Ticker) x Price
+        long_data = data.stack(level=1, future_stack=True)
+        long_data = long_data.dropna(subset=['Close'])
+        grouped = long_data.groupby(level=1, sort=False)
+        frames = {ticker: frame.droplevel(1) for ticker, frame in grouped}
+    elif len(tickers) == 1:
+        frames = {tickers[0]: flatten_multiindex_columns(data, tickers[0]).dropna(subset=['Close'])}
+    else:
+        logger.error(f"[FETCH] [BATCH] Format de colonnes inattendu: {data.columns[:5].tolist()}")
+        return {}
+
+    return frames
+
+# === MOTEUR D'EXTRACTION (SEQUENTIEL / CONCURRENT / GROUPE) ===
+def iter_fetch_sequential(tickers, windows):
+    """Extraction ticker par ticker, dans l'ordre de la liste"""
+    for ticker in tickers:
+        start_date, end_date = windows[ticker]
+        yield ticker, fetch_stock_data_corrected(ticker, start_date, end_date)
+
+def iter_fetch_concurrent(tickers, windows, max_workers):
+    """
+    Extraction concurrente avec un pool de threads borne.
+    Les resultats sont rendus dans l'ordre de terminaison; au plus
+    2 x max_workers tickers sont en vol pour borner la memoire.
+    """
+    ticker_iter = iter(tickers)
+    max_in_flight = max_workers * 2
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as executor:
+        pending = {}
+
+        def submit_next():
+            ticker = next(ticker_iter, None)
+            if ticker is not None:
+                start_date, end_date = windows[ticker]
+                future = executor.submit(fetch_stock_data_corrected, ticker, start_date, end_date)
+                pending[future] = ticker
+
+        for _ in range(max_in_flight):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = pending.pop(future)
+                try:
+                    df_ticker = future.result()
+                except Exception as e:
+                    logger.error(f"{ticker}: [ERROR] Echec worker d'extraction: {e}")
+                    df_ticker = pd.DataFrame(columns=columns_order)
+                submit_next()
+                yield ticker, df_ticker
+
+def iter_fetch_batched(tickers, windows, batch_size):
+    """
+    Extraction par lots yf.download. Les tickers partageant la meme fenetre
+    sont regroupes; seuls les tickers en echec sont retentes individuellement.
+    """
+    by_window = {}
+    for ticker in tickers:
+        by_window.setdefault(windows[ticker], []).append(ticker)
+
+    for (start_date, end_date), window_tickers in by_window.items():
+        for offset in range(0, len(window_tickers), batch_size):
+            batch = window_tickers[offset:offset + batch_size]
+            results, failed = fetch_stock_data_batch(batch, start_date, end_date)
+            for ticker in batch:
+                if ticker in results:
+                    yield ticker, results.pop(ticker)
+            for ticker in failed:
+                logger.info("%s: [RETRY] Reprise individuelle apres echec du lot", ticker)
+                yield ticker, fetch_stock_data_corrected(ticker, start_date, end_date)
+
+# === EXTRACTION ASYNCHRONE AVEC LIMITEUR DE DEBIT ADAPTATIF ===
+class AdaptiveRateLimiter:
+    """
+    Token bucket partage par toutes les requetes en vol, ajuste en AIMD:
+    hausse additive du debit apres chaque succes, division par deux
+    des qu'un throttling (erreur 429, erreur HTTP) est detecte.
+    """
+
+    def __init__(self, max_rate, min_rate=0.2):
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = max_rate
+        self.increase_step = max_rate / 20
+        self.burst = max(1.0, max_rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Attend un jeton; les appelants sont servis dans l'ordre d'arrivee"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self):
+        previous_rate = self.rate
+        self.rate = max(self.min_rate, self.rate / 2)
+        self._tokens = min(self._tokens, 0.0)
+        if self.rate < previous_rate:
+            logger.warning(f"[RATE] Throttling detecte, debit reduit a {self.rate:.2f} req/s")
+
+def is_rate_limit_error(error):
+    """Detecte une erreur de limitation de debit Yahoo (HTTP 429 / YFRateLimitError)"""
+    message = str(error).lower()
+    return type(error).__name__ == 'YFRateLimitError' or '429' in message or 'too many requests' in message
+
+def is_http_error(error):
+    """Detecte une erreur HTTP du serveur (HTTPError, statut 5xx)"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return 'HTTPError' in type(error).__name__ or (isinstance(status, int) and status >= 500)
+
+async def fetch_ticker_async(ticker, start_date, end_date, limiter):
+    """
+    Extraction d'un ticker avec retries: chaque tentative consomme un jeton du
+    limiteur partage, le telechargement bloquant tourne dans un thread.
+    """
+    max_retries = PIPELINE_CONFIG['max_retries']
+    for attempt in range(max_retries):
+        await limiter.acquire()
+        logger.info("[FETCH] [ASYNC] [%d/%d] Téléchargement %s", attempt + 1, max_retries, ticker)
+        METRICS.incr(ticker, 'attempts')
+        try:
+            with METRICS.timer('fetch', ticker):
+                data = await asyncio.to_thread(download_history, ticker, start_date, end_date)
+        except Exception as e:
+            logger.error(f"{ticker}: [ERROR] Erreur tentative {attempt + 1}: {str(e)}")
+            if is_rate_limit_error(e) or is_http_error(e):
+                limiter.on_throttle()
+            data = None
+
+        if data is not None and not data.empty:
+            limiter.on_success()
+            with METRICS.timer('transform', ticker):
+                result = await asyncio.to_thread(transform_raw_prices, data, ticker)
+            if result is not None:
+                return result
+        elif data is not None:
+            # Reponse vide: fenetre sans seance ou cache rejoue, le debit n'est pas reduit
+            logger.warning(f"{ticker}: [WARN] Aucune donnée (tentative {attempt + 1})")
+
+        if attempt < max_retries - 1 and PIPELINE_CONFIG['cache_mode'] != 'replay':
+            await asyncio.sleep(compute_backoff(attempt))
+
+    return pd.DataFrame(columns=columns_order)
+
+def iter_fetch_async(tickers, windows, max_workers):
+    """
+    Extraction asyncio dans un thread dedie. Au plus max_workers tickers sont en cours
+    (resultat non consomme inclus); le chargement lit une file bornee dans ce thread.
+    """
+    results = queue.Queue(maxsize=max_workers)
+    stop = threading.Event()
+    done = object()
+
+    def put_result(item):
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    async def run_all():
+        limiter = AdaptiveRateLimiter(PIPELINE_CONFIG['rate_limit_per_sec'])
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def worker(ticker):
+            async with semaphore:
+                if stop.is_set():
+                    return
+                start_date, end_date = windows[ticker]
+                try:
+                    df_ticker = await fetch_ticker_async(ticker, start_date, end_date, limiter)
+                except Exception as e:
+                    logger.error(f"{ticker}: [ERROR] Echec worker d'extraction: {e}")
+                    df_ticker = pd.DataFrame(columns=columns_order)
+                await asyncio.to_thread(put_result, (ticker, df_ticker))
+
+        await asyncio.gather(*(worker(ticker) for ticker in tickers))
+        logger.info(f"[RATE] Debit final du limiteur: {limiter.rate:.2f} req/s")
+
+    def run_loop():
+        try:
+            asyncio.run(run_all())
+        finally:
+            put_result(done)
+
+    producer = threading.Thread(target=run_loop, name='fetch-async', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+def iter_extracted_tickers(tickers, windows):
+    """Choisit le mode d'extraction selon PIPELINE_CONFIG"""
+    if PIPELINE_CONFIG['async_extraction'] and len(tickers) > 1:
+        max_workers = min(PIPELINE_CONFIG['async_max_in_flight'], len(tickers))
+        logger.info(f"[PIPELINE] Extraction asynchrone ({max_workers} en vol, "
+                    f"{PIPELINE_CONFIG['rate_limit_per_sec']} req/s max)")
+        return iter_fetch_async(tickers, windows, max_workers)
+
+    batch_size = PIPELINE_CONFIG['download_batch_size']
+    if batch_size > 1 and len(tickers) > 1:
+        logger.info(f"[PIPELINE] Extraction groupee (lots de {batch_size} tickers)")
+        return iter_fetch_batched(tickers, windows, batch_size)
+
+    max_workers = PIPELINE_CONFIG['max_workers']
+    if max_workers > 1 and len(tickers) > 1:
+        logger.info(f"[PIPELINE] Extraction concurrente ({min(max_workers, len(tickers))} workers)")
+        return iter_fetch_concurrent(tickers, windows, min(max_workers, len(tickers)))
+    logger.info("[PIPELINE] Extraction sequentielle")
+    return iter_fetch_sequential(tickers, windows)
+
+# === CONNEXION MYSQL PERSISTANTE ===
+HISTORICAL_PRICES_DDL = """
+    CREATE TABLE IF NOT EXISTS historical_prices (
+        date DATE NOT NULL,
+        ticker VARCHAR(20) NOT NULL,
+        type VARCHAR(20) NOT NULL DEFAULT 'stock',
+        sector VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        name VARCHAR(100) NOT NULL DEFAULT 'Unknown',
+        country VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        continent VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        open FLOAT NOT NULL DEFAULT 0,
+        high FLOAT NOT NULL DEFAULT 0,
+        low FLOAT NOT NULL DEFAULT 0,
+        close FLOAT NOT NULL DEFAULT 0,
+        volume BIGINT NOT NULL DEFAULT 0,
+        adj_close FLOAT NOT NULL DEFAULT 0,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (date, ticker),
+        INDEX idx_sector_date (sector, date),
+        INDEX idx_country (country),
+        INDEX idx_type (type),
+        INDEX idx_continent (continent)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Schema normalise: dimension tickers (metadonnees une seule fois par ticker)
+# et table de faits etroite (identifiant 2 octets, prix DOUBLE sans perte)
+TICKERS_DDL = """
+    CREATE TABLE IF NOT EXISTS tickers (
+        ticker_id SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        ticker VARCHAR(20) NOT NULL,
+        type VARCHAR(20) NOT NULL DEFAULT 'stock',
+        sector VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        name VARCHAR(100) NOT NULL DEFAULT 'Unknown',
+        country VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        continent VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        PRIMARY KEY (ticker_id),
+        UNIQUE KEY uk_ticker (ticker),
+        INDEX idx_sector (sector)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Cle primaire (ticker_id, date): historique d'un ticker contigu sur disque;
+# pas de cle etrangere (incompatible avec le partitionnement InnoDB)
+DAILY_PRICES_DDL = """
+    CREATE TABLE IF NOT EXISTS daily_prices (
+        ticker_id SMALLINT UNSIGNED NOT NULL,
+        date DATE NOT NULL,
+        open DOUBLE NOT NULL,
+        high DOUBLE NOT NULL,
+        low DOUBLE NOT NULL,
+        close DOUBLE NOT NULL,
+        volume BIGINT NOT NULL,
+        adj_close DOUBLE NOT NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (ticker_id, date),
+        INDEX idx_date (date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Vue de compatibilite: memes colonnes que l'ancienne table (requetes Power BI inchangees)
+HISTORICAL_PRICES_VIEW = """
+    CREATE OR REPLACE ALGORITHM=MERGE VIEW historical_prices AS
+    SELECT p.date, t.ticker, t.type, t.sector, t.name, t.country, t.continent,
+           p.open, p.high, p.low, p.close, p.volume, p.adj_close, p.last_updated
+    FROM daily_prices p
+    JOIN tickers t ON t.ticker_id = p.ticker_id
+"""
+
+PRICE_ANALYTICS_DDL = """
+    CREATE TABLE IF NOT EXISTS price_analytics (
+        date DATE NOT NULL,
+        ticker VARCHAR(20) NOT NULL,
+        close DOUBLE NOT NULL,
+        daily_return DOUBLE NULL,
+        ma_20 DOUBLE NULL,
+        ma_50 DOUBLE NULL,
+        ma_200 DOUBLE NULL,
+        volatility_20 DOUBLE NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (date, ticker),
+        INDEX idx_ticker_date (ticker, date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Empreinte du contenu de chaque ligne ecrite (detection des changements avant chargement)
+ROW_HASHES_DDL = """
+    CREATE TABLE IF NOT EXISTS price_row_hashes (
+        ticker VARCHAR(20) NOT NULL,
+        date DATE NOT NULL,
+        row_hash BIGINT NOT NULL,
+        PRIMARY KEY (ticker, date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Version de chaque ticker, changee par chaque chargement qui l'ecrit (dans sa transaction):
+# les PriceReader des autres processus la comparent a celle de leurs entrees en cache
+WRITE_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS price_write_versions (
+        ticker VARCHAR(20) NOT NULL,
+        sector VARCHAR(50) NOT NULL DEFAULT 'Unknown',
+        write_id CHAR(32) NOT NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (ticker),
+        INDEX idx_sector (sector)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Lignes rejetees (ou signalees) par la validation, avec leurs motifs.
+# occurrence: rang de la ligne parmi celles de meme date (0 = premiere), les doublons sont tous gardes
+QUARANTINE_DDL = """
+    CREATE TABLE IF NOT EXISTS price_quarantine (
+        ticker VARCHAR(20) NOT NULL,
+        date DATE NOT NULL,
+        occurrence SMALLINT NOT NULL DEFAULT 0,
+        open DOUBLE NULL,
+        high DOUBLE NULL,
+        low DOUBLE NULL,
+        close DOUBLE NULL,
+        volume BIGINT NULL,
+        reasons VARCHAR(255) NOT NULL,
+        rejected TINYINT NOT NULL,
+        detected_at DATETIME NOT NULL,
+        PRIMARY KEY (ticker, date, occurrence),
+        INDEX idx_detected (detected_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Dividendes et divisions par ex-date, avec le facteur d'ajustement de chaque action
+CORPORATE_ACTIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS corporate_actions (
+        ticker VARCHAR(20) NOT NULL,
+        ex_date DATE NOT NULL,
+        dividend DOUBLE NOT NULL DEFAULT 0,
+        split_ratio DOUBLE NOT NULL DEFAULT 1,
+        factor DOUBLE NOT NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (ticker, ex_date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Facteur cumule par intervalle [valid_from, valid_to[ entre deux ex-dates (1 apres la derniere)
+ADJUSTMENT_FACTORS_DDL = """
+    CREATE TABLE IF NOT EXISTS adjustment_factors (
+        ticker VARCHAR(20) NOT NULL,
+        valid_from DATE NOT NULL,
+        valid_to DATE NOT NULL,
+        factor DOUBLE NOT NULL,
+        PRIMARY KEY (ticker, valid_to)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# Cours ajustes derives a la lecture: une nouvelle action ne modifie que adjustment_factors
+ADJUSTED_PRICES_VIEW = """
+    CREATE OR REPLACE ALGORITHM=MERGE VIEW adjusted_prices AS
+    SELECT p.date, p.ticker, p.open, p.high, p.low, p.close, p.volume,
+           COALESCE(f.factor, 1) AS adj_factor, p.close * COALESCE(f.factor, 1) AS adj_close
+    FROM historical_prices p
+    LEFT JOIN adjustment_factors f
+        ON f.ticker = p.ticker AND p.date >= f.valid_from AND p.date < f.valid_to
+"""
+
+# Agregats journaliers: une table par dimension de TICKER_MAPPING
+AGGREGATE_TABLES = {
+    'sector': 'sector_daily_stats',
+    'country': 'country_daily_stats',
+    'continent': 'continent_daily_stats',
+}
+AGGREGATE_DDL_TEMPLATE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        {dimension} VARCHAR(50) NOT NULL,
+        date DATE NOT NULL,
+        member_count INT NOT NULL,
+        avg_return DOUBLE NULL,
+        total_volume BIGINT NOT NULL,
+        advancing INT NOT NULL,
+        declining INT NOT NULL,
+        index_level DOUBLE NOT NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY ({dimension}, date)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+_db_connection = None
+_schema_ready = False
+# Schema normalise: ticker -> ticker_id (charge depuis la table tickers)
+_ticker_ids = {}
+
+def get_db_connection():
+    """
+    Connexion MySQL longue duree partagee par le processus.
+    Reconnexion automatique (ping) si le serveur a ferme la session.
+    """
+    global _db_connection
+    if _db_connection is None or not _db_connection.open:
+        _db_connection = pymysql.connect(
+            **MYSQL_CONFIG,
+            local_infile=PIPELINE_CONFIG['db_loader'] == 'load_data',
+            autocommit=False
+        )
+        logger.info(f"[MYSQL] Connexion ouverte - Host: {MYSQL_CONFIG['host']}")
+    else:
+        _db_connection.ping(reconnect=True)
+    return _db_connection
+
+def close_db_connection():
+    """Ferme la connexion persistante (fin de pipeline)"""
+    global _db_connection
+    if _db_connection is not None and _db_connection.open:
+        _db_connection.close()
+        logger.info("[MYSQL] Connexion fermee")
+    _db_connection = None
+
+@contextmanager
+def db_session():
+    """
+    Fournit la connexion persistante; rollback si une exception traverse le bloc.
+    La connexion reste ouverte pour les appels suivants.
+    """
+    conn = get_db_connection()
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except pymysql.Error:
+            pass
+        raise
+
+def ensure_schema():
+    """Creation unique des tables au demarrage (bootstrap), ignoree ensuite"""
+    global _schema_ready
+    if _schema_ready:
+        return
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            if uses_normalized_schema():
+                ensure_normalized_schema(cursor)
+            else:
+                cursor.execute(HISTORICAL_PRICES_DDL)
+            cursor.execute(WRITE_VERSIONS_DDL)
+            if PIPELINE_CONFIG['change_detection']:
+                cursor.execute(ROW_HASHES_DDL)
+            if PIPELINE_CONFIG['validation_enabled']:
+                cursor.execute(QUARANTINE_DDL)
+            if PIPELINE_CONFIG['corporate_actions']:
+                cursor.execute(CORPORATE_ACTIONS_DDL)
+                cursor.execute(ADJUSTMENT_FACTORS_DDL)
+                cursor.execute(ADJUSTED_PRICES_VIEW)
+            if PIPELINE_CONFIG['analytics_enabled']:
+                cursor.execute(PRICE_ANALYTICS_DDL)
+            if PIPELINE_CONFIG['aggregates_enabled']:
+                for dimension, table in AGGREGATE_TABLES.items():
+                    cursor.execute(AGGREGATE_DDL_TEMPLATE.format(table=table, dimension=dimension))
+        conn.commit()
+    _schema_ready = True
+    logger.info(f"[MYSQL] Schema historical_prices verifie (mode {PIPELINE_CONFIG['schema_mode']})")
+
+# === SCHEMA NORMALISE (DIMENSION tickers + FAITS daily_prices) ===
+FACT_COLUMNS = ['ticker_id', 'date', 'open', 'high', 'low', 'close', 'volume', 'adj_close', 'last_updated']
+DIMENSION_COLUMNS = ['type', 'sector', 'name', 'country', 'continent']
+LEGACY_TABLE = 'historical_prices_legacy'
+# Partition recevant les annees anterieures a la premiere partition annuelle
+HISTORY_PARTITION = 'p_history'
+FUTURE_PARTITION = 'p_future'
+
+def uses_normalized_schema():
+    return PIPELINE_CONFIG['schema_mode'] == 'normalized'
+
+def get_table_type(cursor, table):
+    """'BASE TABLE', 'VIEW' ou None si la table n'existe pas dans la base courante"""
+    cursor.execute(
+        "SELECT TABLE_TYPE FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def year_partitions_sql(years):
+    return ', '.join(f"PARTITION p{year} VALUES LESS THAN ({year + 1})" for year in years)
+
+def build_daily_prices_ddl(first_year=None):
+    """
+    DDL de daily_prices, partitionnee par annee si PIPELINE_PARTITION_BY_YEAR:
+    une partition par annee de first_year a l'annee suivante, plus p_history
+    (annees anterieures) et p_future (filet de securite, scinde par ensure_year_partitions)
+    """
+    if not PIPELINE_CONFIG['partition_by_year']:
+        return DAILY_PRICES_DDL
+    current_year = datetime.now().year
+    first_year = min(first_year or current_year - 1, current_year)
+    return (
+        f"{DAILY_PRICES_DDL.rstrip()}\n"
+        f"    PARTITION BY RANGE (YEAR(date)) ("
+        f"PARTITION {HISTORY_PARTITION} VALUES LESS THAN ({first_year}), "
+        f"{year_partitions_sql(range(first_year, current_year + 2))}, "
+        f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+    )
+
+def ensure_year_partitions(cursor):
+    """Ajoute les partitions annuelles manquantes jusqu'a l'annee suivante (scission de p_future)"""
+    cursor.execute(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'daily_prices' AND PARTITION_NAME IS NOT NULL"
+    )
+    partitions = {name for (name,) in cursor.fetchall()}
+    if FUTURE_PARTITION not in partitions:
+        logger.warning("[SCHEMA] daily_prices n'est pas partitionnee par annee (table creee sans "
+                       "PIPELINE_PARTITION_BY_YEAR), partitionnement ignore")
+        return
+    years = [int(name[1:]) for name in partitions if name[1:].isdigit()]
+    last_year = max(years) if years else datetime.now().year - 1
+    missing = range(last_year + 1, datetime.now().year + 2)
+    if missing:
+        cursor.execute(
+            f"ALTER TABLE daily_prices REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+            f"({year_partitions_sql(missing)}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+        )
+        logger.info(f"[SCHEMA] Partitions daily_prices ajoutees: {', '.join(f'p{year}' for year in missing)}")
+
+def sync_tickers_dimension(cursor, metadata):
+    """
+    Aligne la table tickers sur metadata (ticker -> dict type/sector/name/country/continent):
+    insertion des tickers absents, mise a jour des metadonnees modifiees, puis recharge
+    du cache ticker -> ticker_id. Pas d'INSERT ... ON DUPLICATE KEY UPDATE: chaque doublon
+    consommerait un identifiant AUTO_INCREMENT (SMALLINT).
+    """
+    cursor.execute(f"SELECT ticker_id, ticker, {', '.join(DIMENSION_COLUMNS)} FROM tickers")
+    existing = {row[1]: row for row in cursor.fetchall()}
+
+    new_rows, changed_rows = [], []
+    for ticker, info in metadata.items():
+        values = tuple(str(info.get(col) or 'Unknown') for col in DIMENSION_COLUMNS)
+        current = existing.get(ticker)
+        if current is None:
+            new_rows.append((ticker, *values))
+        elif tuple(current[2:]) != values:
+            changed_rows.append((*values, ticker))
+
+    if new_rows:
+        cursor.executemany(
+            f"INSERT INTO tickers (ticker, {', '.join(DIMENSION_COLUMNS)}) "
+            f"VALUES ({', '.join(['%s'] * (len(DIMENSION_COLUMNS) + 1))})",
+            new_rows
+        )
+        cursor.execute("SELECT ticker_id, ticker FROM tickers")
+        existing = {ticker: (ticker_id, ticker) for ticker_id, ticker in cursor.fetchall()}
+    if changed_rows:
+        cursor.executemany(
+            f"UPDATE tickers SET {', '.join(f'{col} = %s' for col in DIMENSION_COLUMNS)} WHERE ticker = %s",
+            changed_rows
+        )
+    if new_rows or changed_rows:
+        logger.info(f"[SCHEMA] Dimension tickers: {len(new_rows)} ajoutes, {len(changed_rows)} mis a jour")
+
+    _ticker_ids.clear()
+    _ticker_ids.update({ticker: row[0] for ticker, row in existing.items()})
+
+def ensure_normalized_schema(cursor):
+    """Tables tickers/daily_prices, partitions, dimension a jour et vue historical_prices"""
+    table_type = get_table_type(cursor, 'historical_prices')
+    if table_type == 'BASE TABLE':
+        raise RuntimeError("historical_prices est une table (schema large): lancer "
+                           "'python etl_stocks.py --migrate-schema' avant PIPELINE_SCHEMA_MODE=normalized")
+    cursor.execute(TICKERS_DDL)
+    cursor.execute(build_daily_prices_ddl())
+    if PIPELINE_CONFIG['partition_by_year']:
+        ensure_year_partitions(cursor)
+    sync_tickers_dimension(cursor, TICKER_MAPPING)
+    if table_type is None:
+        cursor.execute(HISTORICAL_PRICES_VIEW)
+
+def ensure_ticker_ids(conn, df_clean):
+    """
+    Enregistre dans la dimension les tickers du bloc absents du cache (tickers hors
+    TICKER_MAPPING), avec les metadonnees du bloc. Committe avant l'ecriture des faits:
+    un rollback du chargement ne laisse pas d'identifiant orphelin dans le cache.
+    """
+    missing = [ticker for ticker in df_clean['ticker'].unique() if ticker not in _ticker_ids]
+    if not missing:
+        return
+    metadata = df_clean.drop_duplicates('ticker').set_index('ticker').loc[missing, DIMENSION_COLUMNS]
+    with conn.cursor() as cursor:
+        sync_tickers_dimension(cursor, metadata.to_dict('index'))
+    conn.commit()
+
+def ticker_id_column(tickers):
+    """Colonne ticker -> ticker_id (une recherche par ticker distinct)"""
+    codes, uniques = pd.factorize(tickers)
+    return np.array([_ticker_ids[ticker] for ticker in uniques], dtype='int64')[codes]
+
+def migrate_to_normalized_schema():
+    """
+    Migration de la table large historical_prices vers tickers + daily_prices:
+    1. dimension remplie depuis TICKER_MAPPING puis completee par les tickers presents en base
+    2. copie des faits annee par annee (une transaction par annee, relancable)
+    3. controle des comptes, historical_prices renommee en historical_prices_legacy
+       et remplacee par la vue de compatibilite
+    L'ancienne table est conservee (a supprimer manuellement apres verification).
+    Les prix FLOAT deja stockes sont recopies tels quels; les chargements suivants
+    ecrivent la precision DOUBLE complete.
+    """
+    started = time.perf_counter()
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            table_type = get_table_type(cursor, 'historical_prices')
+            if table_type == 'VIEW':
+                logger.info("[MIGRATION] Schema deja normalise (historical_prices est une vue)")
+                return True
+            if table_type is not None and get_table_type(cursor, LEGACY_TABLE) is not None:
+                logger.error(f"[MIGRATION] {LEGACY_TABLE} existe deja: migration precedente a verifier")
+                return False
+
+            first_year = last_year = None
+            if table_type is not None:
+                cursor.execute("SELECT YEAR(MIN(date)), YEAR(MAX(date)) FROM historical_prices")
+                first_year, last_year = cursor.fetchone()
+
+            cursor.execute(TICKERS_DDL)
+            cursor.execute(build_daily_prices_ddl(first_year))
+            sync_tickers_dimension(cursor, TICKER_MAPPING)
+            if table_type is not None:
+                cursor.execute(f"""
+                    INSERT INTO tickers (ticker, {', '.join(DIMENSION_COLUMNS)})
+                    SELECT h.ticker, {', '.join(f'MAX(h.{col})' for col in DIMENSION_COLUMNS)}
+                    FROM historical_prices h
+                    LEFT JOIN tickers t ON t.ticker = h.ticker
+                    WHERE t.ticker_id IS NULL
+                    GROUP BY h.ticker
+                """)
+            conn.commit()
+
+            copied_rows = 0
+            if first_year is not None:
+                update_clause = ", ".join(f"{col} = VALUES({col})" for col in FACT_COLUMNS[2:])
+                for year in range(first_year, last_year + 1):
+                    copied_rows += cursor.execute(f"""
+                        INSERT INTO daily_prices ({', '.join(FACT_COLUMNS)})
+                        SELECT t.ticker_id, {', '.join('h.' + col for col in FACT_COLUMNS[1:])}
+                        FROM historical_prices h
+                        JOIN tickers t ON t.ticker = h.ticker
+                        WHERE h.date >= %s AND h.date < %s
+                        ON DUPLICATE KEY UPDATE {update_clause}
+                    """, (f"{year}-01-01", f"{year + 1}-01-01"))
+                    conn.commit()
+                    logger.info(f"[MIGRATION] Annee {year} copiee dans daily_prices")
+
+                cursor.execute("SELECT COUNT(*) FROM historical_prices")
+                legacy_rows = cursor.fetchone()[0]
+                cursor.execute("SELECT COUNT(*) FROM daily_prices")
+                fact_rows = cursor.fetchone()[0]
+                if fact_rows < legacy_rows:
+                    logger.error(f"[MIGRATION] Comptes incoherents: {fact_rows:,} lignes dans daily_prices "
+                                 f"pour {legacy_rows:,} dans historical_prices, vue non creee")
+                    return False
+                cursor.execute(f"RENAME TABLE historical_prices TO {LEGACY_TABLE}")
+
+            cursor.execute(HISTORICAL_PRICES_VIEW)
+        conn.commit()
+
+    global _schema_ready
+    _schema_ready = False
+    logger.info(f"[MIGRATION] Schema normalise en place ({copied_rows:,} lignes ecrites, "
+                f"{len(_ticker_ids)} tickers) en {time.perf_counter() - started:.2f}s")
+    if table_type is not None:
+        logger.info(f"[MIGRATION] Ancienne table conservee: {LEGACY_TABLE}")
+    logger.info("[MIGRATION] Definir PIPELINE_SCHEMA_MODE=normalized dans le .env")
+    return True
+
+# === CONVERSION DATAFRAME -> PARAMETRES MYSQL ===
+TEXT_COLUMNS = ['ticker', 'type', 'sector', 'name', 'country', 'continent']
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'adj_close']
+
+def build_db_columns(df_clean):
+    """
+    Conversion colonnaire d'un DataFrame (ordre columns_order) en colonnes numpy pretes pour MySQL.
+    Chaque colonne est convertie une seule fois; les lignes invalides (date manquante,
+    prix/volume non finis, texte absent) sont reperees par un masque vectorise.
+    Retourne (dict colonne -> tableau numpy des lignes valides, masque des lignes invalides)
+    """
+    dates = pd.to_datetime(df_clean['date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+    updated = pd.to_datetime(df_clean['last_updated'], errors='coerce').to_numpy(dtype='datetime64[s]')
+    prices = {col: pd.to_numeric(df_clean[col], errors='coerce').to_numpy(dtype='float64')
+              for col in PRICE_COLUMNS}
+    volume = pd.to_numeric(df_clean['volume'], errors='coerce').to_numpy(dtype='float64')
+
+    # === MASQUE DES LIGNES INVALIDES ===
+    invalid_mask = np.isnat(dates) | np.isnat(updated) | df_clean[TEXT_COLUMNS].isna().any(axis=1).to_numpy()
+    invalid_mask |= ~np.isfinite(volume)
+    for values in prices.values():
+        invalid_mask |= ~np.isfinite(values)
+    valid = ~invalid_mask
+
+    # === COLONNES PYTHON CONSTRUITES EN BLOC ===
+    # MySQL accepte le separateur ISO 'T' pour les DATETIME
+    columns = {
+        'date': np.datetime_as_string(dates[valid], unit='D'),
+        'last_updated': np.datetime_as_string(updated[valid], unit='s'),
+        'volume': volume[valid].astype('int64'),
+    }
+    for col in TEXT_COLUMNS:
+        # Factorisation: une seule chaine Python par valeur distincte, partagee entre les lignes
+        codes, uniques = pd.factorize(df_clean[col].to_numpy()[valid])
+        columns[col] = np.array([str(value) for value in uniques], dtype=object)[codes]
+    for col, values in prices.items():
+        columns[col] = values[valid]
+
+    return columns, invalid_mask
+
+def dataframe_to_db_params(df_clean):
+    """
+    Conversion colonnaire en parametres executemany.
+    Retourne (liste de tuples, masque numpy des lignes invalides)
+    """
+    columns, invalid_mask = build_db_columns(df_clean)
+    if uses_normalized_schema():
+        columns['ticker_id'] = ticker_id_column(columns['ticker'])
+        target_columns = FACT_COLUMNS
+    else:
+        target_columns = columns_order
+    data_tuples = list(zip(*(columns[col].tolist() for col in target_columns)))
+    return data_tuples, invalid_mask
+
+# === CHARGEMENT EN MASSE (LOAD DATA LOCAL INFILE + MERGE) ===
+STAGING_TABLE = 'historical_prices_staging'
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'adj_close']
+# Sequences d'echappement de LOAD DATA (ESCAPED BY '\\'): le separateur et la fin de ligne
+# ne peuvent plus apparaitre dans un champ, et un antislash des donnees reste un antislash
+LOAD_DATA_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r', '\0': '\\0'})
+
+def escape_load_data_text(values):
+    """Echappe une colonne texte pour LOAD DATA (une seule traduction par valeur distincte)"""
+    codes, uniques = pd.factorize(values)
+    return np.array([value.translate(LOAD_DATA_ESCAPES) for value in uniques], dtype=object)[codes]
+
+def write_load_data_file(handle, columns):
+    """
+    Ecrit les colonnes converties au format TSV de LOAD DATA (ordre columns_order).
+    Pas de module csv: son echappement de l'antislash varie selon la version de Python.
+    """
+    fields = [escape_load_data_text(columns[col]) if col in TEXT_COLUMNS else columns[col]
+              for col in columns_order]
+    for row in zip(*(values.tolist() for values in fields)):
+        handle.write('\t'.join(map(str, row)))
+        handle.write('\n')
+
+def bulk_load_dataframe(cursor, df_clean):
+    """
+    Chargement en masse: TSV temporaire -> LOAD DATA LOCAL INFILE dans une table
+    de staging -> fusion INSERT ... ON DUPLICATE KEY UPDATE dans historical_prices.
+    Les lignes dont l'OHLCV est inchange ne sont pas reecrites (index secondaires intacts).
+    Retourne (lignes chargees en staging, lignes ignorees car invalides, lignes inchangees)
+    """
+    with METRICS.timer('convert', df_clean):
+        columns, invalid_mask = build_db_columns(df_clean)
+    staged_rows = len(columns['date'])
+    if staged_rows == 0:
+        return 0, int(invalid_mask.sum()), 0
+
+    with METRICS.timer('db_write', df_clean):
+        changed_rows = merge_staged_columns(cursor, columns)
+        store_row_hashes(cursor, df_clean, invalid_mask)
+    return staged_rows, int(invalid_mask.sum()), staged_rows - changed_rows
+
+def merge_staged_columns(cursor, columns):
+    """
+    Charge les colonnes converties dans la table de staging puis les fusionne
+    dans historical_prices (daily_prices en schema normalise).
+    Retourne le nombre de lignes nouvelles ou modifiees.
+    """
+    # Table de staging de session: memes types de prix que la cible (comparaison <=> exacte)
+    price_type = 'DOUBLE' if uses_normalized_schema() else 'FLOAT'
+    cursor.execute(f"""
+        CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} (
+            date DATE NOT NULL,
+            ticker VARCHAR(20) NOT NULL,
+            type VARCHAR(20) NOT NULL,
+            sector VARCHAR(50) NOT NULL,
+            name VARCHAR(100) NOT NULL,
+            country VARCHAR(50) NOT NULL,
+            continent VARCHAR(50) NOT NULL,
+            open {price_type} NOT NULL,
+            high {price_type} NOT NULL,
+            low {price_type} NOT NULL,
+            close {price_type} NOT NULL,
+            volume BIGINT NOT NULL,
+            adj_close {price_type} NOT NULL,
+            last_updated DATETIME NOT NULL,
+            PRIMARY KEY (date, ticker)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # DELETE plutot que TRUNCATE: pas de commit implicite
+    cursor.execute(f"DELETE FROM {STAGING_TABLE}")
+
+    tmp = tempfile.NamedTemporaryFile(mode='w', suffix='.tsv', encoding='utf-8', newline='', delete=False)
+    try:
+        with tmp:
+            write_load_data_file(tmp, columns)
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {STAGING_TABLE} "
+            f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+            f"LINES TERMINATED BY '\\n' ({', '.join(columns_order)})",
+            (tmp.name,)
+        )
+    finally:
+        os.remove(tmp.name)
+
+    # === FUSION: seules les lignes nouvelles ou dont l'OHLCV a change ===
+    changed_filter = " AND ".join(f"h.{col} <=> s.{col}" for col in OHLCV_COLUMNS)
+    if uses_normalized_schema():
+        target, target_columns = 'daily_prices', FACT_COLUMNS
+        select_columns = ['t.ticker_id'] + ['s.' + col for col in FACT_COLUMNS[1:]]
+        merge_source = f"""
+            FROM {STAGING_TABLE} s
+            JOIN tickers t ON t.ticker = s.ticker
+            LEFT JOIN daily_prices h ON h.ticker_id = t.ticker_id AND h.date = s.date
+            WHERE h.ticker_id IS NULL OR NOT ({changed_filter})
+        """
+    else:
+        target, target_columns = 'historical_prices', columns_order
+        select_columns = ['s.' + col for col in columns_order]
+        merge_source = f"""
+            FROM {STAGING_TABLE} s
+            LEFT JOIN historical_prices h ON h.date = s.date AND h.ticker = s.ticker
+            WHERE h.ticker IS NULL OR NOT ({changed_filter})
+        """
+    cursor.execute(f"SELECT COUNT(*) {merge_source}")
+    changed_rows = cursor.fetchone()[0]
+
+    if changed_rows:
+        update_clause = ", ".join(f"{col} = VALUES({col})" for col in target_columns[2:])
+        cursor.execute(f"""
+            INSERT INTO {target} ({', '.join(target_columns)})
+            SELECT {', '.join(select_columns)}
+            {merge_source}
+            ON DUPLICATE KEY UPDATE {update_clause}
+        """)
+
+    return changed_rows
+
+def save_to_mysql_optimized(df):
+    """
+    Sauvegarde optimisee avec gestion des NULL et contraintes MySQL
+    """
+    if df.empty:
+        logger.warning("[MYSQL] DataFrame vide, aucune insertion")
+        return False
+
+    use_bulk_loader = PIPELINE_CONFIG['db_loader'] == 'load_data'
+
+    try:
+        ensure_schema()
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                # === VALIDATION DES COLONNES ===
+                missing_columns = [col for col in columns_order if col not in df.columns]
+                if missing_columns:
+                    logger.error(f"[MYSQL] Colonnes manquantes: {missing_columns}")
+                    return False
+
+                # === PREPARATION FINALE DES DONNEES ===
+                # Remplacement des None par des valeurs par defaut pour respecter NOT NULL
+                # (avec la validation active, les lignes a prix manquant sont deja rejetees)
+                default_values = {
+                    'type': 'stock',
+                    'sector': 'Unknown',
+                    'name': 'Unknown',
+                    'country': 'Unknown',
+                    'continent': 'Unknown',
+                    'open': 0.0,
+                    'high': 0.0,
+                    'low': 0.0,
+                    'close': 0.0,
+                    'volume': 0,
+                    'adj_close': 0.0
+                }
+
+                # Une seule copie (selection + remplissage); les conversions de types
+                # sont faites une fois par colonne dans build_db_columns()
+                load_columns = columns_order + ['row_hash'] if 'row_hash' in df.columns else columns_order
+                df_clean = df[load_columns].fillna(default_values)
+                if uses_normalized_schema():
+                    ensure_ticker_ids(conn, df_clean)
+
+                # === CHARGEMENT EN MASSE (si active) ===
+                if use_bulk_loader:
+                    staged_rows, error_rows, unchanged_rows = bulk_load_dataframe(cursor, df_clean)
+                    if error_rows > 0:
+                        logger.warning(f"[MYSQL] {error_rows} lignes ignorees a cause d'erreurs de conversion")
+                    if staged_rows == 0:
+                        logger.warning("[MYSQL] Aucune donnee valide a inserer")
+                        return False
+                    with METRICS.timer('db_write', df_clean):
+                        write_id = record_write_versions(cursor, df_clean)
+                        conn.commit()
+                    PRICE_READER.invalidate_rows(df_clean, write_id)
+                    logger.info("[MYSQL] [BULK] %d lignes chargees, %d inserees/mises a jour, %d inchangees",
+                                staged_rows, staged_rows - unchanged_rows, unchanged_rows)
+                    return True
+
+                # === INSERTION OPTIMISEE AVEC GESTION D'ERREURS ===
+                if uses_normalized_schema():
+                    sql_query = f"""
+                        REPLACE INTO daily_prices ({', '.join(FACT_COLUMNS)})
+                        VALUES ({', '.join(['%s'] * len(FACT_COLUMNS))})
+                    """
+                else:
+                    sql_query = """
+                        REPLACE INTO historical_prices 
+                        (date, ticker, type, sector, name, country, continent, 
+                         open, high, low, close, volume, adj_close, last_updated)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """
+                
+                # Conversion colonnaire en tuples avec masque de validation
+                with METRICS.timer('convert', df_clean):
+                    data_tuples, invalid_mask = dataframe_to_db_params(df_clean)
+
+                error_rows = int(invalid_mask.sum())
+                if error_rows > 0:
+                    sample_idx = df_clean.index[invalid_mask][:5].tolist()
+                    logger.warning(f"[MYSQL] {error_rows} lignes ignorees a cause d'erreurs de conversion "
+                                   f"(exemples index: {sample_idx})")
+                
+                if data_tuples:
+                    with METRICS.timer('db_write', df_clean):
+                        cursor.executemany(sql_query, data_tuples)
+                        store_row_hashes(cursor, df_clean, invalid_mask)
+                        write_id = record_write_versions(cursor, df_clean)
+                        conn.commit()
+                    PRICE_READER.invalidate_rows(df_clean, write_id)
+                    logger.info("[MYSQL] %d lignes inserees/mises a jour en base", len(data_tuples))
+                    return True
+                else:
+                    logger.warning("[MYSQL] Aucune donnee valide a inserer")
+                    return False
+
+    except pymysql.Error as err:
+        logger.error(f"[MYSQL] Erreur MySQL: {err}")
+        return False
+    except Exception as e:
+        logger.error(f"[MYSQL] Erreur generale save_to_mysql: {e}")
+        traceback.print_exc()
+        return False
+
+def test_dotenv_configuration():
+    """Test complet de la configuration dotenv"""
+    logger.info("[TEST] Début des tests de configuration dotenv")
+    
+    # Test 1: Variables d'environnement chargées
+    required_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_DATABASE']
+    for var in required_vars:
+        value = os.getenv(var)
+        if value:
+            if 'PASSWORD' in var:
+                logger.info(f"[TEST] {var}: ✓ (masqué pour sécurité)")
+            else:
+                logger.info(f"[TEST] {var}: ✓ ({value})")
+        else:
+            logger.error(f"[TEST] {var}: ✗ MANQUANT")
+            return False
+    
+    # Test 2: Connexion MySQL (connexion persistante, reutilisee ensuite par le pipeline)
+    try:
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                result = cursor.fetchone()
+                if result[0] == 1:
+                    logger.info("[TEST] Connexion MySQL: ✓")
+                else:
+                    logger.error("[TEST] Connexion MySQL: ✗")
+                    return False
+    except Exception as e:
+        logger.error(f"[TEST] Connexion MySQL: ✗ - {e}")
+        return False
+    
+    # Test 3: Configuration pipeline
+    logger.info(f"[TEST] Max retries: {PIPELINE_CONFIG['max_retries']}")
+    logger.info(f"[TEST] Sleep between retries: {PIPELINE_CONFIG['sleep_between_retries']}s")
+    logger.info(f"[TEST] YFinance timeout: {PIPELINE_CONFIG['yf_timeout']}s")
+    return True
+
+# === SINK PARQUET (LAC PARTITIONNE year/month/ticker) ===
+# Fichiers caches ('.' ou '_'): ignores par les lecteurs pyarrow.dataset
+PARQUET_TMP_PREFIX = '.tmp-'
+# Colonnes des fichiers; ticker, year et month sont portes par le chemin (partitionnement hive)
+PARQUET_FILE_COLUMNS = [col for col in columns_order if col != 'ticker']
+
+def uses_mysql_sink():
+    return PIPELINE_CONFIG['sink'] in ('mysql', 'both')
+
+def uses_parquet_sink():
+    return PIPELINE_CONFIG['sink'] in ('parquet', 'both')
+
+def parquet_file_schema():
+    """Schema fixe des fichiers du lac (identique d'un fichier a l'autre)"""
+    return pa.schema(
+        [('date', pa.date32())]
+        + [(col, pa.dictionary(pa.int32(), pa.string())) for col in TEXT_COLUMNS if col != 'ticker']
+        + [(col, pa.float64()) for col in ['open', 'high', 'low', 'close']]
+        + [('volume', pa.int64()), ('adj_close', pa.float64()), ('last_updated', pa.timestamp('us'))]
+    )
+
+def parquet_partitioning():
+    """Partitionnement hive year=/month=/ticker= (valeurs encodees URI: '^GSPC' -> '%5EGSPC')"""
+    return ds.partitioning(
+        pa.schema([('year', pa.int16()), ('month', pa.int8()), ('ticker', pa.string())]), flavor='hive'
+    )
+
+def parquet_partition_dir(root, year, month, ticker):
+    return os.path.join(root, f"year={year}", f"month={month}", f"ticker={quote(ticker, safe='')}")
+
+def write_parquet_file_atomic(table, partition_dir):
+    """Ecriture dans un fichier cache puis os.replace: un lecteur ne voit jamais de fichier partiel"""
+    os.makedirs(partition_dir, exist_ok=True)
+    name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}.parquet"
+    tmp_path = os.path.join(partition_dir, PARQUET_TMP_PREFIX + name)
+    try:
+        pq.write_table(table, tmp_path, compression=PIPELINE_CONFIG['parquet_compression'])
+        os.replace(tmp_path, os.path.join(partition_dir, name))
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return name
+
+def list_parquet_parts(partition_dir):
+    return sorted(name for name in os.listdir(partition_dir)
+                  if name.endswith('.parquet') and not name.startswith(('.', '_')))
+
+def compact_parquet_partition(partition_dir):
+    """
+    Fusionne les fichiers d'une partition en un seul, dedoublonne par date (derniere
+    valeur de last_updated conservee). Le nouveau fichier est publie avant la suppression
+    des anciens: les lecteurs dedoublonnent les lignes visibles deux fois entre-temps.
+    """
+    parts = list_parquet_parts(partition_dir)
+    if len(parts) <= 1:
+        return False
+    table = pa.concat_tables(
+        [pq.read_table(os.path.join(partition_dir, name), schema=parquet_file_schema()) for name in parts]
+    )
+    frame = table.to_pandas().sort_values(['date', 'last_updated'], kind='stable')
+    frame = frame.drop_duplicates(subset=['date'], keep='last')
+    write_parquet_file_atomic(pa.Table.from_pandas(frame, schema=parquet_file_schema(), preserve_index=False),
+                              partition_dir)
+    for name in parts:
+        os.remove(os.path.join(partition_dir, name))
+    return True
+
+def compact_parquet_lake(root=None, min_files=2):
+    """Compaction de toutes les partitions ayant au moins min_files fichiers"""
+    root = root or PIPELINE_CONFIG['parquet_path']
+    compacted = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if sum(1 for name in filenames if name.endswith('.parquet') and not name.startswith(('.', '_'))) >= min_files:
+            compacted += compact_parquet_partition(dirpath)
+    logger.info(f"[PARQUET] {compacted} partitions compactees")
+    return compacted
+
+def save_to_parquet(df):
+    """
+    Ajout d'un bloc (un ou plusieurs tickers) au lac Parquet: un fichier par partition
+    year/month/ticker touchee, ecrit atomiquement. Une partition depassant
+    parquet_compact_files fichiers est compactee aussitot.
+    """
+    if df.empty:
+        logger.warning("[PARQUET] DataFrame vide, aucune ecriture")
+        return False
+
+    root = PIPELINE_CONFIG['parquet_path']
+    try:
+        schema = parquet_file_schema()
+        dates = pd.to_datetime(df['date'])
+        written_files = 0
+        for (year, month, ticker), part in df.groupby([dates.dt.year, dates.dt.month, df['ticker']], sort=False):
+            partition_dir = parquet_partition_dir(root, year, month, ticker)
+            table = pa.Table.from_pandas(part[PARQUET_FILE_COLUMNS], schema=schema, preserve_index=False)
+            write_parquet_file_atomic(table, partition_dir)
+            written_files += 1
+            if len(list_parquet_parts(partition_dir)) >= PIPELINE_CONFIG['parquet_compact_files']:
+                compact_parquet_partition(partition_dir)
+    except ImportError as e:
+        logger.error(f"[PARQUET] pyarrow requis pour PIPELINE_SINK={PIPELINE_CONFIG['sink']}: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"[PARQUET] Erreur ecriture du lac {root}: {e}")
+        traceback.print_exc()
+        return False
+
+    logger.info("[PARQUET] %d lignes ecrites (%d fichiers) dans %s", len(df), written_files, root)
+    return True
+
+def read_parquet_lake(columns=None, tickers=None, start_date=None, end_date=None, root=None, deduplicate=True):
+    """
+    Lecture du lac avec projection de colonnes et filtres pousses vers pyarrow:
+    les partitions year/month/ticker hors filtre ne sont pas ouvertes, et les
+    statistiques de row groups ecartent les blocs hors de [start_date, end_date].
+    Retourne un DataFrame (ticker, date, colonnes demandees) dedoublonne par (ticker, date).
+    """
+    root = root or PIPELINE_CONFIG['parquet_path']
+    if not os.path.exists(root):
+        return pd.DataFrame(columns=['ticker', 'date'] + list(columns or PARQUET_FILE_COLUMNS[1:]))
+
+    dataset = ds.dataset(root, format='parquet', schema=parquet_file_schema().append(pa.field('year', pa.int16()))
+                         .append(pa.field('month', pa.int8())).append(pa.field('ticker', pa.string())),
+                         partitioning=parquet_partitioning())
+
+    # === PREDICATS: partitions d'abord (elagage des repertoires), puis dates ===
+    predicate = None
+
+    def combine(expression):
+        return expression if predicate is None else predicate & expression
+
+    if tickers is not None:
+        predicate = combine(ds.field('ticker').isin(list(tickers)))
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        predicate = combine((ds.field('year') > start.year)
+                            | ((ds.field('year') == start.year) & (ds.field('month') >= start.month)))
+        predicate = combine(ds.field('date') >= start.date())
+    if end_date is not None:
+        end = pd.Timestamp(end_date)
+        predicate = combine((ds.field('year') < end.year)
+                            | ((ds.field('year') == end.year) & (ds.field('month') <= end.month)))
+        predicate = combine(ds.field('date') <= end.date())
+
+    # === PROJECTION: colonnes demandees + cle de dedoublonnage ===
+    requested = list(columns) if columns is not None else PARQUET_FILE_COLUMNS[1:]
+    projected = ['ticker', 'date'] + [col for col in requested if col not in ('ticker', 'date')]
+    if deduplicate and 'last_updated' not in projected:
+        projected.append('last_updated')
+
+    frame = dataset.to_table(columns=projected, filter=predicate).to_pandas()
+    frame['date'] = pd.to_datetime(frame['date'])
+    if deduplicate and not frame.empty:
+        frame = frame.sort_values(['ticker', 'date', 'last_updated'], kind='stable')
+        frame = frame.drop_duplicates(subset=['ticker', 'date'], keep='last')
+        if 'last_updated' not in requested:
+            frame = frame.drop(columns='last_updated')
+    return frame.reset_index(drop=True)
+
+def save_to_sinks(df, mysql_df=None):
+    """
+    Ecrit un bloc dans les destinations de PIPELINE_SINK. En mode 'both', le lac
+    n'est alimente qu'une fois MySQL commite (une reprise ne duplique rien en base).
+    mysql_df: lignes a ecrire en base si elles different du bloc (lignes inchangees retirees);
+    le lac recoit toujours le bloc complet.
+    """
+    saved = True
+    if uses_mysql_sink():
+        mysql_df = df if mysql_df is None else mysql_df
+        saved = mysql_df.empty or save_to_mysql_optimized(mysql_df)
+    if saved and uses_parquet_sink():
+        saved = save_to_parquet(df)
+    return saved
+
+# === STORE LOCAL MEMMAP (UN FICHIER PAR TICKER ET PAR CHAMP, LECTURE SANS MYSQL) ===
+# Champs stockes, dans l'ordre d'ecriture: le fichier date est ecrit en dernier,
+# sa taille fait foi (des octets en trop dans un champ apres un arret sont ignores)
+MEMMAP_FIELDS = {
+    'open': 'float64',
+    'high': 'float64',
+    'low': 'float64',
+    'close': 'float64',
+    'volume': 'int64',
+    'date': 'datetime64[D]',
+}
+MEMMAP_VALUE_FIELDS = [field for field in MEMMAP_FIELDS if field != 'date']
+MEMMAP_ITEMSIZE = 8
+MEMMAP_TMP_PREFIX = '.tmp-'
+
+def memmap_ticker_dir(root, ticker):
+    return os.path.join(root, quote(ticker, safe=''))
+
+def memmap_field_path(ticker_dir, field):
+    return os.path.join(ticker_dir, f"{field}.bin")
+
+def memmap_row_count(ticker_dir):
+    """Lignes validees d'un ticker (taille du fichier date), 0 si absent"""
+    try:
+        return os.path.getsize(memmap_field_path(ticker_dir, 'date')) // MEMMAP_ITEMSIZE
+    except FileNotFoundError:
+        return 0
+
+def open_memmap_series(ticker_dir, rows, mode='r'):
+    """Champ -> np.memmap des rows premieres lignes (mmap d'un fichier vide impossible: rows > 0)"""
+    return {field: np.memmap(memmap_field_path(ticker_dir, field), dtype=dtype, mode=mode, shape=(rows,))
+            for field, dtype in MEMMAP_FIELDS.items()}
+
+def write_memmap_series_atomic(root, ticker, columns):
+    """
+    Reecriture complete d'un ticker (insertion de dates anterieures ou au milieu de la serie):
+    repertoire neuf puis echange par renommage. Un lecteur garde son mapping sur les
+    anciens fichiers et ne voit jamais de champs desalignes.
+    """
+    ticker_dir = memmap_ticker_dir(root, ticker)
+    tmp_dir = os.path.join(root, f"{MEMMAP_TMP_PREFIX}{uuid.uuid4().hex[:12]}")
+    os.makedirs(tmp_dir)
+    for field, dtype in MEMMAP_FIELDS.items():
+        columns[field].astype(dtype, copy=False).tofile(memmap_field_path(tmp_dir, field))
+    old_dir = None
+    if os.path.exists(ticker_dir):
+        old_dir = os.path.join(root, f"{MEMMAP_TMP_PREFIX}old-{uuid.uuid4().hex[:12]}")
+        os.replace(ticker_dir, old_dir)
+    os.replace(tmp_dir, ticker_dir)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+def append_ticker_to_memmap_store(root, ticker, frame):
+    """
+    Ecrit les lignes d'un ticker dans le store:
+    - dates deja presentes: valeurs remplacees en place (np.memmap r+)
+    - dates posterieures a la derniere: ajoutees en fin de fichier (champs puis date)
+    - autres dates (historique anterieur, trou comble): reecriture atomique du ticker
+    """
+    frame = frame.drop_duplicates('date', keep='last').sort_values('date')
+    dates = pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[D]')
+    values = {field: frame[field].to_numpy(dtype=MEMMAP_FIELDS[field]) for field in MEMMAP_VALUE_FIELDS}
+    ticker_dir = memmap_ticker_dir(root, ticker)
+    rows = memmap_row_count(ticker_dir)
+
+    new_rows = np.ones(len(dates), dtype=bool)
+    if rows:
+        stored = open_memmap_series(ticker_dir, rows, mode='r+')
+        new_rows = dates > stored['date'][-1]
+        positions = np.searchsorted(stored['date'], dates[~new_rows])
+        if not np.array_equal(stored['date'][np.minimum(positions, rows - 1)], dates[~new_rows]):
+            # Fusion: valeurs recues prioritaires sur les valeurs stockees pour une meme date
+            merged = pd.DataFrame({field: np.asarray(series) for field, series in stored.items()})
+            del stored
+            merged = pd.concat([merged, pd.DataFrame({'date': dates, **values})], ignore_index=True)
+            merged = merged.drop_duplicates('date', keep='last').sort_values('date')
+            write_memmap_series_atomic(root, ticker, {field: merged[field].to_numpy() for field in MEMMAP_FIELDS})
+            return
+        for field in MEMMAP_VALUE_FIELDS:
+            stored[field][positions] = values[field][~new_rows]
+            stored[field].flush()
+        del stored
+
+    if new_rows.any():
+        os.makedirs(ticker_dir, exist_ok=True)
+        for field in MEMMAP_FIELDS:
+            column = dates if field == 'date' else values[field]
+            with open(memmap_field_path(ticker_dir, field), 'ab') as series_file:
+                # Octets au-dela de la derniere ligne validee (arret pendant un ajout) ecrases
+                series_file.truncate(rows * MEMMAP_ITEMSIZE)
+                column[new_rows].tofile(series_file)
+
+def save_to_memmap_store(df, root=None):
+    """Ajoute un bloc (un ou plusieurs tickers) au store memmap; False si l'ecriture echoue"""
+    root = root or PIPELINE_CONFIG['memmap_path']
+    try:
+        for ticker, frame in df.groupby('ticker', sort=False):
+            append_ticker_to_memmap_store(root, ticker, frame)
+    except (OSError, ValueError) as e:
+        logger.error(f"[MEMMAP] Erreur ecriture du store {root}: {e}")
+        return False
+    return True
+
+def backfill_memmap_store(tickers=None, root=None):
+    """
+    Remplit le store depuis historical_prices (activation sur une base existante, store perdu):
+    chaque ticker (defaut TICKERS) est reecrit en entier, atomiquement, avec tout son historique.
+    Retourne le nombre de lignes ecrites, None en cas d'erreur MySQL ou d'ecriture.
+    """
+    root = root or PIPELINE_CONFIG['memmap_path']
+    tickers = TICKERS if tickers is None else tickers
+    written_rows, written_tickers = 0, 0
+    try:
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                for ticker in tickers:
+                    cursor.execute(
+                        f"SELECT date, {', '.join(MEMMAP_VALUE_FIELDS)} FROM historical_prices "
+                        f"WHERE ticker = %s ORDER BY date", (ticker,)
+                    )
+                    rows = cursor.fetchall()
+                    if not rows:
+                        continue
+                    frame = pd.DataFrame(list(rows), columns=['date'] + MEMMAP_VALUE_FIELDS)
+                    columns = {field: frame[field].to_numpy(dtype=MEMMAP_FIELDS[field])
+                               for field in MEMMAP_VALUE_FIELDS}
+                    columns['date'] = pd.to_datetime(frame['date']).to_numpy(dtype='datetime64[D]')
+                    write_memmap_series_atomic(root, ticker, columns)
+                    written_rows += len(frame)
+                    written_tickers += 1
+    except pymysql.Error as err:
+        logger.error(f"[MEMMAP] Lecture de historical_prices impossible: {err}")
+        return None
+    except OSError as e:
+        logger.error(f"[MEMMAP] Erreur ecriture du store {root}: {e}")
+        return None
+    logger.info("[MEMMAP] Store rempli depuis historical_prices: %d tickers, %d lignes", written_tickers, written_rows)
+    return written_rows
+
+class TimeSeriesStore:
+    """
+    Lecture du store memmap sans connexion MySQL. read() rend des vues np.memmap
+    (aucune copie, aucun decodage) bornees par recherche dichotomique sur les dates.
+    Les mappings sont gardes ouverts et rouverts quand le ticker a grandi ou a ete reecrit.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or PIPELINE_CONFIG['memmap_path']
+        self._series = {}
+
+    def _open(self, ticker):
+        ticker_dir = memmap_ticker_dir(self.root, ticker)
+        try:
+            stat = os.stat(memmap_field_path(ticker_dir, 'date'))
+        except FileNotFoundError:
+            self._series.pop(ticker, None)
+            return None
+        key = (stat.st_ino, stat.st_size)
+        cached = self._series.get(ticker)
+        if cached is None or cached[0] != key:
+            rows = stat.st_size // MEMMAP_ITEMSIZE
+            cached = self._series[ticker] = (key, open_memmap_series(ticker_dir, rows) if rows else None)
+        return cached[1]
+
+    def read(self, ticker, start_date=None, end_date=None, fields=None):
+        """
+        Champ -> vue sur [start_date, end_date] (bornes incluses, date toujours rendue);
+        None si le ticker est absent du store
+        """
+        series = self._open(ticker)
+        if series is None:
+            return None
+        dates = series['date']
+        lo = 0 if start_date is None else np.searchsorted(dates, np.datetime64(start_date, 'D'), side='left')
+        hi = len(dates) if end_date is None else np.searchsorted(dates, np.datetime64(end_date, 'D'), side='right')
+        return {field: series[field][lo:hi] for field in ['date'] + list(fields or MEMMAP_VALUE_FIELDS)}
+
+    def tickers(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(unquote(name) for name in os.listdir(self.root) if not name.startswith(MEMMAP_TMP_PREFIX))
+
+    def close(self):
+        self._series.clear()
+
+# === API DE LECTURE EN CACHE (LRU BORNE EN OCTETS, INVALIDATION PAR TICKER ET DATES) ===
+READER_PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'adj_close']
+
+class PriceReader:
+    """
+    Lectures courantes de historical_prices (derniers jours d'un ticker, tranche d'un secteur,
+    matrice des clotures) avec un cache LRU en memoire borne en octets. Chaque entree
+    retient les tickers, secteurs et dates qu'elle couvre: save_to_mysql_optimized()
+    n'invalide que les entrees recouvrant les lignes ecrites. Les ecritures des autres
+    processus sont detectees par price_write_versions, relue avant de servir une entree.
+    Thread-safe: connexion propre au lecteur (autocommit), requetes serialisees.
+    Les DataFrames rendus sont des copies (le cache n'est jamais modifie par l'appelant).
+    connect: fabrique de connexion (defaut pymysql avec MYSQL_CONFIG)
+    """
+
+    def __init__(self, max_bytes=None, connect=None):
+        self.max_bytes = max_bytes
+        self._connect = connect
+        self._conn = None
+        self._conn_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lookups = {}
+        self._evictions = 0
+        self._invalidations = 0
+
+    # === CONNEXION ===
+    def _connection(self):
+        """Connexion du lecteur (appelant sous _conn_lock), table des versions creee a l'ouverture"""
+        if self._conn is None or not self._conn.open:
+            if self._connect is not None:
+                self._conn = self._connect()
+            else:
+                self._conn = pymysql.connect(**MYSQL_CONFIG, autocommit=True)
+            with self._conn.cursor() as cursor:
+                cursor.execute(WRITE_VERSIONS_DDL)
+            self._conn.commit()
+        else:
+            self._conn.ping(reconnect=True)
+        return self._conn
+
+    def close(self):
+        with self._conn_lock:
+            if self._conn is not None and self._conn.open:
+                self._conn.close()
+            self._conn = None
+
+    # === CACHE ===
+    def _limit(self):
+        return self.max_bytes if self.max_bytes is not None else PIPELINE_CONFIG['read_cache_mb'] * 1024 * 1024
+
+    def _get(self, kind, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and self._read_versions(*entry['scope']) != entry['versions']:
+            # Ecriture d'un autre processus depuis la mise en cache
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._bytes -= self._entries.pop(key)['nbytes']
+                    self._invalidations += 1
+            entry = None
+        with self._lock:
+            lookups = self._lookups.setdefault(kind, {'hits': 0, 'misses': 0})
+            lookups['hits' if entry is not None else 'misses'] += 1
+            if entry is None:
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            return entry['frame'].copy()
+
+    def _put(self, key, frame, tickers, sectors, start_date, end_date, scope, versions):
+        """
+        Entree couvrant tickers/sectors sur [start_date, end_date] (None = borne ouverte).
+        scope: (tickers, secteurs) dont les versions ont ete lues avant la requete (versions).
+        Une entree plus grosse que la limite n'est pas gardee; les moins recemment lues
+        sont evincees jusqu'a repasser sous la limite.
+        """
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        limit = self._limit()
+        if nbytes > limit:
+            return frame
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous['nbytes']
+            self._entries[key] = {'frame': frame.copy(), 'nbytes': nbytes, 'tickers': frozenset(tickers),
+                                  'sectors': frozenset(sectors), 'start': start_date, 'end': end_date,
+                                  'scope': scope, 'versions': versions}
+            self._bytes += nbytes
+            while self._bytes > limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted['nbytes']
+                self._evictions += 1
+        return frame
+
+    def invalidate(self, ticker, start_date, end_date, sector=None):
+        """Supprime les entrees couvrant ticker (ou son secteur) et recoupant [start_date, end_date]"""
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items()
+                     if (ticker in entry['tickers'] or sector in entry['sectors'])
+                     and (entry['end'] is None or entry['end'] >= start_date)
+                     and (entry['start'] is None or entry['start'] <= end_date)]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)['nbytes']
+            self._invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_rows(self, df, write_id=None):
+        """
+        Invalidation apres ecriture d'un bloc: une plage de dates par ticker ecrit.
+        write_id: version enregistree par l'ecriture; les entrees conservees (hors des
+        dates ecrites) la prennent pour ne pas etre ecartees a la lecture suivante.
+        """
+        if not self._entries or df.empty:
+            return 0
+        dates = pd.to_datetime(df['date'])
+        ranges = dates.groupby([df['ticker'], df['sector']], sort=False).agg(['min', 'max'])
+        invalidated = sum(self.invalidate(ticker, first, last, sector)
+                          for (ticker, sector), first, last in ranges.itertuples(name=None))
+        if write_id is not None:
+            with self._lock:
+                for entry in self._entries.values():
+                    tickers, sectors = entry['scope']
+                    for ticker, sector in ranges.index:
+                        if ticker in tickers or sector in sectors:
+                            entry['versions'][ticker] = write_id
+        return invalidated
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Taux de succes par type de lecture, octets et entrees en cache, evictions et invalidations"""
+        with self._lock:
+            stats = {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self._limit(),
+                     'evictions': self._evictions, 'invalidations': self._invalidations}
+            for kind, lookups in self._lookups.items():
+                total = lookups['hits'] + lookups['misses']
+                stats[kind] = dict(lookups, hit_rate=round(lookups['hits'] / total, 4))
+            return stats
+
+    # === REQUETES ===
+    def _read_versions(self, tickers, sectors, cursor=None):
+        """Versions (ticker -> write_id) des tickers et des tickers des secteurs donnes"""
+        conditions, params = [], []
+        if tickers:
+            conditions.append(f"ticker IN ({', '.join(['%s'] * len(tickers))})")
+            params.extend(tickers)
+        if sectors:
+            conditions.append(f"sector IN ({', '.join(['%s'] * len(sectors))})")
+            params.extend(sectors)
+        sql = f"SELECT ticker, write_id FROM price_write_versions WHERE {' OR '.join(conditions)}"
+        if cursor is not None:
+            cursor.execute(sql, params)
+            return dict(cursor.fetchall())
+        with self._conn_lock:
+            with self._connection().cursor() as cursor:
+                cursor.execute(sql, params)
+                return dict(cursor.fetchall())
+
+    def _query(self, sql, params, columns, scope):
+        """
+        Execute la requete apres lecture des versions de scope (tickers, secteurs): une
+        ecriture intercalee rend l'entree perimee a la lecture suivante, jamais l'inverse.
+        Retourne (DataFrame, versions)
+        """
+        with self._conn_lock:
+            with self._connection().cursor() as cursor:
+                versions = self._read_versions(*scope, cursor=cursor)
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+        frame = pd.DataFrame(list(rows), columns=columns)
+        frame['date'] = pd.to_datetime(frame['date'])
+        return frame, versions
+
+    def latest(self, ticker, days=30):
+        """Les days dernieres lignes de ticker (days >= 1), par date croissante; vide si ticker inconnu"""
+        if days < 1:
+            raise ValueError(f"days doit etre >= 1 (recu {days})")
+        key = ('latest', ticker, days)
+        frame = self._get('latest', key)
+        if frame is not None:
+            return frame
+        scope = ((ticker,), ())
+        frame, versions = self._query(
+            f"SELECT date, {', '.join(READER_PRICE_COLUMNS)} FROM historical_prices "
+            f"WHERE ticker = %s ORDER BY date DESC LIMIT %s",
+            (ticker, days), ['date'] + READER_PRICE_COLUMNS, scope
+        )
+        frame = frame.iloc[::-1].reset_index(drop=True)
+        # Toute ecriture posterieure a la premiere ligne rendue change le resultat;
+        # un historique plus court que days (ou vide) depend de toutes les dates
+        start_date = frame['date'].iloc[0] if len(frame) == days else None
+        return self._put(key, frame, [ticker], [], start_date, None, scope, versions)
+
+    def sector_slice(self, sector, start_date, end_date):
+        """Lignes des tickers du secteur entre deux dates (incluses), triees par ticker puis date"""
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        key = ('sector', sector, start_date, end_date)
+        frame = self._get('sector', key)
+        if frame is not None:
+            return frame
+        scope = ((), (sector,))
+        frame, versions = self._query(
+            f"SELECT ticker, date, {', '.join(READER_PRICE_COLUMNS)} FROM historical_prices "
+            f"WHERE sector = %s AND date BETWEEN %s AND %s ORDER BY ticker, date",
+            (sector, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')),
+            ['ticker', 'date'] + READER_PRICE_COLUMNS, scope
+        )
+        return self._put(key, frame, frame['ticker'].unique(), [sector], start_date, end_date, scope, versions)
+
+    def close_matrix(self, tickers, start_date, end_date):
+        """Clotures date x ticker (colonnes dans l'ordre de tickers, NaN si pas de cotation ce jour)"""
+        tickers = list(tickers)
+        if not tickers:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='date'), dtype='float64')
+        start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        key = ('close_matrix', tuple(tickers), start_date, end_date)
+        frame = self._get('close_matrix', key)
+        if frame is not None:
+            return frame
+        scope = (tuple(tickers), ())
+        prices, versions = self._query(
+            f"SELECT date, ticker, close FROM historical_prices "
+            f"WHERE ticker IN ({', '.join(['%s'] * len(tickers))}) AND date BETWEEN %s AND %s",
+            (*tickers, start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')),
+            ['date', 'ticker', 'close'], scope
+        )
+        frame = prices.pivot(index='date', columns='ticker', values='close').reindex(columns=tickers).sort_index()
+        frame.columns.name = None
+        return self._put(key, frame, tickers, [], start_date, end_date, scope, versions)
+
+# Instance du processus, invalidee par save_to_mysql_optimized() apres chaque commit
+PRICE_READER = PriceReader()
+
+# === VALIDATION QUALITE (CONTROLES VECTORISES, QUARANTAINE) ===
+# Marge relative sur high/low (arrondis de la source)
+VALIDATION_PRICE_TOLERANCE = 1e-6
+QUARANTINE_COLUMNS = ['ticker', 'date', 'open', 'high', 'low', 'close', 'volume']
+
+def validate_prices(df, state):
+    """
+    Controles qualite d'un bloc d'un ticker, en un passage vectorise:
+    prix manquants ou <= 0, high >= max(open, close), low <= min(open, close),
+    volume >= 0, dates en double, variation de cloture > max_daily_jump (lignes rejetees)
+    et trous de plus de max_gap_days jours ouvres (lignes signalees mais chargees).
+    state: dernier etat du ticker ({'date', 'close', 'occurrence'}) pour enchainer les blocs; mis a jour.
+    Retourne (lignes valides, lignes en quarantaine avec occurrence/reasons/rejected ou None)
+    """
+    if not df['date'].is_monotonic_increasing:
+        df = df.sort_values('date', kind='stable')
+
+    open_, high, low, close = (df[col].to_numpy(dtype='float64') for col in ('open', 'high', 'low', 'close'))
+    volume = df['volume'].to_numpy(dtype='float64')
+    dates = df['date'].to_numpy(dtype='datetime64[D]')
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        missing = np.isnan(open_) | np.isnan(high) | np.isnan(low) | np.isnan(close)
+        non_positive = ~missing & ((open_ <= 0) | (high <= 0) | (low <= 0) | (close <= 0))
+        bad_price = missing | non_positive
+
+        # Date et cloture precedentes (dernier etat du bloc precedent pour la premiere ligne)
+        previous_dates = np.empty_like(dates)
+        previous_dates[1:] = dates[:-1]
+        previous_dates[:1] = state.get('date', np.datetime64('NaT'))
+        # Rang de chaque ligne parmi celles de meme date (la serie du bloc precedent continue)
+        rows = np.arange(len(dates))
+        run_start = np.maximum.accumulate(np.where(dates != previous_dates, rows, 0))
+        occurrence = rows - run_start
+        if len(dates) and dates[0] == previous_dates[0]:
+            occurrence[run_start == 0] += state.get('occurrence', 0) + 1
+        # Cloture precedente: derniere cloture exploitable (les prix invalides ne comptent pas)
+        usable_close = pd.Series(np.where(bad_price, np.nan, close))
+        usable_close = pd.concat([pd.Series([state.get('close', np.nan)]), usable_close], ignore_index=True).ffill()
+        previous_close = usable_close.to_numpy()[:-1]
+
+        rules = {
+            'missing_price': missing,
+            'non_positive_price': non_positive,
+            'high_below_open_close': high < np.maximum(open_, close) * (1 - VALIDATION_PRICE_TOLERANCE),
+            'low_above_open_close': low > np.minimum(open_, close) * (1 + VALIDATION_PRICE_TOLERANCE),
+            'negative_volume': volume < 0,
+            'duplicate_date': dates == previous_dates,
+        }
+        if PIPELINE_CONFIG['max_daily_jump'] > 0:
+            rules['price_jump'] = np.abs(close / previous_close - 1) > PIPELINE_CONFIG['max_daily_jump']
+
+        # Trous de calendrier: jours ouvres absents entre deux lignes (signales, non rejetes)
+        known = ~np.isnat(previous_dates) & ~np.isnat(dates) & (dates > previous_dates)
+        gap = np.zeros(len(dates), dtype=bool)
+        gap[known] = np.busday_count(previous_dates[known], dates[known]) - 1 > PIPELINE_CONFIG['max_gap_days']
+
+    rejected = np.zeros(len(dates), dtype=bool)
+    for mask in rules.values():
+        rejected |= mask
+
+    # Etat pour le bloc suivant: derniere date vue, derniere cloture exploitable
+    if len(dates):
+        state['date'] = dates[-1]
+        state['close'] = usable_close.iloc[-1]
+        state['occurrence'] = int(occurrence[-1])
+
+    flagged = rejected | gap
+    if not flagged.any():
+        return df, None
+
+    rules['calendar_gap'] = gap
+    positions = np.flatnonzero(flagged)
+    # Motifs construits pour les seules lignes signalees
+    reasons = [';'.join(name for name, mask in rules.items() if mask[position]) for position in positions]
+    quarantine = df.iloc[positions][QUARANTINE_COLUMNS].assign(occurrence=occurrence[positions], reasons=reasons,
+                                                               rejected=rejected[positions])
+    valid = df[~rejected] if rejected.any() else df
+    return valid, quarantine
+
+def save_quarantine(quarantine):
+    """Ecrit les lignes signalees dans price_quarantine (derniere detection par ticker, date et occurrence)"""
+    if not uses_mysql_sink():
+        return
+    detected_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    volume = quarantine['volume'].to_numpy(dtype='float64')
+    try:
+        ensure_schema()
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                cursor.executemany(
+                    "REPLACE INTO price_quarantine (ticker, date, occurrence, open, high, low, close, volume, "
+                    "reasons, rejected, detected_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                    list(zip(
+                        quarantine['ticker'].astype(str).tolist(),
+                        np.datetime_as_string(quarantine['date'].to_numpy(dtype='datetime64[D]'), unit='D').tolist(),
+                        quarantine['occurrence'].astype(int).tolist(),
+                        *(nullable_floats(quarantine[col].to_numpy()) for col in ('open', 'high', 'low', 'close')),
+                        [None if np.isnan(value) else int(value) for value in volume],
+                        [reason[:255] for reason in quarantine['reasons']],
+                        quarantine['rejected'].astype(int).tolist(),
+                        [detected_at] * len(quarantine),
+                    ))
+                )
+            conn.commit()
+    except pymysql.Error as err:
+        logger.error(f"[VALIDATION] Ecriture de la quarantaine impossible: {err}")
+
+def validate_chunk(ticker, chunk, validation_state, stats):
+    """Valide un bloc, met en quarantaine les lignes signalees et retourne les lignes a charger"""
+    valid, quarantine = validate_prices(chunk, validation_state.setdefault(ticker, {}))
+    if quarantine is None:
+        return valid
+
+    rejected_rows = int(quarantine['rejected'].sum())
+    flagged_rows = len(quarantine) - rejected_rows
+    stats['quarantined'] = stats.get('quarantined', 0) + rejected_rows
+    stats['flagged'] = stats.get('flagged', 0) + flagged_rows
+    METRICS.incr(ticker, 'rows_quarantined', rejected_rows)
+    counts = quarantine['reasons'].str.split(';').explode().value_counts().to_dict()
+    logger.warning(f"[VALIDATION] {ticker}: {rejected_rows} lignes rejetees, {flagged_rows} signalees {counts}")
+    save_quarantine(quarantine)
+    return valid
+
+# === ACTIONS SUR TITRES (DIVIDENDES, DIVISIONS) ET FACTEURS D'AJUSTEMENT ===
+# Colonnes ajoutees par transform_raw_prices() quand PIPELINE_CORPORATE_ACTIONS est actif
+ACTION_COLUMNS = ['dividends', 'stock_splits']
+
+def yf_auto_adjust():
+    """Prix ajustes par Yahoo, sauf en mode actions (ajustement derive des facteurs stockes)"""
+    return PIPELINE_CONFIG['yf_auto_adjust'] and not PIPELINE_CONFIG['corporate_actions']
+
+def extract_corporate_actions(ticker, chunks):
+    """
+    Actions d'un ticker dans ses blocs en attente (ordre chronologique), avec la cloture
+    de la seance precedant chaque ex-date (NaN si elle n'est pas dans les blocs).
+    Retourne un DataFrame ticker, ex_date, dividend, split_ratio, prev_close.
+    """
+    prices = pd.concat([chunk[['date', 'close'] + ACTION_COLUMNS] for chunk in chunks], ignore_index=True)
+    dividends = prices['dividends'].fillna(0).to_numpy(dtype='float64')
+    splits = prices['stock_splits'].fillna(0).to_numpy(dtype='float64')
+    is_action = (dividends > 0) | (splits > 0)
+    prev_close = prices['close'].shift(1).to_numpy(dtype='float64')
+    return pd.DataFrame({
+        'ticker': ticker,
+        'ex_date': prices['date'].to_numpy(dtype='datetime64[D]')[is_action],
+        'dividend': dividends[is_action],
+        # Yahoo: 0 = pas de division; ratio 2.0 pour une division 2 pour 1
+        'split_ratio': np.where(splits[is_action] > 0, splits[is_action], 1.0),
+        'prev_close': prev_close[is_action],
+    })
+
+def compute_action_factors(actions):
+    """
+    Facteur de chaque action, applique aux cours anterieurs a l'ex-date:
+    dividende 1 - D / cloture precedente, division 1 / ratio (PIPELINE_ADJUST_SPLITS:
+    les clotures Yahoo non ajustees integrent deja les divisions)
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dividend_factor = 1.0 - actions['dividend'].to_numpy() / actions['prev_close'].to_numpy()
+    dividend_factor = np.where(actions['dividend'].to_numpy() > 0, dividend_factor, 1.0)
+    split_factor = 1.0 / actions['split_ratio'].to_numpy() if PIPELINE_CONFIG['adjust_splits'] else 1.0
+    # Cloture precedente inconnue (ex-date en tete d'historique) ou aberrante: pas d'ajustement
+    dividend_factor = np.where(np.isfinite(dividend_factor) & (dividend_factor > 0), dividend_factor, 1.0)
+    return dividend_factor * split_factor
+
+def cumulative_adjustment_factors(factors):
+    """
+    Produit cumule inverse: l'element i ajuste les dates comprises entre l'ex-date i-1
+    (incluse) et l'ex-date i (exclue), soit le produit des facteurs des actions i et suivantes
+    """
+    return np.cumprod(factors[::-1])[::-1]
+
+def adjust_prices(dates, prices, ex_dates, cumulative):
+    """
+    Prix ajustes en un passage: recherche dichotomique de chaque date parmi les ex-dates
+    triees, puis produit par le facteur cumule de l'intervalle (1 apres la derniere action)
+    """
+    positions = np.searchsorted(ex_dates, dates, side='right')
+    return prices * np.append(cumulative, 1.0)[positions]
+
+def lookup_previous_closes(cursor, actions):
+    """Cloture precedente des actions en tete de bloc, lue en base (une requete pour toutes)"""
+    missing = np.flatnonzero(np.isnan(actions['prev_close'].to_numpy()))
+    if not len(missing):
+        return
+    tickers = actions['ticker'].to_numpy()[missing].tolist()
+    ex_dates = np.datetime_as_string(actions['ex_date'].to_numpy(dtype='datetime64[D]')[missing], unit='D').tolist()
+    # Une ligne (position, ticker, ex-date) par action, cloture de la derniere seance anterieure
+    keys = " UNION ALL ".join(["SELECT %s AS action_index, %s AS ticker, %s AS ex_date"] * len(missing))
+    cursor.execute(
+        f"SELECT a.action_index, (SELECT h.close FROM historical_prices h WHERE h.ticker = a.ticker "
+        f"AND h.date < a.ex_date ORDER BY h.date DESC LIMIT 1) FROM ({keys}) a",
+        [value for row in zip(missing.tolist(), tickers, ex_dates) for value in row]
+    )
+    column = actions.columns.get_loc('prev_close')
+    for position, close in cursor.fetchall():
+        if close is not None:
+            actions.iloc[int(position), column] = float(close)
+
+def record_corporate_actions(cursor, actions):
+    """
+    Enregistre les actions (idempotent: le recouvrement re-telecharge les memes ex-dates)
+    puis reconstruit les facteurs cumules des tickers concernes a partir de la table
+    corporate_actions: seule adjustment_factors change, les cours bruts ne sont pas reecrits
+    """
+    lookup_previous_closes(cursor, actions)
+    factors = compute_action_factors(actions)
+    updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.executemany(
+        "INSERT INTO corporate_actions (ticker, ex_date, dividend, split_ratio, factor, last_updated) "
+        "VALUES (%s, %s, %s, %s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE dividend = VALUES(dividend), split_ratio = VALUES(split_ratio), "
+        "factor = VALUES(factor), last_updated = VALUES(last_updated)",
+        list(zip(actions['ticker'].tolist(), np.datetime_as_string(actions['ex_date'].to_numpy(), unit='D').tolist(),
+                 actions['dividend'].tolist(), actions['split_ratio'].tolist(), factors.tolist(),
+                 [updated] * len(actions)))
+    )
+
+    tickers = sorted(actions['ticker'].unique())
+    placeholders = ', '.join(['%s'] * len(tickers))
+    cursor.execute(f"SELECT ticker, ex_date, factor FROM corporate_actions WHERE ticker IN ({placeholders}) "
+                   f"ORDER BY ticker, ex_date", tickers)
+    stored = pd.DataFrame(list(cursor.fetchall()), columns=['ticker', 'ex_date', 'factor'])
+    rows = []
+    for ticker, group in stored.groupby('ticker', sort=False):
+        ex_dates = pd.to_datetime(group['ex_date']).dt.strftime('%Y-%m-%d').tolist()
+        cumulative = cumulative_adjustment_factors(group['factor'].to_numpy(dtype='float64'))
+        rows.extend(zip([ticker] * len(ex_dates), ['1900-01-01'] + ex_dates[:-1], ex_dates, cumulative.tolist()))
+    cursor.execute(f"DELETE FROM adjustment_factors WHERE ticker IN ({placeholders})", tickers)
+    cursor.executemany("INSERT INTO adjustment_factors (ticker, valid_from, valid_to, factor) "
+                       "VALUES (%s, %s, %s, %s)", rows)
+    logger.info(f"[ACTIONS] {len(actions)} actions enregistrees, facteurs recalcules pour {len(tickers)} tickers")
+
+def load_adjustment_factors(cursor, tickers):
+    """ticker -> (ex-dates datetime64[D] triees, facteurs cumules) pour les tickers ayant des actions"""
+    cursor.execute(f"SELECT ticker, valid_to, factor FROM adjustment_factors "
+                   f"WHERE ticker IN ({', '.join(['%s'] * len(tickers))}) ORDER BY ticker, valid_to", list(tickers))
+    stored = pd.DataFrame(list(cursor.fetchall()), columns=['ticker', 'valid_to', 'factor'])
+    return {ticker: (pd.to_datetime(group['valid_to']).to_numpy(dtype='datetime64[D]'),
+                     group['factor'].to_numpy(dtype='float64'))
+            for ticker, group in stored.groupby('ticker', sort=False)}
+
+def apply_corporate_actions(pending):
+    """
+    Etape actions sur titres d'un lot: enregistre les dividendes/divisions des blocs,
+    met a jour les facteurs cumules et calcule adj_close (cloture x facteur connu au
+    chargement). La vue adjusted_prices derive l'ajustement courant de tout l'historique
+    a partir des facteurs, sans re-telechargement ni reecriture des lignes.
+    """
+    chunks_by_ticker = {}
+    for ticker, chunk, _ in pending:
+        if not chunk.empty and 'dividends' in chunk.columns:
+            chunks_by_ticker.setdefault(ticker, []).append(chunk)
+    if not chunks_by_ticker:
+        return
+
+    actions = pd.concat([extract_corporate_actions(ticker, chunks) for ticker, chunks in chunks_by_ticker.items()],
+                        ignore_index=True)
+    try:
+        ensure_schema()
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                if not actions.empty:
+                    record_corporate_actions(cursor, actions)
+                factors = load_adjustment_factors(cursor, list(chunks_by_ticker))
+            conn.commit()
+    except pymysql.Error as err:
+        logger.error(f"[ACTIONS] Facteurs d'ajustement indisponibles, adj_close = close: {err}")
+        return
+
+    for index, (ticker, chunk, is_last) in enumerate(pending):
+        if ticker in factors and not chunk.empty:
+            ex_dates, cumulative = factors[ticker]
+            adjusted = adjust_prices(chunk['date'].to_numpy(dtype='datetime64[D]'),
+                                     chunk['close'].to_numpy(dtype='float64'), ex_dates, cumulative)
+            pending[index] = (ticker, chunk.assign(adj_close=adjusted), is_last)
+
+# === DETECTION DES CHANGEMENTS (EMPREINTE PAR LIGNE) ===
+# Contenu compare: OHLCV et metadonnees (last_updated exclu, il change a chaque run)
+ROW_HASH_COLUMNS = OHLCV_COLUMNS + DIMENSION_COLUMNS
+
+def compute_row_hashes(df):
+    """Empreinte 64 bits signee par ligne, stable d'un run a l'autre (cle de hachage fixe de pandas)"""
+    content = df[OHLCV_COLUMNS].astype('float64').join(df[DIMENSION_COLUMNS].astype(str))
+    return pd.util.hash_pandas_object(content, index=False).to_numpy().view('int64')
+
+def load_row_hashes(cursor, tickers, start_date, end_date):
+    """Empreintes stockees (ticker, date, stored_hash) pour plusieurs tickers sur [start_date, end_date]"""
+    placeholders = ', '.join(['%s'] * len(tickers))
+    cursor.execute(
+        f"SELECT ticker, date, row_hash FROM price_row_hashes "
+        f"WHERE ticker IN ({placeholders}) AND date BETWEEN %s AND %s",
+        (*tickers, start_date, end_date)
+    )
+    stored = pd.DataFrame(list(cursor.fetchall()), columns=['ticker', 'date', 'stored_hash'])
+    stored['ticker'] = stored['ticker'].astype(str)
+    stored['date'] = pd.to_datetime(stored['date'])
+    stored['stored_hash'] = stored['stored_hash'].astype('Int64')
+    return stored
+
+def store_row_hashes(cursor, df_clean, invalid_mask):
+    """Enregistre les empreintes des lignes ecrites, dans la transaction du chargement"""
+    if 'row_hash' not in df_clean.columns:
+        return
+    valid = ~invalid_mask
+    dates = pd.to_datetime(df_clean['date']).to_numpy(dtype='datetime64[D]')[valid]
+    cursor.executemany(
+        "REPLACE INTO price_row_hashes (ticker, date, row_hash) VALUES (%s, %s, %s)",
+        list(zip(df_clean['ticker'].to_numpy()[valid].tolist(),
+                 np.datetime_as_string(dates, unit='D').tolist(),
+                 df_clean['row_hash'].to_numpy()[valid].tolist()))
+    )
+
+def record_write_versions(cursor, df_clean):
+    """
+    Nouvelle version des tickers du bloc, dans la transaction du chargement: les PriceReader
+    des autres processus ecartent leurs entrees en cache sur ces tickers. Retourne la version.
+    """
+    write_id = uuid.uuid4().hex
+    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    written = df_clean.drop_duplicates('ticker')
+    cursor.executemany(
+        "REPLACE INTO price_write_versions (ticker, sector, write_id, last_updated) VALUES (%s, %s, %s, %s)",
+        [(ticker, sector, write_id, last_updated) for ticker, sector in zip(written['ticker'], written['sector'])]
+    )
+    return write_id
+
+def skip_unchanged_rows(pending):
+    """
+    Lignes de chaque bloc en attente a ecrire dans MySQL: celles dont l'empreinte differe
+    de l'empreinte stockee (une seule requete pour tous les tickers du lot). Les lignes
+    conservees portent une colonne row_hash, enregistree avec elles par save_to_mysql_optimized.
+    Les blocs en attente ne sont pas modifies (le lac et le store recoivent tout le bloc).
+    Retourne (blocs a ecrire en base, alignes sur pending; nombre de lignes ignorees).
+    """
+    mysql_chunks = [chunk for _, chunk, _ in pending]
+    # Blocs vides (lignes toutes rejetees par la validation): rien a comparer
+    chunks = [(ticker, chunk) for ticker, chunk, _ in pending if not chunk.empty]
+    if not chunks:
+        return mysql_chunks, 0
+    tickers = sorted({ticker for ticker, _ in chunks})
+    start_date = min(pd.Timestamp(chunk['date'].min()) for _, chunk in chunks)
+    end_date = max(pd.Timestamp(chunk['date'].max()) for _, chunk in chunks)
+    try:
+        ensure_schema()
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                stored = load_row_hashes(cursor, tickers, start_date.strftime("%Y-%m-%d"),
+                                         end_date.strftime("%Y-%m-%d"))
+    except pymysql.Error as err:
+        # Empreintes indisponibles: tout est ecrit, comme sans detection
+        logger.warning(f"[CHANGES] Empreintes indisponibles, ecriture complete: {err}")
+        return mysql_chunks, 0
+
+    skipped_rows = 0
+    for index, (ticker, chunk, _) in enumerate(pending):
+        if chunk.empty:
+            continue
+        hashes = compute_row_hashes(chunk)
+        if stored.empty:
+            # Premier chargement de ces dates: aucune comparaison necessaire
+            mysql_chunks[index] = chunk.assign(row_hash=hashes)
+            continue
+        keys = pd.DataFrame({'ticker': chunk['ticker'].astype(str).to_numpy(),
+                             'date': pd.to_datetime(chunk['date']).to_numpy()})
+        previous = keys.merge(stored, on=['ticker', 'date'], how='left')['stored_hash']
+        changed = (previous != hashes).fillna(True).to_numpy(dtype=bool)
+        skipped = len(chunk) - int(changed.sum())
+        if skipped:
+            METRICS.incr(ticker, 'rows_skipped', skipped)
+            skipped_rows += skipped
+        mysql_chunks[index] = chunk.loc[changed].assign(row_hash=hashes[changed])
+    return mysql_chunks, skipped_rows
+
+# === ETAPE DE CHARGEMENT (TRANSACTIONS REGROUPEES) ===
+def record_ticker_success(stats, ticker, rows):
+    """Met a jour les compteurs globaux et par secteur pour un ticker charge"""
+    sector = TICKER_MAPPING[ticker]['sector']
+    stats['success'] += 1
+    stats['rows'] += rows
+    METRICS.incr(ticker, 'rows', rows)
+    if sector not in stats['sectors']:
+        stats['sectors'][sector] = {'success': 0, 'rows': 0}
+    stats['sectors'][sector]['success'] += 1
+    stats['sectors'][sector]['rows'] += rows
+
+def finalize_ticker(stats, ticker, state):
+    """Comptabilise un ticker une fois tous ses blocs ecrits (succes si aucun bloc en echec)"""
+    if state['failed']:
+        stats['errors'] += 1
+        METRICS.mark(ticker, 'error')
+        record_checkpoint(ticker, 'error')
+        logger.error(f"[ERROR] {ticker}: Echec insertion base de donnees")
+    else:
+        record_ticker_success(stats, ticker, state['rows'])
+        METRICS.mark(ticker, 'success')
+        record_checkpoint(ticker, 'success', state['rows'])
+        logger.info("[SUCCESS] %s: %d lignes -> Base de donnees", ticker, state['rows'])
+
+def flush_pending_loads(pending, stats, ticker_state):
+    """
+    Ecrit les blocs en attente (plusieurs tickers) dans une seule transaction (un seul commit).
+    Les lignes inchangees depuis le dernier run ne sont pas reecrites dans MySQL; le lac
+    Parquet et le store memmap recoivent le bloc valide complet.
+    En cas d'echec du lot, reprise bloc par bloc pour isoler le ticker fautif.
+    """
+    if not pending:
+        return
+
+    # adj_close calcule avant l'empreinte des lignes (il en fait partie)
+    if PIPELINE_CONFIG['corporate_actions'] and uses_mysql_sink():
+        apply_corporate_actions(pending)
+
+    mysql_chunks = [chunk for _, chunk, _ in pending]
+    if PIPELINE_CONFIG['change_detection'] and uses_mysql_sink():
+        mysql_chunks, skipped_rows = skip_unchanged_rows(pending)
+        stats['skipped'] = stats.get('skipped', 0) + skipped_rows
+
+    # Blocs vides apres validation: rien a ecrire, comptes comme reussis
+    writes = [index for index, (_, chunk, _) in enumerate(pending) if not chunk.empty]
+    saved = dict.fromkeys(range(len(pending)), True)
+    if writes:
+        record_stage_memory('load', sum(pending[index][1].memory_usage(index=True).sum() for index in writes))
+
+    if len(writes) == 1:
+        saved[writes[0]] = save_to_sinks(pending[writes[0]][1], mysql_chunks[writes[0]])
+    elif writes:
+        batch_df = pd.concat([pending[index][1] for index in writes], ignore_index=True)
+        mysql_df = pd.concat([mysql_chunks[index] for index in writes], ignore_index=True)
+        logger.info("[MYSQL] Transaction groupee: %d blocs, %d lignes", len(writes), len(mysql_df))
+        batch_saved = save_to_sinks(batch_df, mysql_df)
+        del batch_df, mysql_df
+        if not batch_saved:
+            logger.warning(f"[MYSQL] Echec du lot de {len(writes)} blocs, reprise bloc par bloc")
+            for index in writes:
+                saved[index] = save_to_sinks(pending[index][1], mysql_chunks[index])
+
+    for index, (ticker, chunk, is_last) in enumerate(pending):
+        state = ticker_state.setdefault(ticker, {'rows': 0, 'failed': False})
+        written = mysql_chunks[index]
+        if not saved[index]:
+            state['failed'] = True
+        elif not chunk.empty:
+            state['rows'] += len(written)
+            if not written.empty:
+                record_touched_dates(stats, ticker, written)
+            if PIPELINE_CONFIG['memmap_store']:
+                save_to_memmap_store(chunk)
+        if is_last:
+            finalize_ticker(stats, ticker, ticker_state.pop(ticker))
+    pending.clear()
+
+def record_touched_dates(stats, ticker, chunk):
+    """Premiere date ecrite par ticker pendant le run (point de depart des recalculs incrementaux)"""
+    first_date = pd.Timestamp(chunk['date'].min()).strftime("%Y-%m-%d")
+    touched = stats.setdefault('touched', {})
+    if ticker not in touched or first_date < touched[ticker]:
+        touched[ticker] = first_date
+
+# === INDICATEURS PRECALCULES (TABLE price_analytics) ===
+MOVING_AVERAGE_WINDOWS = (20, 50, 200)
+VOLATILITY_WINDOW = 20
+TRADING_DAYS_PER_YEAR = 252
+# Jours calendaires relus avant la premiere date ecrite: couvre 200 seances meme
+# avec jours feries (la plus longue fenetre doit etre complete)
+ANALYTICS_LOOKBACK_DAYS = 400
+
+def compute_price_analytics(prices):
+    """
+    Indicateurs vectorises par ticker sur un DataFrame (ticker, date, close) trie par ticker puis date:
+    rendement journalier, moyennes mobiles 20/50/200 seances, volatilite 20 seances annualisee.
+    Une fenetre incomplete donne NULL (pas de moyenne sur un historique tronque).
+    """
+    by_ticker = prices.groupby('ticker', sort=False)['close']
+    result = prices[['date', 'ticker', 'close']].copy()
+    result['daily_return'] = by_ticker.pct_change()
+    for window in MOVING_AVERAGE_WINDOWS:
+        result[f'ma_{window}'] = by_ticker.rolling(window, min_periods=window).mean().to_numpy()
+    result[f'volatility_{VOLATILITY_WINDOW}'] = (
+        result.groupby('ticker', sort=False)['daily_return']
+        .rolling(VOLATILITY_WINDOW, min_periods=VOLATILITY_WINDOW).std().to_numpy()
+        * np.sqrt(TRADING_DAYS_PER_YEAR)
+    )
+    return result
+
+def nullable_floats(values):
+    """Tableau float64 -> liste Python avec None a la place des NaN (NULL MySQL)"""
+    values = np.asarray(values, dtype='float64')
+    column = values.astype(object)
+    column[np.isnan(values)] = None
+    return column.tolist()
+
+def load_close_history(cursor, tickers, start_date):
+    """Relit (ticker, date, close) depuis historical_prices pour plusieurs tickers a partir de start_date"""
+    placeholders = ', '.join(['%s'] * len(tickers))
+    cursor.execute(
+        f"SELECT ticker, date, close FROM historical_prices "
+        f"WHERE ticker IN ({placeholders}) AND date >= %s ORDER BY ticker, date",
+        (*tickers, start_date)
+    )
+    prices = pd.DataFrame(list(cursor.fetchall()), columns=['ticker', 'date', 'close'])
+    prices['date'] = pd.to_datetime(prices['date'])
+    prices['close'] = prices['close'].astype('float64')
+    return prices
+
+def refresh_price_analytics(touched):
+    """
+    Recalcul incremental de price_analytics: pour chaque ticker ecrit pendant le run,
+    seules les dates >= premiere date ecrite sont recalculees, a partir de l'historique
+    relu sur ANALYTICS_LOOKBACK_DAYS (jamais l'historique complet).
+    touched: dict ticker -> premiere date ecrite (YYYY-MM-DD)
+    """
+    if not touched:
+        return 0
+
+    # Tickers regroupes par date de depart commune (une requete par groupe)
+    by_start = {}
+    for ticker, first_date in touched.items():
+        by_start.setdefault(first_date, []).append(ticker)
+
+    analytics_columns = ['date', 'ticker', 'close', 'daily_return'] + \
+        [f'ma_{window}' for window in MOVING_AVERAGE_WINDOWS] + [f'volatility_{VOLATILITY_WINDOW}']
+    sql_query = f"""
+        REPLACE INTO price_analytics ({', '.join(analytics_columns)}, last_updated)
+        VALUES ({', '.join(['%s'] * (len(analytics_columns) + 1))})
+    """
+    started = time.perf_counter()
+    written_rows = 0
+    write_rows = PIPELINE_CONFIG['commit_rows']
+
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            for first_date, start_tickers in by_start.items():
+                lookback_start = pd.Timestamp(first_date) - pd.Timedelta(days=ANALYTICS_LOOKBACK_DAYS)
+                # Tickers par relecture: environ chunk_rows lignes (jours ouvres) par requete
+                rows_per_ticker = max(1, len(pd.bdate_range(lookback_start, datetime.now())))
+                tickers_per_query = max(1, PIPELINE_CONFIG['chunk_rows'] // rows_per_ticker)
+
+                for offset in range(0, len(start_tickers), tickers_per_query):
+                    tickers = start_tickers[offset:offset + tickers_per_query]
+                    prices = load_close_history(cursor, tickers, lookback_start.strftime("%Y-%m-%d"))
+                    if prices.empty:
+                        continue
+
+                    analytics = compute_price_analytics(prices)
+                    del prices
+                    analytics = analytics[analytics['date'] >= pd.Timestamp(first_date)]
+                    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+                    # Parametres construits par tranches de commit_rows; NaN -> NULL
+                    for start in range(0, len(analytics), write_rows):
+                        part = analytics.iloc[start:start + write_rows]
+                        columns = [np.datetime_as_string(part['date'].to_numpy(dtype='datetime64[D]'), unit='D').tolist(),
+                                   part['ticker'].tolist()]
+                        for col in analytics_columns[2:]:
+                            columns.append(nullable_floats(part[col].to_numpy()))
+                        columns.append([last_updated] * len(part))
+                        cursor.executemany(sql_query, list(zip(*columns)))
+                    written_rows += len(analytics)
+        conn.commit()
+
+    logger.info(f"[ANALYTICS] {written_rows:,} lignes recalculees pour {len(touched)} tickers "
+                f"en {time.perf_counter() - started:.2f}s")
+    return written_rows
+
+# === AGREGATS JOURNALIERS PAR SECTEUR / PAYS / CONTINENT ===
+INDEX_BASE_LEVEL = 100.0
+# Jours calendaires relus avant chaque tranche pour retrouver la cloture precedente
+AGGREGATE_PREVIOUS_CLOSE_DAYS = 14
+
+def load_last_index_levels(cursor, dimension, table, before_date):
+    """Dernier niveau d'indice de chaque groupe avant before_date (point de depart du chainage)"""
+    cursor.execute(
+        f"SELECT t.{dimension}, t.index_level FROM {table} t "
+        f"JOIN (SELECT {dimension} AS grp, MAX(date) AS last_date FROM {table} "
+        f"WHERE date < %s GROUP BY {dimension}) last "
+        f"ON t.{dimension} = last.grp AND t.date = last.last_date",
+        (before_date,)
+    )
+    return {name: float(level) for name, level in cursor.fetchall()}
+
+# Sommes partielles additives entre tickers: agregees par la base ou par tranche de lignes
+GROUP_PARTIAL_COLUMNS = ['member_count', 'return_sum', 'return_count', 'total_volume', 'advancing', 'declining']
+
+def compute_group_aggregates(partials, dimension, start_levels):
+    """
+    Agregats d'une dimension par (groupe, date) a partir de sommes partielles (GROUP_PARTIAL_COLUMNS,
+    une ligne par ticker ou deja regroupees): rendement moyen, volume total, hausses/baisses et
+    indice equipondere chaine depuis start_levels (INDEX_BASE_LEVEL pour un nouveau groupe).
+    """
+    aggregates = partials.groupby([dimension, 'date'], sort=True)[GROUP_PARTIAL_COLUMNS].sum().reset_index()
+    aggregates['avg_return'] = aggregates['return_sum'] / aggregates['return_count'].where(aggregates['return_count'] > 0)
+
+    # Indice equipondere: niveau precedent x (1 + rendement moyen du jour)
+    growth = (1 + aggregates['avg_return'].fillna(0.0)).groupby(aggregates[dimension], sort=False).cumprod()
+    base = aggregates[dimension].map(start_levels).fillna(INDEX_BASE_LEVEL)
+    aggregates['index_level'] = base * growth
+    return aggregates
+
+def load_group_partials(cursor, start_date):
+    """
+    Sommes partielles par (secteur, pays, continent, date) calculees par la base a partir des
+    rendements deja stockes dans price_analytics: seules quelques lignes par date sont relues.
+    """
+    dimensions = list(AGGREGATE_TABLES)
+    cursor.execute(
+        f"SELECT {', '.join('h.' + dimension for dimension in dimensions)}, h.date, COUNT(*), "
+        f"SUM(a.daily_return), COUNT(a.daily_return), SUM(h.volume), "
+        f"SUM(CASE WHEN a.daily_return > 0 THEN 1 ELSE 0 END), "
+        f"SUM(CASE WHEN a.daily_return < 0 THEN 1 ELSE 0 END) "
+        f"FROM historical_prices h "
+        f"LEFT JOIN price_analytics a ON a.date = h.date AND a.ticker = h.ticker "
+        f"WHERE h.date >= %s GROUP BY {', '.join('h.' + dimension for dimension in dimensions)}, h.date",
+        (start_date,)
+    )
+    partials = pd.DataFrame(list(cursor.fetchall()), columns=[*dimensions, 'date', *GROUP_PARTIAL_COLUMNS])
+    partials['date'] = pd.to_datetime(partials['date'])
+    partials['return_sum'] = partials['return_sum'].astype('float64').fillna(0.0)
+    for col in ['member_count', 'return_count', 'total_volume', 'advancing', 'declining']:
+        partials[col] = partials[col].astype('int64')
+    return partials
+
+def load_price_partials(cursor, slice_start, slice_end):
+    """
+    Sommes partielles ticker par ticker relues depuis historical_prices sur [slice_start, slice_end)
+    (rendement recalcule depuis la cloture precedente): sans price_analytics.
+    """
+    dimensions = list(AGGREGATE_TABLES)
+    cursor.execute(
+        f"SELECT ticker, date, {', '.join(dimensions)}, close, volume FROM historical_prices "
+        f"WHERE date >= %s AND date < %s ORDER BY ticker, date",
+        ((slice_start - pd.Timedelta(days=AGGREGATE_PREVIOUS_CLOSE_DAYS)).strftime("%Y-%m-%d"),
+         slice_end.strftime("%Y-%m-%d"))
+    )
+    prices = pd.DataFrame(list(cursor.fetchall()), columns=['ticker', 'date', *dimensions, 'close', 'volume'])
+    if prices.empty:
+        return prices
+    prices['date'] = pd.to_datetime(prices['date'])
+    daily_return = prices['close'].astype('float64').groupby(prices['ticker'], sort=False).pct_change()
+    # Lignes anterieures a la tranche: uniquement la cloture precedente
+    keep = (prices['date'] >= slice_start).to_numpy()
+    partials = prices.loc[keep, [*dimensions, 'date']]
+    daily_return = daily_return[keep]
+    partials['member_count'] = 1
+    partials['return_sum'] = daily_return.fillna(0.0)
+    partials['return_count'] = daily_return.notna().astype('int64')
+    partials['total_volume'] = prices.loc[keep, 'volume'].astype('int64')
+    partials['advancing'] = (daily_return > 0).astype('int64')
+    partials['declining'] = (daily_return < 0).astype('int64')
+    return partials
+
+def refresh_group_aggregates(touched):
+    """
+    Recalcul incremental des tables *_daily_stats a partir de la plus ancienne date
+    ecrite pendant le run. Chaque date est agregee sur tous les tickers du groupe.
+    Avec price_analytics, la base renvoie des sommes partielles par (groupe, date) en une
+    requete; sinon la relecture avance par tranches de dates (~chunk_rows lignes).
+    L'indice est chaine d'une tranche a l'autre.
+    """
+    if not touched:
+        return 0
+
+    start_date = pd.Timestamp(min(touched.values()))
+    end_date = pd.Timestamp(datetime.now().date()) + pd.Timedelta(days=1)
+    # Jours ouvres par tranche pour environ chunk_rows lignes relues
+    slice_days = max(5, PIPELINE_CONFIG['chunk_rows'] // max(1, len(TICKER_MAPPING)))
+    slice_length = pd.Timedelta(days=slice_days * 7 // 5)
+    started = time.perf_counter()
+    written_rows = 0
+
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            levels = {dimension: load_last_index_levels(cursor, dimension, table, start_date.strftime("%Y-%m-%d"))
+                      for dimension, table in AGGREGATE_TABLES.items()}
+
+            slice_start = start_date
+            while slice_start < end_date:
+                if PIPELINE_CONFIG['analytics_enabled']:
+                    # Rendements deja calcules par refresh_price_analytics: une seule tranche
+                    slice_end = end_date
+                    partials = load_group_partials(cursor, slice_start.strftime("%Y-%m-%d"))
                 else:
-                    error_count += 1
-                    logger.error(f"[ERROR] {ticker}: Echec insertion base de donnees")
-            else:
-                error_count += 1
-                logger.warning(f"[WARN] {ticker}: Aucune donnee recuperee")
+                    slice_end = min(slice_start + slice_length, end_date)
+                    partials = load_price_partials(cursor, slice_start, slice_end)
+                if not partials.empty:
+                    last_updated = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    for dimension, table in AGGREGATE_TABLES.items():
+                        aggregates = compute_group_aggregates(partials, dimension, levels[dimension])
+                        levels[dimension].update(aggregates.groupby(dimension)['index_level'].last().to_dict())
+                        cursor.executemany(
+                            f"REPLACE INTO {table} ({dimension}, date, member_count, avg_return, total_volume, "
+                            f"advancing, declining, index_level, last_updated) "
+                            f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                            list(zip(
+                                aggregates[dimension].tolist(),
+                                np.datetime_as_string(aggregates['date'].to_numpy(dtype='datetime64[D]'), unit='D').tolist(),
+                                aggregates['member_count'].tolist(),
+                                nullable_floats(aggregates['avg_return'].to_numpy()),
+                                aggregates['total_volume'].astype('int64').tolist(),
+                                aggregates['advancing'].astype('int64').tolist(),
+                                aggregates['declining'].astype('int64').tolist(),
+                                aggregates['index_level'].tolist(),
+                                [last_updated] * len(aggregates),
+                            ))
+                        )
+                        written_rows += len(aggregates)
+                slice_start = slice_end
+        conn.commit()
+
+    logger.info(f"[AGGREGATES] {written_rows:,} lignes secteur/pays/continent recalculees depuis "
+                f"{start_date.strftime('%Y-%m-%d')} en {time.perf_counter() - started:.2f}s")
+    return written_rows
+
+# === ETAPES EN FLUX (GENERATEURS DE BLOCS) ===
+_stage_memory = {}
+_stage_memory_lock = threading.Lock()
+
+def record_stage_memory(stage, nbytes):
+    """
+    Memorise le plus gros volume de donnees detenu par une etape (octets, memory_usage
+    sans deep: les colonnes texte partagent la meme chaine pour toutes les lignes)
+    """
+    with _stage_memory_lock:
+        if nbytes > _stage_memory.get(stage, 0):
+            _stage_memory[stage] = int(nbytes)
+
+def get_peak_rss_bytes():
+    """Pic de memoire residente du processus, None si indisponible (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets sous Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+# === METRIQUES D'EXECUTION (TIMERS PAR ETAPE, RAPPORT DE RUN) ===
+METRIC_STAGES = ('fetch', 'transform', 'convert', 'db_write')
+
+class _NullTimer:
+    """Timer inerte partage: aucun appel d'horloge quand les metriques sont desactivees"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _StageTimer:
+    """Mesure perf_counter d'une etape, imputee a la fin du bloc"""
+    __slots__ = ('metrics', 'stage', 'tickers', 'started')
+
+    def __init__(self, metrics, stage, tickers):
+        self.metrics = metrics
+        self.stage = stage
+        self.tickers = tickers
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_duration(self.stage, time.perf_counter() - self.started, self.tickers)
+        return False
+
+class RunMetrics:
+    """
+    Collecteur thread-safe des metriques d'un run: duree par ticker et par etape,
+    tentatives, lignes chargees et octets extraits. Desactive, chaque appel
+    se resume au test d'un booleen.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._tickers = {}
+        self._started = time.time()
+
+    def reset(self, enabled):
+        """Demarre un nouveau run (vide les compteurs du run precedent)"""
+        with self._lock:
+            self.enabled = enabled
+            self._tickers = {}
+            self._started = time.time()
+
+    def _entry(self, ticker):
+        entry = self._tickers.get(ticker)
+        if entry is None:
+            entry = dict.fromkeys(METRIC_STAGES, 0.0)
+            entry.update(status=None, attempts=0, rows=0, rows_skipped=0, rows_quarantined=0, bytes_fetched=0)
+            self._tickers[ticker] = entry
+        return entry
+
+    def timer(self, stage, tickers):
+        """
+        Context manager mesurant une etape. tickers: un ticker, une liste
+        (duree repartie a parts egales) ou un DataFrame multi-tickers
+        (duree repartie au prorata des lignes de chaque ticker).
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage, tickers)
+
+    def add_duration(self, stage, seconds, tickers):
+        if isinstance(tickers, str):
+            shares = {tickers: 1.0}
+        elif isinstance(tickers, pd.DataFrame):
+            shares = tickers['ticker'].value_counts(normalize=True).to_dict()
+        else:
+            shares = {ticker: 1.0 / len(tickers) for ticker in tickers}
+        with self._lock:
+            for ticker, share in shares.items():
+                self._entry(ticker)[stage] += seconds * share
+
+    def incr(self, ticker, key, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(ticker)[key] += value
+
+    def snapshot(self):
+        """Compteurs par ticker (transmis par un processus fils au parent)"""
+        with self._lock:
+            return {ticker: dict(entry) for ticker, entry in self._tickers.items()}
+
+    def merge(self, entries):
+        """Integre les compteurs par ticker d'un processus fils (tickers disjoints)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._tickers.update(entries)
+
+    def mark(self, ticker, status):
+        """Statut final du ticker: success, error, no_data ou up_to_date"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entry(ticker)['status'] = status
+
+    def build_report(self, summary):
+        """
+        Lignes du rapport: une par ticker puis une ligne de synthese du run.
+        summary: compteurs globaux de main() (duree, succes, erreurs, lignes)
+        """
+        with self._lock:
+            tickers = {ticker: dict(entry) for ticker, entry in self._tickers.items()}
+
+        records = []
+        totals = dict.fromkeys(METRIC_STAGES, 0.0)
+        retries = bytes_fetched = 0
+        for ticker, entry in tickers.items():
+            busy_seconds = sum(entry[stage] for stage in METRIC_STAGES)
+            entry['retries'] = max(entry['attempts'] - 1, 0)
+            entry['rows_per_sec'] = round(entry['rows'] / busy_seconds, 1) if busy_seconds else None
+            for stage in METRIC_STAGES:
+                totals[stage] += entry[stage]
+                entry[stage] = round(entry[stage], 6)
+            retries += entry['retries']
+            bytes_fetched += entry['bytes_fetched']
+            records.append({'record': 'ticker', 'run': get_run_timestamp(), 'ticker': ticker, **entry})
+
+        duration = summary['duration_seconds']
+        records.append({
+            'record': 'run',
+            'run': get_run_timestamp(),
+            'started_at': datetime.fromtimestamp(self._started).isoformat(timespec='seconds'),
+            **summary,
+            'rows_per_sec': round(summary['rows'] / duration, 1) if duration else None,
+            'retries': retries,
+            'bytes_fetched': bytes_fetched,
+            'stage_seconds': {stage: round(seconds, 6) for stage, seconds in totals.items()},
+            'stage_memory_bytes': dict(_stage_memory),
+            'peak_rss_bytes': get_peak_rss_bytes(),
+        })
+        return records
+
+    def write_report(self, summary):
+        """
+        Ecrit le rapport JSONL dans LOG_DIRECTORY (etl_metrics_<timestamp>.jsonl, meme
+        horodatage que le fichier log) et, si configure, le fichier texte Prometheus.
+        Retourne le chemin du rapport, None si les metriques sont desactivees.
+        """
+        if not self.enabled:
+            return None
+
+        records = self.build_report(summary)
+        log_dir = os.getenv('LOG_DIRECTORY', 'logs')
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        report_path = os.path.join(log_dir, f"etl_metrics_{get_run_timestamp()}.jsonl")
+        with open(report_path, 'w', encoding='utf-8') as report:
+            for record in records:
+                report.write(json.dumps(record, default=str) + '\n')
+
+        if PIPELINE_CONFIG['prometheus_textfile']:
+            write_prometheus_textfile(PIPELINE_CONFIG['prometheus_textfile'], records[-1])
+        return report_path
+
+def write_prometheus_textfile(path, run_record):
+    """
+    Exporte la synthese du run au format texte Prometheus. Ecriture dans un fichier
+    temporaire puis os.replace: le collecteur ne lit jamais un fichier partiel.
+    """
+    lines = [
+        "# HELP etl_run_duration_seconds Duree totale du dernier run ETL.",
+        "# TYPE etl_run_duration_seconds gauge",
+        f"etl_run_duration_seconds {run_record['duration_seconds']}",
+        "# HELP etl_run_timestamp_seconds Fin du dernier run ETL (epoch).",
+        "# TYPE etl_run_timestamp_seconds gauge",
+        f"etl_run_timestamp_seconds {time.time():.0f}",
+        "# HELP etl_tickers Tickers du dernier run par statut.",
+        "# TYPE etl_tickers gauge",
+        f'etl_tickers{{status="success"}} {run_record["success"]}',
+        f'etl_tickers{{status="error"}} {run_record["errors"]}',
+        "# HELP etl_rows_loaded Lignes chargees lors du dernier run.",
+        "# TYPE etl_rows_loaded gauge",
+        f"etl_rows_loaded {run_record['rows']}",
+        "# HELP etl_rows_skipped Lignes inchangees non reecrites lors du dernier run.",
+        "# TYPE etl_rows_skipped gauge",
+        f"etl_rows_skipped {run_record.get('rows_skipped', 0)}",
+        "# HELP etl_rows_quarantined Lignes rejetees par la validation lors du dernier run.",
+        "# TYPE etl_rows_quarantined gauge",
+        f"etl_rows_quarantined {run_record.get('rows_quarantined', 0)}",
+        "# HELP etl_rows_per_second Debit de chargement du dernier run.",
+        "# TYPE etl_rows_per_second gauge",
+        f"etl_rows_per_second {run_record['rows_per_sec'] or 0}",
+        "# HELP etl_retries Tentatives supplementaires d'extraction lors du dernier run.",
+        "# TYPE etl_retries gauge",
+        f"etl_retries {run_record['retries']}",
+        "# HELP etl_bytes_fetched Octets des reponses brutes extraites lors du dernier run.",
+        "# TYPE etl_bytes_fetched gauge",
+        f"etl_bytes_fetched {run_record['bytes_fetched']}",
+        "# HELP etl_stage_seconds Temps cumule par etape lors du dernier run.",
+        "# TYPE etl_stage_seconds gauge",
+    ]
+    lines.extend(f'etl_stage_seconds{{stage="{stage}"}} {seconds}'
+                 for stage, seconds in run_record['stage_seconds'].items())
+
+    target_dir = os.path.dirname(os.path.abspath(path))
+    if not os.path.exists(target_dir):
+        os.makedirs(target_dir)
+    fd, tmp_path = tempfile.mkstemp(prefix='.etl_metrics_', suffix='.prom.tmp', dir=target_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as textfile:
+            textfile.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+METRICS = RunMetrics()
+
+def iter_chunks(extraction, chunk_rows):
+    """
+    Decoupe chaque DataFrame ticker en blocs de chunk_rows lignes (vues iloc, sans copie).
+    Rend (ticker, bloc, dernier_bloc); un ticker vide donne un seul bloc vide.
+    """
+    for ticker, df_ticker in extraction:
+        total_rows = len(df_ticker)
+        if total_rows == 0:
+            yield ticker, df_ticker, True
+            continue
+        for offset in range(0, total_rows, chunk_rows):
+            yield ticker, df_ticker.iloc[offset:offset + chunk_rows], offset + chunk_rows >= total_rows
+
+def process_tickers(tickers, windows, stats, aggregates=True):
+    """
+    Pipeline en flux: extraction (generateur) -> blocs de PIPELINE_CHUNK_ROWS lignes ->
+    chargement dans le thread appelant. Les blocs de plusieurs tickers sont regroupes
+    jusqu'a PIPELINE_COMMIT_ROWS avant d'etre ecrits dans une seule transaction.
+    aggregates=False: agregats multi-tickers laisses a l'appelant (execution multi-processus).
+    """
+    # Tickers deja a jour (mode incremental): rien a extraire
+    tickers_to_fetch = [ticker for ticker in tickers if windows[ticker] is not None]
+    for ticker in tickers:
+        if windows[ticker] is None:
+            record_ticker_success(stats, ticker, 0)
+            METRICS.mark(ticker, 'up_to_date')
+            record_checkpoint(ticker, 'up_to_date')
+            logger.info("[UP-TO-DATE] %s: deja a jour, extraction ignoree", ticker)
+
+    pending = []
+    pending_rows = 0
+    ticker_state = {}
+    validation_state = {}
+    current_ticker = None
+    i = 0
+    extraction = iter_extracted_tickers(tickers_to_fetch, windows)
+
+    for ticker, chunk, is_last in iter_chunks(extraction, PIPELINE_CONFIG['chunk_rows']):
+        if ticker != current_ticker:
+            current_ticker = ticker
+            i += 1
+            sector = TICKER_MAPPING[ticker]['sector']
+            logger.info("-" * 60)
+            logger.info("[PROCESS] [%2d/%d] %s (%s)", i, len(tickers_to_fetch), ticker, sector)
+
+        if chunk.empty:
+            stats['errors'] += 1
+            METRICS.mark(ticker, 'no_data')
+            record_checkpoint(ticker, 'no_data')
+            logger.warning(f"[WARN] {ticker}: Aucune donnee recuperee")
+            continue
+
+        # Bloc vide apres validation: conserve pour finaliser le ticker (rien a ecrire)
+        if PIPELINE_CONFIG['validation_enabled']:
+            with METRICS.timer('transform', ticker):
+                chunk = validate_chunk(ticker, chunk, validation_state, stats)
+
+        pending.append((ticker, chunk, is_last))
+        pending_rows += len(chunk)
+        if pending_rows >= PIPELINE_CONFIG['commit_rows']:
+            flush_pending_loads(pending, stats, ticker_state)
+            pending_rows = 0
+
+    flush_pending_loads(pending, stats, ticker_state)
+
+    # === INDICATEURS INCREMENTAUX (dates ecrites + fenetre de relecture) ===
+    if PIPELINE_CONFIG['analytics_enabled'] and uses_mysql_sink():
+        try:
+            refresh_price_analytics(stats.get('touched', {}))
+        except pymysql.Error as err:
+            logger.error(f"[ANALYTICS] Echec du recalcul des indicateurs: {err}")
+
+    # === AGREGATS SECTEUR / PAYS / CONTINENT (dates ecrites uniquement) ===
+    if aggregates:
+        run_group_aggregates(stats)
+
+def run_group_aggregates(stats):
+    """Recalcul des agregats apres chargement (toutes partitions confondues)"""
+    if PIPELINE_CONFIG['aggregates_enabled'] and uses_mysql_sink():
+        try:
+            refresh_group_aggregates(stats.get('touched', {}))
+        except pymysql.Error as err:
+            logger.error(f"[AGGREGATES] Echec du recalcul des agregats: {err}")
+
+# === POINTS DE REPRISE (SQLITE LOCAL: etl_runs / etl_run_tickers) ===
+# Statuts d'un ticker consideres comme termines (ignores par --resume)
+CHECKPOINT_DONE_STATUSES = ('success', 'up_to_date')
+# Reglages qui determinent les donnees chargees: un run n'est repris qu'avec les memes valeurs
+CHECKPOINT_CONFIG_KEYS = ('load_mode', 'sink', 'schema_mode', 'parquet_path', 'yf_auto_adjust',
+                          'corporate_actions', 'adjust_splits', 'validation_enabled')
+# Run suivi par ce processus (None: points de reprise desactives); transmis aux processus fils
+_checkpoint_run_id = None
+_checkpoint_conn = None
+
+def _checkpoint_connect():
+    """Connexion SQLite du processus au fichier de reprise (partage entre processus, WAL)"""
+    global _checkpoint_conn
+    if _checkpoint_conn is None:
+        checkpoint_path = PIPELINE_CONFIG['checkpoint_path']
+        checkpoint_dir = os.path.dirname(checkpoint_path)
+        if checkpoint_dir and not os.path.exists(checkpoint_dir):
+            os.makedirs(checkpoint_dir)
+        conn = sqlite3.connect(checkpoint_path, timeout=30)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS etl_runs (
+                run_id TEXT PRIMARY KEY, started_at TEXT NOT NULL, finished_at TEXT,
+                status TEXT NOT NULL, tickers INTEGER NOT NULL, fingerprint TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS etl_run_tickers (
+                run_id TEXT NOT NULL, ticker TEXT NOT NULL, status TEXT NOT NULL,
+                rows INTEGER NOT NULL DEFAULT 0, updated_at TEXT,
+                PRIMARY KEY (run_id, ticker)
+            ) WITHOUT ROWID
+        """)
+        conn.commit()
+        _checkpoint_conn = conn
+    return _checkpoint_conn
+
+def close_checkpoint():
+    global _checkpoint_conn
+    if _checkpoint_conn is not None:
+        _checkpoint_conn.close()
+        _checkpoint_conn = None
+
+def run_fingerprint(tickers):
+    """Empreinte de l'univers, de la base cible et des reglages de chargement d'un run"""
+    content = {
+        'tickers': sorted(tickers),
+        'database': [MYSQL_CONFIG.get('host'), MYSQL_CONFIG.get('port'), MYSQL_CONFIG.get('database')],
+        'config': {key: PIPELINE_CONFIG.get(key) for key in CHECKPOINT_CONFIG_KEYS},
+    }
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def checkpoint_done_tickers(run_id):
+    """Tickers du run ayant un statut termine (CHECKPOINT_DONE_STATUSES)"""
+    conn = _checkpoint_connect()
+    return {ticker for (ticker,) in conn.execute(
+        f"SELECT ticker FROM etl_run_tickers WHERE run_id = ? "
+        f"AND status IN ({', '.join('?' * len(CHECKPOINT_DONE_STATUSES))})",
+        (run_id, *CHECKPOINT_DONE_STATUSES)
+    )}
+
+def start_checkpoint_run(tickers, resume=False):
+    """
+    Ouvre le suivi d'un run et retourne les tickers a traiter. Avec resume=True,
+    reprend le run le plus recent lance avec le meme univers et les memes reglages
+    (le fichier de reprise est partage par d'autres lancements), s'il n'est pas termine:
+    seuls ses tickers non finis (en attente, en erreur ou sans donnees) sont retournes,
+    dans l'ordre de l'univers courant.
+    """
+    global _checkpoint_run_id
+    conn = _checkpoint_connect()
+    now = datetime.now().isoformat(timespec='seconds')
+    fingerprint = run_fingerprint(tickers)
+
+    previous = None
+    if resume:
+        # Uniquement le dernier run de meme empreinte: un run plus ancien reste abandonne
+        previous = conn.execute(
+            "SELECT run_id, status FROM etl_runs WHERE fingerprint = ? "
+            "ORDER BY started_at DESC, rowid DESC LIMIT 1", (fingerprint,)
+        ).fetchone()
+        if previous is None or previous[1] == 'completed':
+            logger.info("[RESUME] Aucun run interrompu avec cet univers et ces reglages, "
+                        "demarrage d'un nouveau run")
+            previous = None
+
+    if previous is not None:
+        run_id = previous[0]
+        done = checkpoint_done_tickers(run_id)
+        remaining = [ticker for ticker in tickers if ticker not in done]
+        conn.execute("UPDATE etl_runs SET status = 'running', finished_at = NULL WHERE run_id = ?", (run_id,))
+        logger.info(f"[RESUME] Reprise du run {run_id}: {len(done)} tickers deja termines, "
+                    f"{len(remaining)} a traiter")
+    else:
+        run_id = f"{get_run_timestamp()}_{uuid.uuid4().hex[:6]}"
+        remaining = list(tickers)
+        conn.execute("INSERT INTO etl_runs (run_id, started_at, status, tickers, fingerprint) "
+                     "VALUES (?, ?, 'running', ?, ?)", (run_id, now, len(tickers), fingerprint))
+        logger.info(f"[CHECKPOINT] Run {run_id} suivi dans {PIPELINE_CONFIG['checkpoint_path']}")
+
+    conn.executemany(
+        "INSERT OR IGNORE INTO etl_run_tickers (run_id, ticker, status) VALUES (?, ?, 'pending')",
+        [(run_id, ticker) for ticker in remaining]
+    )
+    conn.commit()
+    _checkpoint_run_id = run_id
+    return remaining
+
+def record_checkpoint(ticker, status, rows=0):
+    """Statut final d'un ticker, committe immediatement (survit a un arret brutal)"""
+    if _checkpoint_run_id is None:
+        return
+    conn = _checkpoint_connect()
+    conn.execute(
+        "INSERT OR REPLACE INTO etl_run_tickers (run_id, ticker, status, rows, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (_checkpoint_run_id, ticker, status, rows, datetime.now().isoformat(timespec='seconds'))
+    )
+    conn.commit()
+
+def finish_checkpoint_run():
+    """Clot le run: 'completed' si tous les tickers sont termines, 'incomplete' sinon (--resume)"""
+    global _checkpoint_run_id
+    if _checkpoint_run_id is None:
+        return None
+    conn = _checkpoint_connect()
+    unfinished = conn.execute(
+        f"SELECT COUNT(*) FROM etl_run_tickers WHERE run_id = ? "
+        f"AND status NOT IN ({', '.join('?' * len(CHECKPOINT_DONE_STATUSES))})",
+        (_checkpoint_run_id, *CHECKPOINT_DONE_STATUSES)
+    ).fetchone()[0]
+    status = 'completed' if unfinished == 0 else 'incomplete'
+    conn.execute("UPDATE etl_runs SET status = ?, finished_at = ? WHERE run_id = ?",
+                 (status, datetime.now().isoformat(timespec='seconds'), _checkpoint_run_id))
+    conn.commit()
+    if unfinished:
+        logger.warning(f"[CHECKPOINT] {unfinished} tickers non termines: relancer avec --resume")
+    _checkpoint_run_id = None
+    close_checkpoint()
+    return status
+
+# === EXECUTION MULTI-PROCESSUS (UNE PARTITION ET UNE CONNEXION PAR PROCESSUS) ===
+def _init_worker(pipeline_config, mysql_config, universe, run_timestamp, checkpoint_run_id,
+                 schema_ready=False, ticker_ids=None):
+    """
+    Initialisation d'un processus fils (spawn): configuration et univers du parent, meme fichier log.
+    Schema deja cree par le parent: le DDL n'est pas rejoue, le cache des ticker_id est repris.
+    """
+    global _run_timestamp, _checkpoint_run_id, _schema_ready
+    PIPELINE_CONFIG.update(pipeline_config)
+    MYSQL_CONFIG.update(mysql_config)
+    TICKER_MAPPING.clear()
+    TICKER_MAPPING.update(universe)
+    TICKERS[:] = list(universe)
+    _run_timestamp = run_timestamp
+    _checkpoint_run_id = checkpoint_run_id
+    _schema_ready = schema_ready
+    _ticker_ids.update(ticker_ids or {})
+    setup_logging()
+    METRICS.reset(pipeline_config['metrics_enabled'])
+
+def run_worker_shard(tickers, windows):
+    """Processus fils: extraction, transformation et chargement d'une partition"""
+    stats = {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+    _stage_memory.clear()
+    try:
+        process_tickers(tickers, windows, stats, aggregates=False)
+    finally:
+        close_db_connection()
+        close_checkpoint()
+        flush_logging()
+    return stats, METRICS.snapshot(), dict(_stage_memory)
+
+def merge_shard_stats(stats, shard_stats):
+    """Cumule les compteurs d'une partition dans ceux du run"""
+    for key in ('success', 'errors', 'rows', 'skipped', 'quarantined', 'flagged'):
+        if key in shard_stats:
+            stats[key] = stats.get(key, 0) + shard_stats[key]
+    for sector, sector_stats in shard_stats['sectors'].items():
+        totals = stats['sectors'].setdefault(sector, {'success': 0, 'rows': 0})
+        totals['success'] += sector_stats['success']
+        totals['rows'] += sector_stats['rows']
+    stats.setdefault('touched', {}).update(shard_stats.get('touched', {}))
+
+def merge_shard_memory(stage_memory):
+    """Volumes par etape d'une partition: le plus gros bloc d'un processus est retenu"""
+    for stage, nbytes in stage_memory.items():
+        record_stage_memory(stage, nbytes)
+
+def run_sharded(tickers, windows, workers, stats):
+    """
+    Repartit les tickers (tour a tour: partitions equilibrees, priorite conservee) entre
+    un pool de processus; chaque processus ouvre sa propre connexion MySQL et enregistre
+    ses points de reprise. Les agregats multi-tickers sont recalcules une fois, a la fin.
+    """
+    shards = [tickers[index::workers] for index in range(workers)]
+    shards = [shard for shard in shards if shard]
+    logger.info(f"[PIPELINE] Execution multi-processus: {len(shards)} processus, "
+                f"{', '.join(str(len(shard)) for shard in shards)} tickers")
+
+    # Import a la demande: multiprocessing alourdirait l'import du module
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    # Schema cree une seule fois, ici: les processus fils ne rejouent pas le DDL
+    if uses_mysql_sink():
+        ensure_schema()
+
+    # spawn: processus neufs (pas d'heritage de connexions ni de threads du parent)
+    context = multiprocessing.get_context('spawn')
+    initargs = (dict(PIPELINE_CONFIG), dict(MYSQL_CONFIG), dict(TICKER_MAPPING),
+                get_run_timestamp(), _checkpoint_run_id, _schema_ready, dict(_ticker_ids))
+    with ProcessPoolExecutor(max_workers=len(shards), mp_context=context,
+                             initializer=_init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(run_worker_shard, shard, {ticker: windows[ticker] for ticker in shard}): shard
+                   for shard in shards}
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                shard_stats, shard_metrics, shard_memory = future.result()
+            except Exception as err:
+                # Processus mort (BrokenProcessPool...): seuls les tickers sans statut termine
+                # dans le fichier de reprise sont en erreur (repris par --resume)
+                done = checkpoint_done_tickers(_checkpoint_run_id) if _checkpoint_run_id is not None else set()
+                failed = sum(1 for ticker in shard if ticker not in done)
+                logger.error(f"[PIPELINE] Echec d'une partition de {len(shard)} tickers "
+                             f"({failed} non termines): {err}")
+                stats['success'] += len(shard) - failed
+                stats['errors'] += failed
+                continue
+            merge_shard_stats(stats, shard_stats)
+            METRICS.merge(shard_metrics)
+            merge_shard_memory(shard_memory)
+
+    run_group_aggregates(stats)
+
+# === BARRES INTRADAY (TABLES intraday_prices_<intervalle>, PARTITIONS JOURNALIERES) ===
+# Duree d'une barre par intervalle yfinance, en minutes
+INTRADAY_INTERVALS = {'1m': 1, '5m': 5, '15m': 15, '1h': 60}
+# Profondeur maximale servie par Yahoo par intervalle (premier chargement d'un ticker)
+INTRADAY_MAX_LOOKBACK_DAYS = {'1m': 7, '5m': 59, '15m': 59, '1h': 729}
+# Partitions journalieres creees a l'avance (p_future ne recoit rien en regime normal)
+INTRADAY_PARTITION_DAYS_AHEAD = 3
+INTRADAY_COLUMNS = ['ticker', 'ts', 'open', 'high', 'low', 'close', 'volume']
+
+# Cle (ticker, ts): barres d'un ticker contigues; ts en UTC. Partitionnement par jour:
+# la retention supprime des partitions entieres au lieu d'un DELETE ligne a ligne
+INTRADAY_DDL_TEMPLATE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        ticker VARCHAR(20) NOT NULL,
+        ts DATETIME NOT NULL,
+        open DOUBLE NOT NULL,
+        high DOUBLE NOT NULL,
+        low DOUBLE NOT NULL,
+        close DOUBLE NOT NULL,
+        volume BIGINT NOT NULL,
+        PRIMARY KEY (ticker, ts)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    PARTITION BY RANGE (TO_DAYS(ts)) ({partitions})
+"""
+
+# Derniere barre chargee par (ticker, intervalle): reprise incrementale sans parcourir les faits
+INTRADAY_WATERMARKS_DDL = """
+    CREATE TABLE IF NOT EXISTS intraday_watermarks (
+        ticker VARCHAR(20) NOT NULL,
+        bar_interval VARCHAR(4) NOT NULL,
+        last_ts DATETIME NOT NULL,
+        last_updated DATETIME NOT NULL,
+        PRIMARY KEY (ticker, bar_interval)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+def intraday_table(interval):
+    if interval not in INTRADAY_INTERVALS:
+        raise ValueError(f"Intervalle intraday inconnu: {interval} (valeurs: {', '.join(INTRADAY_INTERVALS)})")
+    return f"intraday_prices_{interval}"
+
+def intraday_retention_cutoff(now):
+    """Premier jour conserve (UTC): les partitions anterieures sont supprimees"""
+    return (now - pd.Timedelta(days=PIPELINE_CONFIG['intraday_retention_days'])).normalize()
+
+def day_partitions_sql(days):
+    return ', '.join(f"PARTITION p{day:%Y%m%d} VALUES LESS THAN (TO_DAYS('{day + pd.Timedelta(days=1):%Y-%m-%d}'))"
+                     for day in days)
+
+def ensure_intraday_table(cursor, interval, now):
+    """
+    Cree la table de l'intervalle si besoin, ajoute les partitions journalieres jusqu'a
+    INTRADAY_PARTITION_DAYS_AHEAD jours (scission de p_future) et supprime celles sorties
+    de la retention (DROP PARTITION: pas de DELETE, pas de purge ligne a ligne)
+    """
+    table = intraday_table(interval)
+    cutoff = intraday_retention_cutoff(now)
+    last_day = now.normalize() + pd.Timedelta(days=INTRADAY_PARTITION_DAYS_AHEAD)
+    # La premiere partition recoit aussi tout ce qui precede son jour
+    cursor.execute(INTRADAY_DDL_TEMPLATE.format(
+        table=table,
+        partitions=f"{day_partitions_sql(pd.date_range(cutoff, last_day))}, "
+                   f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE"
+    ))
+
+    cursor.execute(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL",
+        (table,)
+    )
+    days = sorted(pd.Timestamp(name[1:]) for (name,) in cursor.fetchall() if name[1:].isdigit())
+    if days and days[-1] < last_day:
+        missing = pd.date_range(days[-1] + pd.Timedelta(days=1), last_day)
+        cursor.execute(
+            f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO "
+            f"({day_partitions_sql(missing)}, PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE)"
+        )
+        logger.info(f"[INTRADAY] {table}: {len(missing)} partitions journalieres ajoutees")
+
+    # Au moins une partition journaliere est conservee (DROP de toutes les partitions refuse)
+    expired = [day for day in days if day < cutoff][:max(len(days) - 1, 0)]
+    if expired:
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(f'p{day:%Y%m%d}' for day in expired)}")
+        logger.info(f"[INTRADAY] {table}: {len(expired)} partitions expirees supprimees "
+                    f"(retention {PIPELINE_CONFIG['intraday_retention_days']} jours)")
+
+def load_intraday_watermarks(cursor, interval):
+    """Derniere barre chargee par ticker pour l'intervalle (ticker -> Timestamp UTC)"""
+    cursor.execute("SELECT ticker, last_ts FROM intraday_watermarks WHERE bar_interval = %s", (interval,))
+    return {ticker: pd.Timestamp(last_ts) for ticker, last_ts in cursor.fetchall()}
+
+def get_intraday_starts(tickers, interval, watermarks, now):
+    """
+    Debut d'extraction par ticker: barre suivant le watermark, bornee par la profondeur
+    servie par Yahoo et par la retention. Un ticker dont la barre suivante n'est pas
+    encore close recoit None (deja a jour).
+    """
+    step = pd.Timedelta(minutes=INTRADAY_INTERVALS[interval])
+    floor = max(now - pd.Timedelta(days=INTRADAY_MAX_LOOKBACK_DAYS[interval]), intraday_retention_cutoff(now))
+    starts = {}
+    for ticker in tickers:
+        watermark = watermarks.get(ticker)
+        start = floor if watermark is None else max(watermark + step, floor)
+        starts[ticker] = start if start + step <= now else None
+    return starts
+
+def fetch_intraday_bars(ticker, interval, start):
+    """Barres brutes yfinance depuis start (UTC); None apres max_retries echecs"""
+    max_retries = PIPELINE_CONFIG['max_retries']
+    for attempt in range(max_retries):
+        try:
+            METRICS.incr(ticker, 'attempts')
+            with METRICS.timer('fetch', ticker):
+                return yf.Ticker(ticker).history(start=start.tz_localize('UTC').to_pydatetime(), interval=interval)
+        except Exception as e:
+            logger.error(f"{ticker}: [INTRADAY] Erreur tentative {attempt + 1} ({interval}): {e}")
+            if attempt < max_retries - 1:
+                time.sleep(compute_backoff(attempt))
+    return None
+
+def transform_intraday_bars(data, ticker, interval, start, now):
+    """
+    DataFrame brut yfinance -> colonnes INTRADAY_COLUMNS, horodatage UTC sans fuseau.
+    Seules les barres closes sont gardees: l'ecriture est en ajout seul (INSERT IGNORE),
+    une barre en cours de formation ne serait jamais corrigee. Les barres sans prix
+    exploitable (NaN, <= 0) sont ecartees.
+    """
+    ts = pd.DatetimeIndex(data.index)
+    ts = ts.tz_convert('UTC').tz_localize(None) if ts.tz is not None else ts
+    step = pd.Timedelta(minutes=INTRADAY_INTERVALS[interval])
+    columns = {'ticker': ticker, 'ts': ts}
+    keep = (ts >= start) & (ts + step <= now)
+    for col in ('open', 'high', 'low', 'close'):
+        values = data[col.capitalize()].to_numpy(dtype='float64', na_value=np.nan)
+        keep &= values > 0
+        columns[col] = values
+    columns['volume'] = data['Volume'].to_numpy(dtype='float64', na_value=0).astype('int64')
+    bars = pd.DataFrame(columns, columns=INTRADAY_COLUMNS)
+    return bars[keep]
+
+def save_intraday_bars(interval, bars):
+    """
+    Ecriture en ajout seul d'un lot de barres (plusieurs tickers): INSERT IGNORE (une barre
+    close ne change plus, les doublons du recouvrement sont ignores sans lecture prealable)
+    et avancement des watermarks dans la meme transaction. Retourne les lignes inserees.
+    """
+    params = list(zip(
+        bars['ticker'].tolist(),
+        np.datetime_as_string(bars['ts'].to_numpy(dtype='datetime64[s]'), unit='s').tolist(),
+        *(bars[col].tolist() for col in INTRADAY_COLUMNS[2:])
+    ))
+    last_ts = bars.groupby('ticker', sort=False)['ts'].max()
+    updated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    watermarks = [(ticker, interval, f"{ts:%Y-%m-%d %H:%M:%S}", updated) for ticker, ts in last_ts.items()]
+
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            with METRICS.timer('db_write', bars):
+                cursor.executemany(
+                    f"INSERT IGNORE INTO {intraday_table(interval)} ({', '.join(INTRADAY_COLUMNS)}) "
+                    f"VALUES ({', '.join(['%s'] * len(INTRADAY_COLUMNS))})",
+                    params
+                )
+                inserted = cursor.rowcount
+                cursor.executemany(
+                    "INSERT INTO intraday_watermarks (ticker, bar_interval, last_ts, last_updated) "
+                    "VALUES (%s, %s, %s, %s) "
+                    "ON DUPLICATE KEY UPDATE last_ts = GREATEST(last_ts, VALUES(last_ts)), "
+                    "last_updated = VALUES(last_updated)",
+                    watermarks
+                )
+                conn.commit()
+    return inserted
+
+def ingest_intraday_interval(tickers, interval, stats):
+    """
+    Chargement incremental d'un intervalle: extraction concurrente des barres posterieures
+    au watermark de chaque ticker, puis lots de PIPELINE_INTRADAY_BATCH_ROWS barres
+    (plusieurs tickers par INSERT IGNORE / commit). Les tickers charges, en echec ou a jour
+    sont cumules dans les ensembles stats['loaded'] / stats['failed'] / stats['up_to_date']
+    (comptes une fois par run)
+    """
+    now = pd.Timestamp.now(tz='UTC').tz_localize(None)
+    with db_session() as conn:
+        with conn.cursor() as cursor:
+            ensure_intraday_table(cursor, interval, now)
+            watermarks = load_intraday_watermarks(cursor, interval)
+        conn.commit()
+
+    starts = get_intraday_starts(tickers, interval, watermarks, now)
+    to_fetch = [ticker for ticker in tickers if starts[ticker] is not None]
+    stats['up_to_date'].update(ticker for ticker in tickers if starts[ticker] is None)
+    logger.info(f"[INTRADAY] {interval}: {len(to_fetch)} tickers a extraire, "
+                f"{len(tickers) - len(to_fetch)} deja a jour")
+
+    pending, pending_rows = [], 0
+
+    def flush():
+        nonlocal pending_rows
+        if not pending:
+            return
+        batch = pd.concat(pending, ignore_index=True)
+        pending.clear()
+        pending_rows = 0
+        try:
+            stats['rows'] += save_intraday_bars(interval, batch)
+            stats['loaded'].update(batch['ticker'].unique())
+        except pymysql.Error as err:
+            stats['failed'].update(batch['ticker'].unique())
+            logger.error(f"[INTRADAY] {interval}: echec d'ecriture du lot ({len(batch)} barres): {err}")
+
+    max_workers = max(1, PIPELINE_CONFIG['max_workers'])
+    # Extraction par groupes de 2 x max_workers tickers: memoire bornee au premier chargement
+    group_size = max_workers * 2
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='intraday') as executor:
+        for offset in range(0, len(to_fetch), group_size):
+            group = to_fetch[offset:offset + group_size]
+            fetched = executor.map(lambda ticker: fetch_intraday_bars(ticker, interval, starts[ticker]), group)
+            for ticker, data in zip(group, fetched):
+                if data is None:
+                    stats['failed'].add(ticker)
+                    continue
+                bars = transform_intraday_bars(data, ticker, interval, starts[ticker], now) if not data.empty else data
+                if bars.empty:
+                    stats['up_to_date'].add(ticker)
+                    continue
+                pending.append(bars)
+                pending_rows += len(bars)
+                if pending_rows >= PIPELINE_CONFIG['intraday_batch_rows']:
+                    flush()
+    flush()
+
+def run_intraday(intervals=None):
+    """
+    Point d'entree --intraday: chargement incremental des barres intraday de TICKERS
+    pour chaque intervalle (defaut PIPELINE_INTRADAY_INTERVALS), MySQL uniquement.
+    Retourne les statistiques du run, None si la configuration est invalide.
+    """
+    intervals = intervals or PIPELINE_CONFIG['intraday_intervals']
+    unknown = [interval for interval in intervals if interval not in INTRADAY_INTERVALS]
+    if unknown:
+        logger.error(f"[INTRADAY] Intervalles inconnus: {unknown} (valeurs: {', '.join(INTRADAY_INTERVALS)})")
+        return None
+    if not uses_mysql_sink():
+        logger.error("[INTRADAY] Le mode intraday ecrit uniquement dans MySQL (PIPELINE_SINK=mysql ou both)")
+        return None
+
+    started = time.perf_counter()
+    stats = {'success': 0, 'errors': 0, 'rows': 0, 'up_to_date': set(), 'loaded': set(), 'failed': set()}
+    try:
+        with db_session() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(INTRADAY_WATERMARKS_DDL)
+            conn.commit()
+        for interval in intervals:
+            ingest_intraday_interval(TICKERS, interval, stats)
+    except pymysql.Error as err:
+        logger.error(f"[INTRADAY] Erreur MySQL: {err}")
+        stats['errors'] += 1
+    finally:
+        close_db_connection()
+
+    # Un ticker compte une fois, quel que soit le nombre de lots et d'intervalles qui le contiennent
+    # (en erreur des qu'un de ses lots ou intervalles a echoue, a jour si rien n'a ete charge)
+    failed = stats.pop('failed')
+    loaded = stats.pop('loaded') - failed
+    stats['success'] += len(loaded)
+    stats['errors'] += len(failed)
+    stats['up_to_date'] = len(stats['up_to_date'] - loaded - failed)
+
+    logger.info(f"[INTRADAY] Termine en {time.perf_counter() - started:.1f}s - {stats['rows']:,} barres inserees, "
+                f"{stats['success']} tickers charges, {stats['up_to_date']} a jour, {stats['errors']} erreurs")
+    return stats
+
+# === POINT D'ENTREE: CONFIGURATION ET LOGGING ===
+def init_pipeline():
+    """
+    Initialisation explicite (aucun effet de bord a l'import): charge le .env,
+    recharge MYSQL_CONFIG / PIPELINE_CONFIG et configure le logging.
+    Retourne False si la configuration MySQL est incomplete (sink mysql ou both).
+    """
+    from dotenv import load_dotenv
+
+    # === CHARGEMENT DES VARIABLES D'ENVIRONNEMENT ===
+    load_dotenv()
+    PIPELINE_CONFIG.update(build_pipeline_config())
+
+    # Vérification que le fichier .env est bien chargé
+    if uses_mysql_sink() and not os.getenv('DB_HOST'):
+        print("ERREUR: Fichier .env non trouvé ou mal configuré!")
+        print("Créez un fichier .env avec les variables de configuration.")
+        return False
+
+    print("[DOTENV] Variables d'environnement chargées avec succès")
+    setup_logging()
+
+    MYSQL_CONFIG.update(build_mysql_config())
+
+    # Validation de la configuration MySQL
+    required_db_vars = ['DB_HOST', 'DB_USER', 'DB_PASSWORD', 'DB_DATABASE']
+    missing_vars = [var for var in required_db_vars if not os.getenv(var)]
+    if missing_vars and uses_mysql_sink():
+        logger.error(f"[CONFIG] Variables manquantes dans .env: {missing_vars}")
+        return False
+
+    if uses_mysql_sink():
+        logger.info(f"[CONFIG] Configuration MySQL chargée - Host: {MYSQL_CONFIG['host']}")
+    if uses_parquet_sink():
+        logger.info(f"[CONFIG] Lac Parquet: {PIPELINE_CONFIG['parquet_path']} "
+                    f"(compression {PIPELINE_CONFIG['parquet_compression']})")
+    logger.info(f"[CONFIG] Configuration pipeline chargée - Max retries: {PIPELINE_CONFIG['max_retries']}")
+    logger.info(f"[CONFIG] Extraction concurrente: {PIPELINE_CONFIG['max_workers'] > 1} "
+                f"(max workers: {PIPELINE_CONFIG['max_workers']})")
+    logger.info(f"[CONFIG] Mode de chargement: {PIPELINE_CONFIG['load_mode']} "
+                f"(chargeur: {PIPELINE_CONFIG['db_loader']})")
+    if uses_mysql_sink():
+        logger.info(f"[CONFIG] Schema MySQL: {PIPELINE_CONFIG['schema_mode']} "
+                    f"(partitionnement annuel: {PIPELINE_CONFIG['partition_by_year']})")
+    if PIPELINE_CONFIG['corporate_actions']:
+        logger.info(f"[CONFIG] Actions sur titres: telechargement non ajuste, facteurs cumules "
+                    f"(divisions ajustees: {PIPELINE_CONFIG['adjust_splits']})")
+
+    # === UNIVERS DE TICKERS (source, filtres, partition) ===
+    try:
+        apply_ticker_universe()
+    except (OSError, ValueError, ImportError, pymysql.Error) as err:
+        logger.error(f"[UNIVERSE] Chargement de l'univers impossible: {err}")
+        return False
+    logger.info(f"[UNIVERSE] Source: {PIPELINE_CONFIG['universe_source'] or 'TICKER_MAPPING integre'} - "
+                f"partition {PIPELINE_CONFIG['shard_index']}/{PIPELINE_CONFIG['shard_count']}")
+
+    # Validation du mapping
+    print(f"[INIT] Pipeline configure pour {len(TICKER_MAPPING)} tickers")
+    if not TICKERS:
+        logger.error("[UNIVERSE] Univers vide apres filtres et partition")
+        return False
+    preview = ', '.join(TICKERS[:10]) + (f" ... (+{len(TICKERS) - 10})" if len(TICKERS) > 10 else '')
+    logger.info(f"[INIT] Tickers selectionnes: {preview}")
+    return True
+
+def main(resume=False, workers=None):
+    """
+    Pipeline ETL principal (init_pipeline() doit avoir ete appele).
+    resume: ne traite que les tickers non termines du dernier run interrompu.
+    workers: processus de chargement (defaut PIPELINE_PROCESSES).
+    """
+    
+    
+    logger.info("[MAIN] Démarrage du pipeline ETL")
+    
+    start_time = datetime.now()
+    logger.info("=" * 80)
+    logger.info("[PIPELINE] DÉBUT - CONFIGURATION DOTENV")
+    logger.info("=" * 80)
+
+    if uses_mysql_sink() and not test_dotenv_configuration():
+        logger.error("[INIT] Échec des tests dotenv, arrêt du script")
+        close_db_connection()
+        exit(1)
+    
+    # === DÉMARRAGE DU PIPELINE ===
+    start_time = datetime.now()
+    logger.info("=" * 80)
+    logger.info("[PIPELINE] DÉBUT - TOUS LES TESTS RÉUSSIS")
+    logger.info("=" * 80)
+    # ... reste de ton code existant ...
+
+    
+    try:
+        # === INITIALISATION ===
+        start_date, end_date = get_rolling_year_dates()
+        logger.info(f"[PIPELINE] Periode d'extraction: {start_date} au {end_date}")
+        
+        # Statistiques par secteur
+        sectors = {}
+        for ticker, info in TICKER_MAPPING.items():
+            sector = info['sector']
+            if sector not in sectors:
+                sectors[sector] = []
+            sectors[sector].append(ticker)
+        
+        logger.info("[PIPELINE] Repartition par secteur:")
+        for sector, tickers_list in sectors.items():
+            logger.info(f"  [SECTOR] {sector}: {len(tickers_list)} tickers")
+        
+        # === TRAITEMENT DES DONNEES ===
+        _stage_memory.clear()
+        METRICS.reset(PIPELINE_CONFIG['metrics_enabled'])
+        if uses_mysql_sink():
+            ensure_schema()
+        tickers = TICKERS
+        if PIPELINE_CONFIG['checkpoint_enabled']:
+            tickers = start_checkpoint_run(TICKERS, resume=resume)
+        elif resume:
+            logger.warning("[RESUME] Points de reprise desactives (PIPELINE_CHECKPOINT=False), run complet")
+        if not tickers:
+            logger.info("[RESUME] Tous les tickers du run sont deja termines")
+            finish_checkpoint_run()
+            return
+
+        # Totaux par secteur sur les tickers de ce run (sous-ensemble repris avec --resume)
+        sector_totals = {}
+        for ticker in tickers:
+            sector = TICKER_MAPPING[ticker]['sector']
+            sector_totals[sector] = sector_totals.get(sector, 0) + 1
+
+        windows = get_extraction_windows(tickers)
+        stats = {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+        workers = min(workers or PIPELINE_CONFIG['processes'], len(tickers))
+        if workers > 1:
+            run_sharded(tickers, windows, workers, stats)
+        else:
+            process_tickers(tickers, windows, stats)
+        finish_checkpoint_run()
+        success_count = stats['success']
+        error_count = stats['errors']
+        total_rows_inserted = stats['rows']
+        skipped_rows = stats.get('skipped', 0)
+        quarantined_rows = stats.get('quarantined', 0)
+        sector_stats = stats['sectors']
 
         # === RESUME FINAL DETAILLE ===
         end_time = datetime.now()
@@ -578,29 +4320,55 @@ def main():
         logger.info("[PIPELINE] RESUME FINAL")
         logger.info("=" * 80)
         logger.info(f"[TIME] Duree totale: {duration}")
-        logger.info(f"[SUCCESS] Succes: {success_count}/{len(TICKERS)}")
-        logger.info(f"[ERROR] Erreurs: {error_count}/{len(TICKERS)}")
+        logger.info(f"[SUCCESS] Succes: {success_count}/{len(tickers)}")
+        logger.info(f"[ERROR] Erreurs: {error_count}/{len(tickers)}")
         logger.info(f"[ROWS] Total lignes inserees: {total_rows_inserted:,}")
+        if PIPELINE_CONFIG['change_detection'] and uses_mysql_sink():
+            logger.info(f"[ROWS] Lignes inchangees ignorees: {skipped_rows:,}")
+        if PIPELINE_CONFIG['validation_enabled']:
+            logger.info(f"[ROWS] Lignes en quarantaine: {quarantined_rows:,} rejetees, "
+                        f"{stats.get('flagged', 0):,} signalees (trous de calendrier)")
         
-        if len(TICKERS) > 0:
-            success_rate = (success_count / len(TICKERS)) * 100
+        if len(tickers) > 0:
+            success_rate = (success_count / len(tickers)) * 100
             logger.info(f"[RATE] Taux de succes: {success_rate:.1f}%")
         
         logger.info("")
         logger.info("[SECTORS] Detail par secteur:")
         for sector, stats in sector_stats.items():
-            total_sector = len(sectors[sector])
+            total_sector = sector_totals.get(sector, 0)
             sector_success_rate = (stats['success'] / total_sector * 100) if total_sector > 0 else 0
             logger.info(f"  [SECTOR] {sector}: {stats['success']}/{total_sector} "
                        f"({sector_success_rate:.1f}%) - {stats['rows']:,} lignes")
-        
+
+        logger.info("")
+        logger.info("[MEMORY] Pic memoire par etape:")
+        for stage in ('extract', 'transform', 'load'):
+            logger.info(f"  [MEMORY] {stage}: {_stage_memory.get(stage, 0) / 1024 / 1024:.2f} Mo")
+        peak_rss = get_peak_rss_bytes()
+        if peak_rss is not None:
+            logger.info(f"  [MEMORY] Pic RSS processus: {peak_rss / 1024 / 1024:.1f} Mo")
+
+        # === RAPPORT DE METRIQUES (si active) ===
+        report_path = METRICS.write_report({
+            'duration_seconds': round(duration.total_seconds(), 3),
+            'tickers': len(tickers),
+            'success': success_count,
+            'errors': error_count,
+            'rows': total_rows_inserted,
+            'rows_skipped': skipped_rows,
+            'rows_quarantined': quarantined_rows,
+        })
+        if report_path:
+            logger.info(f"[METRICS] Rapport de run: {report_path}")
+
         # Affichage console final
         print(f"\n{'='*80}")
         print(f"[COMPLETE] PIPELINE ETL MULTI-INDEX TERMINE")
         print(f"{'='*80}")
         print(f"[TIME] Duree: {duration}")
-        print(f"[SUCCESS] Succes: {success_count}/{len(TICKERS)} ({(success_count/len(TICKERS)*100):.1f}%)")
-        print(f"[ROWS] Total lignes: {total_rows_inserted:,}")
+        print(f"[SUCCESS] Succes: {success_count}/{len(tickers)} ({(success_count/len(tickers)*100):.1f}%)")
+        print(f"[ROWS] Total lignes: {total_rows_inserted:,} ({skipped_rows:,} inchangees ignorees)")
         print(f"[READY] Base de donnees prete pour Power BI!")
         print(f"[TABLE] Table: historical_prices")
 
@@ -608,9 +4376,51 @@ def main():
         logger.exception("[CRITICAL] Erreur critique dans le pipeline ETL")
         traceback.print_exc()
     finally:
+        close_db_connection()
+        close_checkpoint()
         logger.info("[PIPELINE] FIN DU PIPELINE ETL MULTI-INDEX")
 
+def run_schema_migration():
+    """Point d'entree --migrate-schema: migration vers le schema normalise puis arret"""
+    logger.info("[MIGRATION] Migration historical_prices -> tickers + daily_prices")
+    try:
+        return migrate_to_normalized_schema()
+    except pymysql.Error as err:
+        logger.error(f"[MIGRATION] Erreur MySQL: {err}")
+        return False
+    finally:
+        close_db_connection()
+
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pipeline ETL multi-index yfinance -> MySQL")
+    parser.add_argument('--migrate-schema', action='store_true',
+                        help="Migre historical_prices vers le schema normalise (tickers + daily_prices "
+                             "+ vue de compatibilite) puis s'arrete")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprend le dernier run interrompu (tickers non termines uniquement)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Processus de chargement en parallele (defaut: PIPELINE_PROCESSES)")
+    parser.add_argument('--intraday', nargs='*', metavar='INTERVALLE',
+                        help="Charge les barres intraday (1m, 5m, 15m, 1h; defaut: PIPELINE_INTRADAY_INTERVALS) "
+                             "au lieu des cours journaliers puis s'arrete")
+    parser.add_argument('--backfill-memmap', action='store_true',
+                        help="Remplit le store memmap (PIPELINE_MEMMAP_PATH) depuis historical_prices "
+                             "puis s'arrete")
+    args = parser.parse_args()
+
     print("[START] Démarrage du pipeline ETL avec tests de configuration")
-    main()
+    if not init_pipeline():
+        exit(1)
+    if args.migrate_schema:
+        exit(0 if run_schema_migration() else 1)
+    if args.backfill_memmap:
+        backfilled_rows = backfill_memmap_store()
+        close_db_connection()
+        exit(0 if backfilled_rows is not None else 1)
+    if args.intraday is not None:
+        intraday_stats = run_intraday(args.intraday)
+        exit(0 if intraday_stats is not None and not intraday_stats['errors'] else 1)
+    main(resume=args.resume, workers=args.workers)
     print("[END] Pipeline ETL terminé!")
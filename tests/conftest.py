@@ -0,0 +1,35 @@
+"""
+Configuration pytest: rend etl_stocks et benchmarks importables depuis la racine du depot,
+fournit une configuration pipeline isolee par test et une base SQLite de substitution.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import etl_stocks  # noqa: E402
+from sqlite_db import SQLiteConnection  # noqa: E402
+
+
+@pytest.fixture
+def pipeline_config(monkeypatch):
+    """Copie de PIPELINE_CONFIG modifiable par le test, restauree ensuite"""
+    config = dict(etl_stocks.PIPELINE_CONFIG)
+    monkeypatch.setattr(etl_stocks, 'PIPELINE_CONFIG', config)
+    return config
+
+
+@pytest.fixture
+def sqlite_db(pipeline_config, monkeypatch, tmp_path):
+    """Base SQLite sur disque a la place de la connexion MySQL persistante, schema cree"""
+    pipeline_config.update(db_loader='executemany', schema_mode='wide', sink='mysql')
+    db = SQLiteConnection(str(tmp_path / 'etl.sqlite'))
+    monkeypatch.setattr(etl_stocks, '_db_connection', db)
+    monkeypatch.setattr(etl_stocks, '_schema_ready', False)
+    etl_stocks.ensure_schema()
+    yield db
+    db.close()
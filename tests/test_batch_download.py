@@ -0,0 +1,89 @@
+"""Extraction groupee yf.download: demultiplexage (Price, Ticker) et reprise des tickers en echec"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+import yfinance
+
+import etl_stocks
+from etl_stocks import download_batch_frames, iter_fetch_batched
+
+PRICES = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def make_download(tickers, days=3, missing=()):
+    """Cadre large yf.download(group_by='column'): colonnes (Price, Ticker), NaN pour les absents"""
+    index = pd.bdate_range('2024-01-02', periods=days, name='Date')
+    columns = pd.MultiIndex.from_product([PRICES, tickers], names=['Price', 'Ticker'])
+    data = pd.DataFrame(index=index, columns=columns, dtype=float)
+    for offset, ticker in enumerate(tickers):
+        base = 100.0 * (offset + 1)
+        for price in PRICES:
+            data[(price, ticker)] = np.nan if ticker in missing else base + np.arange(days)
+    return data
+
+
+class FakeDownload:
+    """yf.download de substitution: enregistre les lots demandes"""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+
+    def __call__(self, tickers, start, end, **kwargs):
+        self.calls.append(list(tickers))
+        return make_download(list(tickers), missing=self.missing)
+
+
+@pytest.fixture
+def fake_download(pipeline_config, monkeypatch):
+    pipeline_config.update(cache_mode='off', corporate_actions=False)
+    download = FakeDownload()
+    monkeypatch.setattr(yfinance, 'download', download)
+    return download
+
+
+def test_stack_demultiplexes_each_ticker(fake_download):
+    frames = download_batch_frames(['AAPL', 'MSFT'], date(2024, 1, 2), date(2024, 1, 5))
+
+    assert sorted(frames) == ['AAPL', 'MSFT']
+    assert frames['AAPL']['Close'].tolist() == [100.0, 101.0, 102.0]
+    assert frames['MSFT']['Close'].tolist() == [200.0, 201.0, 202.0]
+    assert frames['MSFT'].index.name == 'Date'
+    assert not isinstance(frames['MSFT'].columns, pd.MultiIndex)
+
+
+def test_all_nan_ticker_is_absent(fake_download):
+    fake_download.missing = {'MSFT'}
+
+    frames = download_batch_frames(['AAPL', 'MSFT'], date(2024, 1, 2), date(2024, 1, 5))
+
+    assert list(frames) == ['AAPL']
+
+
+def test_single_ticker_multiindex(fake_download):
+    frames = download_batch_frames(['AAPL'], date(2024, 1, 2), date(2024, 1, 5))
+
+    assert list(frames) == ['AAPL']
+    assert frames['AAPL']['Close'].tolist() == [100.0, 101.0, 102.0]
+
+
+def test_failed_symbols_are_retried_individually(fake_download, monkeypatch):
+    fake_download.missing = {'MSFT'}
+    retried = []
+
+    def fake_single(ticker, start_date, end_date):
+        retried.append(ticker)
+        return None
+
+    monkeypatch.setattr(etl_stocks, 'fetch_stock_data_corrected', fake_single)
+    window = (date(2024, 1, 2), date(2024, 1, 5))
+
+    results = dict(iter_fetch_batched(['AAPL', 'MSFT'], {'AAPL': window, 'MSFT': window}, batch_size=10))
+
+    assert fake_download.calls == [['AAPL', 'MSFT']]
+    assert retried == ['MSFT']
+    assert results['MSFT'] is None
+    assert results['AAPL']['ticker'].eq('AAPL').all()
+    assert len(results['AAPL']) == 3
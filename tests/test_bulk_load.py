@@ -0,0 +1,42 @@
+"""Fichier TSV de LOAD DATA LOCAL INFILE (echappement des champs texte)"""
+import io
+import re
+
+from etl_stocks import build_db_columns, columns_order, write_load_data_file
+from test_conversion import make_prices
+
+MYSQL_UNESCAPES = {'\\\\': '\\', '\\t': '\t', '\\n': '\n', '\\r': '\r', '\\0': '\0'}
+
+
+def read_load_data_line(line):
+    """Decoupe une ligne comme LOAD DATA (FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\')"""
+    return [re.sub(r'\\.', lambda match: MYSQL_UNESCAPES[match.group(0)], field) for field in line.split('\t')]
+
+
+def test_text_with_separators_round_trips():
+    df = make_prices(3)
+    df['name'] = ['C:\\Fonds\\N', 'Tab\tCorp', 'Ligne\nDeux\r']
+    columns, _ = build_db_columns(df)
+
+    handle = io.StringIO()
+    write_load_data_file(handle, columns)
+    lines = handle.getvalue().split('\n')
+
+    assert lines[-1] == '' and len(lines) == 4
+    fields = [read_load_data_line(line) for line in lines[:-1]]
+    assert all(len(row) == len(columns_order) for row in fields)
+    assert [row[columns_order.index('name')] for row in fields] == ['C:\\Fonds\\N', 'Tab\tCorp', 'Ligne\nDeux\r']
+
+
+def test_numeric_fields_keep_full_precision():
+    df = make_prices(1)
+    df['close'] = 123.456789012345
+    columns, _ = build_db_columns(df)
+
+    handle = io.StringIO()
+    write_load_data_file(handle, columns)
+    row = handle.getvalue().rstrip('\n').split('\t')
+
+    assert float(row[columns_order.index('close')]) == 123.456789012345
+    assert row[columns_order.index('volume')] == '500'
+    assert row[columns_order.index('last_updated')] == '2024-02-01T18:30:05'
@@ -0,0 +1,65 @@
+"""Detection des lignes inchangees: empreintes stables, ecriture MySQL seule filtree"""
+import shutil
+
+import pandas as pd
+
+import etl_stocks
+from etl_stocks import PriceReader, TimeSeriesStore, compute_row_hashes, flush_pending_loads
+from test_conversion import make_prices
+
+
+def new_stats():
+    return {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+
+
+def load(df):
+    stats = new_stats()
+    flush_pending_loads([('AAPL', df, True)], stats, {})
+    return stats
+
+
+def test_row_hashes_are_stable_and_content_based():
+    df = make_prices(5)
+    hashes = compute_row_hashes(df)
+    assert hashes.dtype == 'int64'
+    assert (compute_row_hashes(df.copy()) == hashes).all()
+    # Hors contenu (horodatage) ignore, prix pris en compte
+    assert (compute_row_hashes(df.assign(last_updated=pd.Timestamp('2030-01-01'))) == hashes).all()
+    changed = df.copy()
+    changed.loc[2, 'close'] += 0.01
+    assert (compute_row_hashes(changed) != hashes).tolist() == [False, False, True, False, False]
+
+
+def test_unchanged_rows_are_not_rewritten(sqlite_db, pipeline_config):
+    pipeline_config['change_detection'] = True
+    df = make_prices(5)
+    assert load(df)['rows'] == 5
+
+    rerun = load(df)
+    assert rerun['skipped'] == 5
+    assert rerun['rows'] == 0 and rerun['success'] == 1
+    assert 'touched' not in rerun
+
+    changed = df.copy()
+    changed.loc[3, 'close'] = 150.0
+    stats = load(changed)
+    assert stats['skipped'] == 4 and stats['rows'] == 1
+    assert stats['touched'] == {'AAPL': '2024-01-05'}
+    closes = PriceReader(connect=lambda: sqlite_db).latest('AAPL', days=5)['close'].tolist()
+    assert closes[3] == 150.0
+
+
+def test_lake_and_store_receive_full_chunk(sqlite_db, pipeline_config, tmp_path):
+    pipeline_config.update(change_detection=True, sink='both', memmap_store=True,
+                           parquet_path=str(tmp_path / 'lake'), memmap_path=str(tmp_path / 'store'))
+    df = make_prices(5)
+    load(df)
+    # Les lignes deja en base ne sont pas reecrites, mais les destinations vides les recoivent
+    for path in ('lake', 'store'):
+        for entry in (tmp_path / path).iterdir():
+            shutil.rmtree(entry) if entry.is_dir() else entry.unlink()
+
+    stats = load(df)
+    assert stats['skipped'] == 5
+    assert len(etl_stocks.read_parquet_lake(columns=['close'])) == 5
+    assert len(TimeSeriesStore(str(tmp_path / 'store')).read('AAPL')['date']) == 5
@@ -0,0 +1,63 @@
+"""Points de reprise: --resume reprend le dernier run lance avec le meme univers et les memes reglages"""
+import pytest
+
+import etl_stocks
+from etl_stocks import finish_checkpoint_run, record_checkpoint, start_checkpoint_run
+
+TICKERS = ['AAA', 'BBB', 'CCC']
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_file(pipeline_config, monkeypatch, tmp_path):
+    pipeline_config['checkpoint_path'] = str(tmp_path / 'etl_runs.sqlite')
+    monkeypatch.setattr(etl_stocks, '_checkpoint_run_id', None)
+    monkeypatch.setattr(etl_stocks, '_checkpoint_conn', None)
+    yield
+    etl_stocks.close_checkpoint()
+
+
+def interrupted_run(tickers=TICKERS, done=('AAA',)):
+    start_checkpoint_run(tickers)
+    for ticker in done:
+        record_checkpoint(ticker, 'success', 10)
+    record_checkpoint('BBB', 'error')
+    assert finish_checkpoint_run() == 'incomplete'
+
+
+def test_resume_returns_unfinished_tickers():
+    interrupted_run()
+    assert start_checkpoint_run(TICKERS, resume=True) == ['BBB', 'CCC']
+    for ticker in ('BBB', 'CCC'):
+        record_checkpoint(ticker, 'success')
+    assert finish_checkpoint_run() == 'completed'
+    # Dernier run termine: rien a reprendre
+    assert start_checkpoint_run(TICKERS, resume=True) == TICKERS
+
+
+def test_only_the_latest_run_is_resumed():
+    interrupted_run()
+    start_checkpoint_run(TICKERS)
+    for ticker in TICKERS:
+        record_checkpoint(ticker, 'success')
+    assert finish_checkpoint_run() == 'completed'
+    # Le run interrompu plus ancien n'est pas repris
+    assert start_checkpoint_run(TICKERS, resume=True) == TICKERS
+
+
+def test_changed_universe_or_settings_start_a_new_run(pipeline_config):
+    interrupted_run()
+    assert start_checkpoint_run(TICKERS + ['DDD'], resume=True) == TICKERS + ['DDD']
+    finish_checkpoint_run()
+
+    interrupted_run()
+    pipeline_config['schema_mode'] = 'normalized'
+    assert start_checkpoint_run(TICKERS, resume=True) == TICKERS
+
+
+def test_run_with_other_fingerprint_does_not_hide_interrupted_run():
+    interrupted_run()
+    # Autre lancement partageant le fichier de reprise (autre univers), plus recent
+    start_checkpoint_run(['ZZZ'])
+    assert finish_checkpoint_run() == 'incomplete'
+
+    assert start_checkpoint_run(TICKERS, resume=True) == ['BBB', 'CCC']
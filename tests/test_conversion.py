@@ -0,0 +1,67 @@
+"""Conversion colonnaire DataFrame -> parametres MySQL (build_db_columns, dataframe_to_db_params)"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from etl_stocks import build_db_columns, columns_order, dataframe_to_db_params
+
+
+def make_prices(n_rows=4):
+    close = np.linspace(100.0, 103.0, n_rows)
+    df = pd.DataFrame({
+        'date': pd.date_range('2024-01-02', periods=n_rows, freq='D').date,
+        'ticker': 'AAPL',
+        'type': 'stock',
+        'sector': 'Technologie',
+        'name': 'Apple Inc.',
+        'country': 'USA',
+        'continent': 'North America',
+        'open': close - 1,
+        'high': close + 1,
+        'low': close - 2,
+        'close': close,
+        'volume': np.arange(n_rows) * 1000 + 500,
+        'adj_close': close,
+        'last_updated': datetime(2024, 2, 1, 18, 30, 5),
+    })
+    return df[columns_order]
+
+
+def test_params_follow_columns_order(pipeline_config):
+    pipeline_config['schema_mode'] = 'wide'
+    tuples, invalid_mask = dataframe_to_db_params(make_prices(2))
+
+    assert not invalid_mask.any()
+    assert tuples[0] == ('2024-01-02', 'AAPL', 'stock', 'Technologie', 'Apple Inc.', 'USA', 'North America',
+                         99.0, 101.0, 98.0, 100.0, 500, 100.0, '2024-02-01T18:30:05')
+    assert tuples[1][0] == '2024-01-03'
+    assert tuples[1][11] == 1500
+
+
+def test_params_are_native_python_types(pipeline_config):
+    pipeline_config['schema_mode'] = 'wide'
+    tuples, _ = dataframe_to_db_params(make_prices(1))
+
+    # pymysql n'echappe pas les scalaires numpy: chaque valeur doit etre un type Python natif
+    assert [type(value) for value in tuples[0]] == [str] * 7 + [float] * 4 + [int, float, str]
+
+
+def test_invalid_rows_are_masked_and_dropped():
+    df = make_prices(5)
+    df.loc[1, 'date'] = None
+    df.loc[2, 'close'] = np.inf
+    df.loc[3, 'sector'] = None
+
+    columns, invalid_mask = build_db_columns(df)
+
+    assert invalid_mask.tolist() == [False, True, True, True, False]
+    assert columns['date'].tolist() == ['2024-01-02', '2024-01-06']
+    assert len(columns['sector']) == 2
+
+
+def test_text_columns_share_one_string_per_value():
+    columns, _ = build_db_columns(make_prices(3))
+
+    assert columns['ticker'].tolist() == ['AAPL'] * 3
+    assert columns['ticker'][0] is columns['ticker'][2]
@@ -0,0 +1,57 @@
+"""Actions sur titres: facteurs par action, produit cumule, ajustement et cloture precedente lue en base"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_stocks import (adjust_prices, compute_action_factors, cumulative_adjustment_factors,
+                        lookup_previous_closes, save_to_mysql_optimized)
+from sqlite_db import SQLiteCursor
+from test_conversion import make_prices
+
+
+def actions(dividend, split_ratio, prev_close):
+    return pd.DataFrame({'dividend': dividend, 'split_ratio': split_ratio, 'prev_close': prev_close})
+
+
+def test_action_factors(pipeline_config):
+    pipeline_config['adjust_splits'] = False
+    factors = compute_action_factors(actions([2.0, 0.0, 1.0, 5.0], [1.0, 2.0, 1.0, 1.0],
+                                             [100.0, 50.0, np.nan, 4.0]))
+    # Cloture precedente inconnue ou dividende superieur a la cloture: pas d'ajustement
+    assert factors.tolist() == pytest.approx([0.98, 1.0, 1.0, 1.0])
+
+    pipeline_config['adjust_splits'] = True
+    assert compute_action_factors(actions([0.0], [4.0], [80.0])).tolist() == [0.25]
+
+
+def test_cumulative_factors_adjust_prices_before_each_ex_date():
+    cumulative = cumulative_adjustment_factors(np.array([0.9, 0.5]))
+    assert cumulative.tolist() == pytest.approx([0.45, 0.5])
+
+    ex_dates = np.array(['2024-01-10', '2024-01-20'], dtype='datetime64[D]')
+    dates = np.array(['2024-01-05', '2024-01-10', '2024-01-15', '2024-01-20', '2024-01-25'], dtype='datetime64[D]')
+    adjusted = adjust_prices(dates, np.full(5, 100.0), ex_dates, cumulative)
+    # Ex-date incluse dans l'intervalle suivant; aucune action apres la derniere ex-date
+    assert adjusted.tolist() == pytest.approx([45.0, 50.0, 50.0, 100.0, 100.0])
+
+
+def test_previous_closes_are_looked_up_in_one_query(sqlite_db, monkeypatch):
+    df = make_prices(5)
+    assert save_to_mysql_optimized(pd.concat([df, df.assign(ticker='MSFT', close=df['close'] * 2)]))
+    pending = pd.DataFrame({
+        'ticker': ['AAPL', 'MSFT', 'MSFT', 'XOM'],
+        'ex_date': np.array(['2024-01-05', '2024-01-04', '2024-01-10', '2024-01-05'], dtype='datetime64[D]'),
+        'prev_close': [np.nan, np.nan, 7.0, np.nan],
+    })
+    queries = []
+    execute = SQLiteCursor.execute
+    monkeypatch.setattr(SQLiteCursor, 'execute', lambda self, query, args=None: queries.append(query)
+                        or execute(self, query, args))
+
+    with sqlite_db.cursor() as cursor:
+        lookup_previous_closes(cursor, pending)
+
+    assert len(queries) == 1
+    # Cloture de la veille de l'ex-date; deja connue ou sans historique anterieur: inchangee
+    assert pending['prev_close'].tolist()[:3] == pytest.approx([df['close'][2], df['close'][1] * 2, 7.0])
+    assert np.isnan(pending['prev_close'][3])
@@ -0,0 +1,48 @@
+"""Fenetres d'extraction: annee glissante, delta incremental avec recouvrement"""
+import pandas as pd
+
+import etl_stocks
+from etl_stocks import get_extraction_windows, save_to_mysql_optimized
+from test_conversion import make_prices
+
+YEAR = ('2023-06-01', '2024-06-01')
+
+
+def windows(monkeypatch, last_dates, tickers=('NEW', 'LATE', 'FRESH', 'OLD')):
+    monkeypatch.setattr(etl_stocks, 'get_rolling_year_dates', lambda: YEAR)
+    monkeypatch.setattr(etl_stocks, 'get_last_loaded_dates', lambda: last_dates)
+    return get_extraction_windows(list(tickers))
+
+
+def test_full_mode_uses_rolling_year(pipeline_config, monkeypatch):
+    pipeline_config['load_mode'] = 'full'
+    assert set(windows(monkeypatch, {'LATE': '2024-05-20'}).values()) == {YEAR}
+
+
+def test_incremental_windows(pipeline_config, monkeypatch):
+    pipeline_config.update(load_mode='incremental', incremental_overlap_days=3)
+    result = windows(monkeypatch, {'LATE': pd.Timestamp('2024-05-20').date(), 'FRESH': '2024-06-04',
+                                   'OLD': '2020-01-01'})
+    # Nouveau ticker: annee glissante
+    assert result['NEW'] == YEAR
+    # Derniere date moins le recouvrement
+    assert result['LATE'] == ('2024-05-17', '2024-06-01')
+    # Deja a jour, recouvrement compris
+    assert result['FRESH'] is None
+    # Derniere date hors de l'annee glissante: borne au debut de la periode
+    assert result['OLD'] == YEAR
+
+
+def test_overlap_refetches_last_loaded_day(pipeline_config, monkeypatch):
+    pipeline_config.update(load_mode='incremental', incremental_overlap_days=0)
+    assert windows(monkeypatch, {'LATE': '2024-06-01'}, ['LATE'])['LATE'] is None
+    pipeline_config['incremental_overlap_days'] = 1
+    assert windows(monkeypatch, {'LATE': '2024-06-01'}, ['LATE'])['LATE'] == ('2024-05-31', '2024-06-01')
+
+
+def test_last_dates_read_from_database(sqlite_db, pipeline_config, monkeypatch):
+    pipeline_config.update(load_mode='incremental', incremental_overlap_days=2)
+    assert save_to_mysql_optimized(make_prices(5))
+    monkeypatch.setattr(etl_stocks, 'get_rolling_year_dates', lambda: ('2023-06-01', '2024-06-01'))
+    result = get_extraction_windows(['AAPL', 'MSFT'])
+    assert result == {'AAPL': ('2024-01-04', '2024-06-01'), 'MSFT': YEAR}
@@ -0,0 +1,70 @@
+"""Agregats secteur/pays/continent: sommes partielles et chainage de l'indice"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl_stocks import (compute_group_aggregates, refresh_group_aggregates, refresh_price_analytics,
+                        save_to_mysql_optimized)
+from test_conversion import make_prices
+
+SECTORS = {'AAA': 'Technologie', 'BBB': 'Technologie', 'CCC': 'Energie'}
+
+
+def load_universe(n_rows=30):
+    frames = []
+    for offset, (ticker, sector) in enumerate(SECTORS.items()):
+        df = make_prices(n_rows).assign(ticker=ticker, sector=sector)
+        for col in ['open', 'high', 'low', 'close', 'adj_close']:
+            df[col] = df[col] * (1 + offset) + np.sin(np.arange(n_rows) + offset)
+        frames.append(df)
+    assert save_to_mysql_optimized(pd.concat(frames, ignore_index=True))
+    return {ticker: '2024-01-02' for ticker in SECTORS}
+
+
+def read_stats(db):
+    return pd.read_sql('SELECT * FROM sector_daily_stats ORDER BY sector, date', db.raw)
+
+
+def test_grouped_partials_match_per_ticker_rows():
+    dates = pd.to_datetime(['2024-01-02', '2024-01-02', '2024-01-03', '2024-01-03'])
+    per_ticker = pd.DataFrame({
+        'sector': 'Technologie', 'date': dates,
+        'member_count': 1, 'return_sum': [0.0, 0.0, 0.02, -0.01], 'return_count': [0, 0, 1, 1],
+        'total_volume': [10, 20, 30, 40], 'advancing': [0, 0, 1, 0], 'declining': [0, 0, 0, 1],
+    })
+    grouped = per_ticker.groupby(['sector', 'date'], as_index=False).sum()
+
+    for partials in (per_ticker, grouped):
+        aggregates = compute_group_aggregates(partials, 'sector', {})
+        assert aggregates['member_count'].tolist() == [2, 2]
+        assert np.isnan(aggregates['avg_return'].iloc[0])
+        assert aggregates['avg_return'].iloc[1] == pytest.approx(0.005)
+        assert aggregates['index_level'].tolist() == pytest.approx([100.0, 100.5])
+
+
+def test_index_chains_from_previous_level():
+    partials = pd.DataFrame({
+        'sector': ['Energie'], 'date': pd.to_datetime(['2024-01-03']), 'member_count': [1],
+        'return_sum': [0.1], 'return_count': [1], 'total_volume': [5], 'advancing': [1], 'declining': [0],
+    })
+    aggregates = compute_group_aggregates(partials, 'sector', {'Energie': 200.0})
+    assert aggregates['index_level'].tolist() == pytest.approx([220.0])
+
+
+def test_database_partials_match_price_rereading(sqlite_db, pipeline_config):
+    touched = load_universe()
+    refresh_price_analytics(touched)
+
+    pipeline_config['analytics_enabled'] = True
+    assert refresh_group_aggregates(touched) > 0
+    from_analytics = read_stats(sqlite_db)
+
+    pipeline_config['analytics_enabled'] = False
+    refresh_group_aggregates(touched)
+    from_prices = read_stats(sqlite_db)
+
+    assert len(from_analytics) == 60
+    assert from_analytics.groupby('sector')['member_count'].max().to_dict() == {'Energie': 1, 'Technologie': 2}
+    for col in ['member_count', 'total_volume', 'advancing', 'declining']:
+        assert from_analytics[col].tolist() == from_prices[col].tolist()
+    np.testing.assert_allclose(from_analytics['index_level'], from_prices['index_level'], rtol=1e-9)
@@ -0,0 +1,76 @@
+"""Barres intraday: comptage des tickers charges sur plusieurs lots et intervalles"""
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl_stocks
+
+
+class FakeConnection:
+    def cursor(self):
+        return self
+
+    def execute(self, query, args=None):
+        return 0
+
+    def commit(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+def fake_bars(ticker, interval, start):
+    index = pd.date_range(start, periods=3, freq='1h', tz='UTC')
+    prices = np.linspace(10.0, 12.0, 3)
+    return pd.DataFrame({'Open': prices, 'High': prices + 1, 'Low': prices - 1, 'Close': prices,
+                         'Volume': [100, 200, 300]}, index=index)
+
+
+@pytest.fixture
+def intraday(pipeline_config, monkeypatch):
+    pipeline_config.update(sink='mysql', intraday_batch_rows=2, max_workers=1)
+    monkeypatch.setattr(etl_stocks, 'TICKERS', ['AAA', 'BBB', 'CCC'])
+    monkeypatch.setattr(etl_stocks, 'db_session', contextmanager(lambda: (yield FakeConnection())))
+    monkeypatch.setattr(etl_stocks, 'close_db_connection', lambda: None)
+    monkeypatch.setattr(etl_stocks, 'ensure_intraday_table', lambda cursor, interval, now: None)
+    monkeypatch.setattr(etl_stocks, 'load_intraday_watermarks', lambda cursor, interval: {})
+    monkeypatch.setattr(etl_stocks, 'fetch_intraday_bars', fake_bars)
+    return monkeypatch
+
+
+def test_tickers_are_counted_once_across_batches_and_intervals(intraday):
+    batches = []
+    intraday.setattr(etl_stocks, 'save_intraday_bars', lambda interval, bars: batches.append(bars) or len(bars))
+    stats = etl_stocks.run_intraday(['5m', '1h'])
+    assert len(batches) == 6
+    assert (stats['success'], stats['errors']) == (3, 0)
+    assert stats['rows'] == sum(len(batch) for batch in batches)
+
+
+def test_failed_batch_counts_its_tickers_as_errors(intraday):
+    def save(interval, bars):
+        if interval == '1h' and 'BBB' in set(bars['ticker']):
+            raise etl_stocks.pymysql.Error('lot refuse')
+        return len(bars)
+    intraday.setattr(etl_stocks, 'save_intraday_bars', save)
+    stats = etl_stocks.run_intraday(['5m', '1h'])
+    assert (stats['success'], stats['errors']) == (2, 1)
+    assert set(stats) == {'success', 'errors', 'rows', 'up_to_date'}
+
+
+def test_up_to_date_tickers_are_counted_once_across_intervals(intraday):
+    # AAA: rien de nouveau sur les deux intervalles; BBB: a jour en 5m seulement
+    def fetch(ticker, interval, start):
+        if ticker == 'AAA' or (ticker == 'BBB' and interval == '5m'):
+            return pd.DataFrame()
+        return fake_bars(ticker, interval, start)
+    intraday.setattr(etl_stocks, 'fetch_intraday_bars', fetch)
+    intraday.setattr(etl_stocks, 'save_intraday_bars', lambda interval, bars: len(bars))
+    stats = etl_stocks.run_intraday(['5m', '1h'])
+    assert (stats['success'], stats['up_to_date'], stats['errors']) == (2, 1, 0)
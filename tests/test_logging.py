@@ -0,0 +1,101 @@
+"""Logging: limitation des messages repetitifs et vidage de la file d'ecriture"""
+import logging
+
+import pytest
+
+import etl_stocks
+from etl_stocks import RepetitiveLogFilter, flush_logging, setup_logging, stop_log_listener
+
+
+def make_record(created, ticker='AAPL', level=logging.INFO, msg="[LOAD] %s: %d lignes"):
+    record = logging.LogRecord('etl_stocks', level, __file__, 1, msg, (ticker, 10), None)
+    record.created = created
+    return record
+
+
+def test_repeats_beyond_rate_are_suppressed_within_the_window():
+    log_filter = RepetitiveLogFilter(rate_per_sec=2)
+
+    accepted = [log_filter.filter(make_record(100.0 + i * 0.1, f"T{i}")) for i in range(5)]
+
+    assert accepted == [True, True, False, False, False]
+
+
+def test_warnings_and_plain_messages_always_pass():
+    log_filter = RepetitiveLogFilter(rate_per_sec=1)
+    log_filter.filter(make_record(100.0))
+
+    assert log_filter.filter(make_record(100.1, level=logging.WARNING))
+    plain = logging.LogRecord('etl_stocks', logging.INFO, __file__, 1, "[LOAD] termine", (), None)
+    plain.created = 100.2
+    assert log_filter.filter(plain)
+
+
+def test_templates_are_limited_independently():
+    log_filter = RepetitiveLogFilter(rate_per_sec=1)
+
+    assert log_filter.filter(make_record(100.0))
+    assert log_filter.filter(make_record(100.1, msg="[FETCH] %s: %d jours"))
+    assert not log_filter.filter(make_record(100.2))
+
+
+def test_next_window_reports_suppressed_count():
+    log_filter = RepetitiveLogFilter(rate_per_sec=1)
+    for i in range(4):
+        log_filter.filter(make_record(100.0 + i * 0.1, f"T{i}"))
+
+    record = make_record(101.0, 'MSFT')
+
+    assert log_filter.filter(record)
+    assert record.getMessage() == "[LOAD] MSFT: 10 lignes (+3 messages similaires omis)"
+    # Le compteur repart de zero: pas de resume sans nouvelle suppression
+    following = make_record(102.5, 'NVDA')
+    assert log_filter.filter(following)
+    assert following.getMessage() == "[LOAD] NVDA: 10 lignes"
+
+
+@pytest.fixture
+def queued_logging(tmp_path, monkeypatch):
+    monkeypatch.setenv('LOG_DIRECTORY', str(tmp_path))
+    monkeypatch.setenv('LOG_TO_FILE', 'True')
+    monkeypatch.setenv('LOG_TO_CONSOLE', 'False')
+    monkeypatch.setenv('LOG_QUEUE', 'True')
+    monkeypatch.setenv('LOG_LEVEL', 'INFO')
+    monkeypatch.setenv('LOG_RATE_LIMIT_PER_SEC', '0')
+    monkeypatch.setattr(etl_stocks, '_run_timestamp', 'test')
+    monkeypatch.setattr(etl_stocks, '_log_atexit_registered', True)
+    logger = logging.getLogger('etl_stocks')
+    saved = (logger.level, logger.handlers[:], logger.filters[:])
+    logger.handlers[:] = []
+    yield tmp_path / 'etl_pipeline_test.log'
+    stop_log_listener()
+    for handler in logger.handlers:
+        handler.close()
+    logger.setLevel(saved[0])
+    logger.handlers[:] = saved[1]
+    logger.filters[:] = saved[2]
+
+
+def test_stop_listener_writes_queued_records(queued_logging):
+    logger = setup_logging()
+    for i in range(50):
+        logger.info("[LOAD] %s: %d lignes", f"T{i}", i)
+
+    stop_log_listener()
+
+    content = queued_logging.read_text(encoding='utf-8')
+    assert "[LOAD] T49: 49 lignes" in content
+    assert content.count("[LOAD] T") == 50
+    assert etl_stocks._log_listener is None
+
+
+def test_flush_logging_writes_records_and_keeps_listening(queued_logging):
+    logger = setup_logging()
+    logger.info("[SHARD] %s termine", 'partition-1')
+
+    flush_logging()
+
+    assert "[SHARD] partition-1 termine" in queued_logging.read_text(encoding='utf-8')
+    logger.info("[SHARD] %s termine", 'partition-2')
+    stop_log_listener()
+    assert "[SHARD] partition-2 termine" in queued_logging.read_text(encoding='utf-8')
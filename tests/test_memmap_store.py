@@ -0,0 +1,24 @@
+"""Store memmap: remplissage depuis historical_prices"""
+import numpy as np
+import pandas as pd
+
+import etl_stocks
+from etl_stocks import TimeSeriesStore
+from test_conversion import make_prices
+
+
+def test_memmap_backfill_copies_database_history(sqlite_db, pipeline_config, tmp_path):
+    df = make_prices(6)
+    assert etl_stocks.save_to_mysql_optimized(pd.concat([df, df.assign(ticker='MSFT', close=df['close'] * 2)]))
+    root = str(tmp_path / 'store')
+    # Store partiel (active apres coup): remplace par l'historique complet
+    etl_stocks.save_to_memmap_store(df.iloc[4:], root)
+
+    assert etl_stocks.backfill_memmap_store(['AAPL', 'MSFT', 'ABSENT'], root) == 12
+    store = TimeSeriesStore(root)
+    assert store.tickers() == ['AAPL', 'MSFT']
+    series = store.read('MSFT')
+    assert np.datetime_as_string(series['date'], unit='D').tolist() == [
+        day.strftime('%Y-%m-%d') for day in df['date']]
+    assert series['close'].tolist() == (df['close'] * 2).tolist()
+    assert series['volume'].tolist() == df['volume'].tolist()
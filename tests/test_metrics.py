@@ -0,0 +1,91 @@
+"""Rapport de metriques d'un run: format JSONL et fichier texte Prometheus"""
+import json
+
+import pytest
+
+import etl_stocks
+from etl_stocks import METRIC_STAGES, RunMetrics
+
+SUMMARY = {'duration_seconds': 2.0, 'tickers': 2, 'success': 1, 'errors': 1,
+           'rows': 100, 'rows_skipped': 5, 'rows_quarantined': 2}
+
+
+@pytest.fixture
+def metrics(pipeline_config, monkeypatch, tmp_path):
+    pipeline_config['prometheus_textfile'] = str(tmp_path / 'textfile' / 'etl.prom')
+    monkeypatch.setenv('LOG_DIRECTORY', str(tmp_path / 'logs'))
+    monkeypatch.setattr(etl_stocks, '_run_timestamp', '20240102_030405')
+    monkeypatch.setattr(etl_stocks, '_stage_memory', {'db_write': 2048})
+    collector = RunMetrics()
+    collector.reset(True)
+    collector.add_duration('fetch', 0.5, 'AAPL')
+    collector.add_duration('db_write', 0.5, ['AAPL', 'MSFT'])
+    collector.incr('AAPL', 'attempts', 3)
+    collector.incr('AAPL', 'rows', 100)
+    collector.mark('AAPL', 'success')
+    collector.incr('MSFT', 'attempts')
+    collector.mark('MSFT', 'error')
+    return collector
+
+
+def test_jsonl_report_has_one_line_per_ticker_then_run(metrics, tmp_path):
+    report_path = metrics.write_report(SUMMARY)
+
+    assert report_path == str(tmp_path / 'logs' / 'etl_metrics_20240102_030405.jsonl')
+    with open(report_path, encoding='utf-8') as report:
+        records = [json.loads(line) for line in report]
+
+    assert [record['record'] for record in records] == ['ticker', 'ticker', 'run']
+    aapl, msft, run = records
+    assert aapl['ticker'] == 'AAPL' and aapl['run'] == '20240102_030405'
+    assert aapl['status'] == 'success'
+    assert aapl['retries'] == 2
+    assert aapl['fetch'] == 0.5 and aapl['db_write'] == 0.25
+    assert aapl['rows_per_sec'] == round(100 / 0.75, 1)
+    assert msft['status'] == 'error' and msft['retries'] == 0
+    assert set(METRIC_STAGES) <= set(aapl)
+
+    assert run['rows_per_sec'] == 50.0
+    assert run['retries'] == 2
+    assert run['stage_seconds'] == {'fetch': 0.5, 'transform': 0.0, 'convert': 0.0, 'db_write': 0.5}
+    assert run['stage_memory_bytes'] == {'db_write': 2048}
+    assert {key: run[key] for key in SUMMARY} == SUMMARY
+
+
+def test_prometheus_textfile_format(metrics, pipeline_config):
+    metrics.write_report(SUMMARY)
+
+    with open(pipeline_config['prometheus_textfile'], encoding='utf-8') as textfile:
+        lines = textfile.read().splitlines()
+
+    samples = {}
+    for line in lines:
+        if line.startswith('# '):
+            kind, name = line.split()[1:3]
+            assert kind in ('HELP', 'TYPE')
+            if kind == 'TYPE':
+                assert line.endswith(' gauge')
+            continue
+        name, value = line.rsplit(' ', 1)
+        samples[name] = float(value)
+
+    assert samples['etl_run_duration_seconds'] == 2.0
+    assert samples['etl_tickers{status="success"}'] == 1
+    assert samples['etl_tickers{status="error"}'] == 1
+    assert samples['etl_rows_loaded'] == 100
+    assert samples['etl_rows_skipped'] == 5
+    assert samples['etl_rows_quarantined'] == 2
+    assert samples['etl_rows_per_second'] == 50.0
+    assert samples['etl_retries'] == 2
+    assert samples['etl_stage_seconds{stage="db_write"}'] == 0.5
+    # Chaque metrique est precedee de son HELP et de son TYPE
+    for name in {sample.split('{')[0] for sample in samples}:
+        assert f'# TYPE {name} gauge' in lines
+
+
+def test_disabled_metrics_write_nothing(pipeline_config, tmp_path, monkeypatch):
+    monkeypatch.setenv('LOG_DIRECTORY', str(tmp_path / 'logs'))
+    collector = RunMetrics()
+
+    assert collector.write_report(SUMMARY) is None
+    assert not (tmp_path / 'logs').exists()
@@ -0,0 +1,71 @@
+"""Lac Parquet: filtres de lecture (colonnes, tickers, dates) et compaction des partitions"""
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import compact_parquet_lake, parquet_partition_dir, read_parquet_lake, save_to_parquet
+from test_conversion import make_prices
+
+
+@pytest.fixture
+def lake(pipeline_config, tmp_path):
+    root = str(tmp_path / 'lake')
+    pipeline_config.update(sink='parquet', parquet_path=root, parquet_compact_files=100)
+    return root
+
+
+def days(dates):
+    return [day.strftime('%Y-%m-%d') for day in pd.to_datetime(dates)]
+
+
+def test_column_projection_and_ticker_filter(lake):
+    df = make_prices(5)
+    assert save_to_parquet(pd.concat([df, df.assign(ticker='MSFT', close=df['close'] * 2)]))
+
+    frame = read_parquet_lake(columns=['close'], tickers=['MSFT'])
+
+    assert list(frame.columns) == ['ticker', 'date', 'close']
+    assert frame['ticker'].eq('MSFT').all()
+    assert frame['close'].tolist() == (df['close'] * 2).tolist()
+
+
+def test_date_filters_cross_month_partitions(lake):
+    # 2024-01-02 .. 2024-03-01: trois partitions mensuelles
+    df = make_prices(60)
+    assert save_to_parquet(df)
+
+    frame = read_parquet_lake(columns=['close'], start_date='2024-01-30', end_date='2024-02-02')
+
+    assert days(frame['date']) == ['2024-01-30', '2024-01-31', '2024-02-01', '2024-02-02']
+    assert days(read_parquet_lake(start_date='2024-02-28')['date']) == ['2024-02-28', '2024-02-29', '2024-03-01']
+    assert days(read_parquet_lake(end_date='2024-01-03')['date']) == ['2024-01-02', '2024-01-03']
+
+
+def test_compaction_drops_duplicates_keeping_latest(lake):
+    df = make_prices(4)
+    assert save_to_parquet(df)
+    # Reecriture de deux jours: valeur plus recente de last_updated
+    update = df.iloc[2:].assign(close=df['close'].iloc[2:] + 50, last_updated=datetime(2024, 3, 1))
+    assert save_to_parquet(update)
+    partition_dir = parquet_partition_dir(lake, 2024, 1, 'AAPL')
+    assert len(etl_stocks.list_parquet_parts(partition_dir)) == 2
+    # Avant compaction, la lecture dedoublonne deja; sans dedoublonnage les doublons sont visibles
+    assert len(read_parquet_lake(columns=['close'], deduplicate=False)) == 6
+
+    assert compact_parquet_lake(lake) == 1
+
+    parts = etl_stocks.list_parquet_parts(partition_dir)
+    assert len(parts) == 1
+    assert not [name for name in os.listdir(partition_dir) if name.startswith(etl_stocks.PARQUET_TMP_PREFIX)]
+    frame = read_parquet_lake(columns=['close'], deduplicate=False)
+    assert days(frame['date']) == days(df['date'])
+    assert frame['close'].tolist() == df['close'].iloc[:2].tolist() + (df['close'].iloc[2:] + 50).tolist()
+
+
+def test_single_file_partition_is_not_compacted(lake):
+    assert save_to_parquet(make_prices(3))
+
+    assert compact_parquet_lake(lake) == 0
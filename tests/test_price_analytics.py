@@ -0,0 +1,88 @@
+"""Indicateurs price_analytics: valeurs sur series connues et recalcul incremental"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import compute_price_analytics, refresh_price_analytics
+from test_conversion import make_prices
+
+
+def closes(ticker, values):
+    dates = pd.bdate_range('2024-01-02', periods=len(values))
+    return pd.DataFrame({'ticker': ticker, 'date': dates, 'close': np.asarray(values, dtype='float64')})
+
+
+def test_returns_and_moving_averages_on_known_series():
+    prices = pd.concat([closes('AAPL', np.arange(1, 61)), closes('MSFT', [10.0] * 60)], ignore_index=True)
+
+    result = compute_price_analytics(prices)
+    aapl = result[result['ticker'] == 'AAPL'].reset_index(drop=True)
+    msft = result[result['ticker'] == 'MSFT'].reset_index(drop=True)
+
+    # Premier rendement de chaque ticker: pas de cours precedent (pas de fuite entre tickers)
+    assert np.isnan(aapl['daily_return'][0]) and np.isnan(msft['daily_return'][0])
+    assert aapl['daily_return'][1] == pytest.approx(1.0)
+    assert aapl['daily_return'][59] == pytest.approx(60 / 59 - 1)
+    # Fenetre incomplete: NULL
+    assert aapl['ma_20'][:19].isna().all()
+    assert aapl['ma_20'][19] == pytest.approx(10.5)
+    assert aapl['ma_20'][59] == pytest.approx(50.5)
+    assert aapl['ma_50'][49] == pytest.approx(25.5)
+    assert aapl['ma_200'].isna().all()
+    assert msft['ma_50'][59] == pytest.approx(10.0)
+
+
+def test_volatility_is_annualized_std_of_returns():
+    # Rendements alternes +10% / -10%: ecart-type connu sur 20 seances
+    values = [100.0]
+    for i in range(40):
+        values.append(values[-1] * (1.1 if i % 2 == 0 else 0.9))
+    result = compute_price_analytics(closes('AAPL', values))
+
+    returns = pd.Series([0.1, -0.1] * 10)
+    expected = returns.std() * np.sqrt(252)
+    assert result['volatility_20'][:20].isna().all()
+    assert result['volatility_20'].iloc[20] == pytest.approx(expected)
+    assert result['volatility_20'].iloc[-1] == pytest.approx(expected)
+    # Cours constant: volatilite nulle
+    flat = compute_price_analytics(closes('MSFT', [10.0] * 30))
+    assert flat['volatility_20'].iloc[-1] == pytest.approx(0.0)
+
+
+@pytest.fixture
+def analytics_db(sqlite_db, pipeline_config):
+    pipeline_config.update(analytics_enabled=True)
+    etl_stocks._schema_ready = False
+    etl_stocks.ensure_schema()
+    return sqlite_db
+
+
+def test_incremental_refresh_reads_lookback_and_writes_touched_dates(analytics_db, pipeline_config, monkeypatch):
+    df = make_prices(60)
+    df['close'] = np.arange(1.0, 61.0)
+    assert etl_stocks.save_to_mysql_optimized(df)
+    reads = []
+    load_close_history = etl_stocks.load_close_history
+
+    def spy(cursor, tickers, start_date):
+        reads.append((list(tickers), start_date))
+        return load_close_history(cursor, tickers, start_date)
+
+    monkeypatch.setattr(etl_stocks, 'load_close_history', spy)
+    first_date = df['date'].iloc[40].strftime('%Y-%m-%d')
+
+    assert refresh_price_analytics({'AAPL': first_date}) == 20
+
+    lookback = pd.Timestamp(first_date) - pd.Timedelta(days=etl_stocks.ANALYTICS_LOOKBACK_DAYS)
+    assert reads == [(['AAPL'], lookback.strftime('%Y-%m-%d'))]
+    stored = pd.read_sql("SELECT date, close, daily_return, ma_20 FROM price_analytics ORDER BY date",
+                         analytics_db.raw)
+    assert len(stored) == 20 and stored['date'].min() == first_date
+    # Moyennes calculees avec l'historique relu, pas seulement les dates recalculees
+    assert stored['ma_20'].tolist() == pytest.approx([np.arange(i - 18, i + 2).mean() for i in range(40, 60)])
+    assert stored['daily_return'].iloc[0] == pytest.approx(41 / 40 - 1)
+
+
+def test_refresh_without_touched_tickers_is_noop(analytics_db):
+    assert refresh_price_analytics({}) == 0
@@ -0,0 +1,111 @@
+"""API de lecture en cache: succes du cache, invalidation precise apres ecriture, eviction LRU"""
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import PriceReader, save_to_mysql_optimized
+from sqlite_db import SQLiteConnection
+from test_conversion import make_prices
+
+
+@pytest.fixture
+def reader(sqlite_db, monkeypatch, tmp_path):
+    """
+    Lecteur du processus (invalide par save_to_mysql_optimized), sur sa propre connexion
+    a la base de test, avec deux tickers charges
+    """
+    reader = PriceReader(connect=lambda: SQLiteConnection(str(tmp_path / 'etl.sqlite')))
+    monkeypatch.setattr(etl_stocks, 'PRICE_READER', reader)
+    df = make_prices(10)
+    assert save_to_mysql_optimized(pd.concat([df, df.assign(ticker='XOM', sector='Energie')], ignore_index=True))
+    yield reader
+    reader.close()
+
+
+def test_repeated_reads_hit_the_cache(reader):
+    first = reader.latest('AAPL', days=3)
+    assert first['date'].dt.strftime('%Y-%m-%d').tolist() == ['2024-01-09', '2024-01-10', '2024-01-11']
+    first.loc[0, 'close'] = -1.0
+    second = reader.latest('AAPL', days=3)
+    # Copie rendue: le cache n'est pas modifie par l'appelant
+    assert second['close'].iloc[0] != -1.0
+    assert reader.stats()['latest'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_writes_invalidate_only_overlapping_entries(reader):
+    reader.latest('AAPL', days=3)
+    reader.sector_slice('Energie', '2024-01-02', '2024-01-05')
+    reader.close_matrix(['AAPL', 'XOM'], '2024-01-02', '2024-01-04')
+
+    # AAPL avant la fenetre des 3 derniers jours: seule la matrice de clotures est touchee
+    save_to_mysql_optimized(make_prices(2).assign(close=50.0))
+    assert reader.stats()['invalidations'] == 1
+    assert reader.stats()['entries'] == 2
+
+    # Nouveau ticker du secteur: la tranche du secteur est invalidee
+    save_to_mysql_optimized(make_prices(2).assign(ticker='CVX', sector='Energie'))
+    assert reader.stats()['entries'] == 1
+    assert sorted(reader.sector_slice('Energie', '2024-01-02', '2024-01-05')['ticker'].unique()) == ['CVX', 'XOM']
+
+    save_to_mysql_optimized(make_prices(10).tail(1).assign(close=500.0))
+    assert reader.latest('AAPL', days=3)['close'].iloc[-1] == 500.0
+
+
+def test_short_or_missing_history(reader):
+    assert reader.latest('ABSENT', days=5).empty
+    assert len(reader.latest('AAPL', days=50)) == 10
+    # Historique plus court que days: toute ecriture du ticker invalide l'entree
+    save_to_mysql_optimized(make_prices(1).assign(date=pd.Timestamp('2023-06-01').date()))
+    assert len(reader.latest('AAPL', days=50)) == 11
+    with pytest.raises(ValueError):
+        reader.latest('AAPL', days=0)
+
+
+def test_least_recently_read_entries_are_evicted(reader):
+    size = int(reader.latest('AAPL', days=5).memory_usage(index=True, deep=True).sum())
+    reader.max_bytes = size * 2
+    reader.latest('XOM', days=5)
+    reader.latest('AAPL', days=5)
+    reader.latest('AAPL', days=4)
+    assert reader.stats()['evictions'] == 1
+    reader.latest('AAPL', days=5)
+    assert reader.stats()['latest']['hits'] == 2
+
+
+def test_writes_from_another_process_are_detected(reader, monkeypatch):
+    reader.latest('AAPL', days=3)
+    reader.latest('XOM', days=3)
+    reader.sector_slice('Energie', '2024-01-02', '2024-01-05')
+
+    # Autre processus: son propre lecteur est invalide, pas celui-ci
+    monkeypatch.setattr(etl_stocks, 'PRICE_READER', PriceReader(connect=lambda: None))
+    save_to_mysql_optimized(make_prices(10).tail(1).assign(close=500.0))
+    assert reader.stats()['entries'] == 3
+
+    assert reader.latest('AAPL', days=3)['close'].iloc[-1] == 500.0
+    reader.latest('XOM', days=3)
+    assert reader.stats()['latest']['hits'] == 1
+    assert reader.stats()['invalidations'] == 1
+
+    # Nouveau ticker du secteur ecrit ailleurs: la tranche est relue
+    save_to_mysql_optimized(make_prices(2).assign(ticker='CVX', sector='Energie'))
+    assert sorted(reader.sector_slice('Energie', '2024-01-02', '2024-01-05')['ticker'].unique()) == ['CVX', 'XOM']
+
+
+def test_kept_entries_survive_own_writes(reader):
+    reader.latest('AAPL', days=3)
+    # Ecriture du processus avant la fenetre: l'entree reste valide et reste servie
+    save_to_mysql_optimized(make_prices(2).assign(close=50.0))
+    reader.latest('AAPL', days=3)
+    assert reader.stats()['latest'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_reader_uses_its_own_connection(reader, sqlite_db):
+    reader.latest('AAPL', days=3)
+    assert reader._conn is not None and reader._conn is not sqlite_db
+
+
+def test_empty_close_matrix(reader):
+    frame = reader.close_matrix([], '2024-01-02', '2024-01-04')
+    assert frame.empty and list(frame.columns) == []
+    assert 'close_matrix' not in reader.stats()
@@ -0,0 +1,82 @@
+"""Limiteur de debit adaptatif (AIMD) de l'extraction asynchrone"""
+import asyncio
+
+import pandas as pd
+
+import etl_stocks
+from etl_stocks import AdaptiveRateLimiter, fetch_ticker_async
+
+
+def test_success_increases_rate_up_to_max():
+    limiter = AdaptiveRateLimiter(max_rate=4.0)
+    limiter.rate = 2.0
+
+    limiter.on_success()
+    assert limiter.rate == 2.2
+
+    for _ in range(50):
+        limiter.on_success()
+    assert limiter.rate == 4.0
+
+
+def test_throttle_halves_rate_and_drains_tokens():
+    limiter = AdaptiveRateLimiter(max_rate=4.0)
+
+    limiter.on_throttle()
+
+    assert limiter.rate == 2.0
+    assert limiter._tokens == 0.0
+
+
+def test_throttle_stops_at_floor():
+    limiter = AdaptiveRateLimiter(max_rate=4.0, min_rate=0.5)
+
+    for _ in range(10):
+        limiter.on_throttle()
+
+    assert limiter.rate == 0.5
+    # Plancher borne par le debit maximal
+    assert AdaptiveRateLimiter(max_rate=0.1).min_rate == 0.1
+
+
+class CountingLimiter(AdaptiveRateLimiter):
+    """Limiteur sans attente qui compte les signaux recus"""
+
+    def __init__(self):
+        super().__init__(max_rate=4.0)
+        self.throttles = 0
+
+    async def acquire(self):
+        return
+
+    def on_throttle(self):
+        self.throttles += 1
+        super().on_throttle()
+
+
+def run_fetch(pipeline_config, monkeypatch, download):
+    pipeline_config.update(max_retries=2, cache_mode='replay')
+    monkeypatch.setattr(etl_stocks, 'download_history', download)
+    limiter = CountingLimiter()
+    asyncio.run(fetch_ticker_async('AAPL', '2024-01-01', '2024-01-05', limiter))
+    return limiter
+
+
+def test_empty_response_does_not_throttle(pipeline_config, monkeypatch):
+    limiter = run_fetch(pipeline_config, monkeypatch, lambda ticker, start, end: pd.DataFrame())
+
+    assert limiter.throttles == 0
+    assert limiter.rate == 4.0
+
+
+def test_rate_limit_error_throttles(pipeline_config, monkeypatch):
+    class YFRateLimitError(Exception):
+        pass
+
+    def download(ticker, start, end):
+        raise YFRateLimitError("Too Many Requests. Rate limited.")
+
+    limiter = run_fetch(pipeline_config, monkeypatch, download)
+
+    assert limiter.throttles == 2
+    assert limiter.rate == 1.0
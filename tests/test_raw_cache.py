@@ -0,0 +1,105 @@
+"""Cache local des reponses yfinance: jours scelles, expiration des derniers jours"""
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import cache_fetch_start, cache_get, cache_put, download_history
+
+
+def make_history(start, end):
+    index = pd.bdate_range(start, end, inclusive='left', name='Date')
+    close = [100.0 + i for i in range(len(index))]
+    return pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000,
+                         'Dividends': 0.0, 'Stock Splits': 0.0}, index=index)
+
+
+class FakeTicker:
+    """yf.Ticker de substitution: enregistre les fenetres demandees"""
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, start, end, **kwargs):
+        FakeTicker.calls.append((start, end))
+        return make_history(start, end)
+
+
+@pytest.fixture
+def raw_cache(pipeline_config, monkeypatch, tmp_path):
+    pipeline_config.update(cache_mode='readwrite', cache_path=str(tmp_path / 'yf_cache.sqlite'),
+                           cache_ttl_seconds=900, cache_unsettled_days=2, cache_max_mb=500)
+    monkeypatch.setattr(etl_stocks, '_cache_initialized', False)
+    monkeypatch.setattr(etl_stocks.yf, 'Ticker', FakeTicker)
+    FakeTicker.calls = []
+
+
+def timestamp(day, hour=20):
+    return datetime.fromisoformat(day).replace(hour=hour).timestamp()
+
+
+def test_fresh_cache_serves_whole_window(raw_cache):
+    coverage = ('2024-01-01', '2024-03-11', timestamp('2024-03-11'))
+    assert cache_fetch_start(coverage, '2024-01-01', '2024-03-11', timestamp('2024-03-11') + 60) is None
+
+
+def test_expired_cache_refetches_unsettled_days_only(raw_cache):
+    coverage = ('2024-01-01', '2024-03-11', timestamp('2024-03-11'))
+    now = timestamp('2024-03-11') + 3600
+
+    assert cache_fetch_start(coverage, '2024-01-01', '2024-03-11', now) == '2024-03-09'
+    # Lendemain: les jours revisables et le nouveau jour
+    assert cache_fetch_start(coverage, '2024-01-02', '2024-03-12', now + 86400) == '2024-03-09'
+
+
+def test_uncovered_window_is_fetched_entirely(raw_cache):
+    coverage = ('2024-02-01', '2024-03-11', timestamp('2024-03-11'))
+    assert cache_fetch_start(coverage, '2024-01-01', '2024-03-11', timestamp('2024-03-11')) == '2024-01-01'
+    assert cache_fetch_start(None, '2024-01-01', '2024-03-11', timestamp('2024-03-11')) == '2024-01-01'
+
+
+def test_expiry_path_downloads_tail_and_merges(raw_cache, monkeypatch):
+    clock = [timestamp('2024-03-11')]
+    monkeypatch.setattr(etl_stocks.time, 'time', lambda: clock[0])
+    cache_put('AAPL', '2024-01-01', '2024-03-11', make_history('2024-01-01', '2024-03-11'))
+
+    # Une heure plus tard le cache a expire: seuls les jours revisables sont a retelecharger
+    clock[0] += 3600
+    cached, fetch_start = cache_get('AAPL', '2024-01-01', '2024-03-12')
+    assert fetch_start == '2024-03-09'
+    assert cached.index.max() == pd.Timestamp('2024-03-08')
+
+    data = download_history('AAPL', '2024-01-01', '2024-03-12')
+
+    assert FakeTicker.calls == [('2024-03-09', '2024-03-12')]
+    assert data.index.equals(make_history('2024-01-01', '2024-03-12').index)
+    assert cache_get('AAPL', '2024-01-01', '2024-03-12')[1] is None
+
+
+def test_empty_tail_download_is_recorded(raw_cache, pipeline_config, monkeypatch):
+    pipeline_config['cache_unsettled_days'] = 0
+    clock = [timestamp('2024-03-09')]
+    monkeypatch.setattr(etl_stocks.time, 'time', lambda: clock[0])
+    cache_put('AAPL', '2024-01-01', '2024-03-09', make_history('2024-01-01', '2024-03-09'))
+
+    # Fin de semaine: la fin de fenetre ne contient aucune seance
+    clock[0] += 86400
+    first = download_history('AAPL', '2024-01-01', '2024-03-11')
+    second = download_history('AAPL', '2024-01-01', '2024-03-11')
+
+    assert FakeTicker.calls == [('2024-03-09', '2024-03-11')]
+    assert first.index.equals(second.index)
+    assert first.index.max() == pd.Timestamp('2024-03-08')
+
+
+def test_adjust_mode_is_part_of_the_cache_key(raw_cache, pipeline_config):
+    pipeline_config.update(yf_auto_adjust=True, corporate_actions=False)
+    cache_put('AAPL', '2024-01-01', '2024-03-11', make_history('2024-01-01', '2024-03-11'))
+    assert cache_get('AAPL', '2024-01-01', '2024-03-11')[1] is None
+
+    # Mode actions (auto_adjust=False): les reponses ajustees ne sont pas servies
+    pipeline_config['corporate_actions'] = True
+    assert cache_get('AAPL', '2024-01-01', '2024-03-11') == (None, '2024-01-01')
+    assert cache_get('AAPL', '2024-01-01', '2024-03-11', replay=True) == (None, None)
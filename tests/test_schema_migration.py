@@ -0,0 +1,78 @@
+"""Migration du schema large historical_prices vers tickers + daily_prices et vue de compatibilite"""
+import re
+
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import LEGACY_TABLE, migrate_to_normalized_schema
+from sqlite_db import SQLiteConnection, translate
+from test_conversion import make_prices
+
+# Dialecte MySQL de la migration absent de la base de substitution
+MYSQL_TO_SQLITE = [
+    (re.compile(r'(\w+) SMALLINT UNSIGNED NOT NULL AUTO_INCREMENT'), r'\1 INTEGER PRIMARY KEY AUTOINCREMENT'),
+    (re.compile(r'PRIMARY KEY \(ticker_id\),'), ''),
+    (re.compile(r'UNIQUE KEY \w+ \('), 'UNIQUE ('),
+    (re.compile(r'CREATE OR REPLACE ALGORITHM=MERGE VIEW'), 'CREATE VIEW'),
+    (re.compile(r'RENAME TABLE (\w+) TO (\w+)'), r'ALTER TABLE \1 RENAME TO \2'),
+    (re.compile(r'INSERT INTO (daily_prices.*?)\s*ON DUPLICATE KEY UPDATE.*$', re.DOTALL), r'INSERT OR REPLACE INTO \1'),
+]
+
+
+class MigrationConnection(SQLiteConnection):
+    """Base SQLite comprenant en plus les instructions MySQL de migrate_to_normalized_schema"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.raw.create_function('YEAR', 1, lambda day: int(day[:4]) if day else None)
+
+    def translate(self, query):
+        for pattern, replacement in MYSQL_TO_SQLITE:
+            query = pattern.sub(replacement, query)
+        return translate(query)
+
+
+def sqlite_table_type(cursor, table):
+    cursor.execute("SELECT type FROM sqlite_master WHERE name = %s", (table,))
+    row = cursor.fetchone()
+    return {'table': 'BASE TABLE', 'view': 'VIEW'}[row[0]] if row else None
+
+
+@pytest.fixture
+def legacy_db(pipeline_config, monkeypatch, tmp_path):
+    pipeline_config.update(db_loader='executemany', schema_mode='wide', sink='mysql', partition_by_year=False)
+    db = MigrationConnection(str(tmp_path / 'etl.sqlite'))
+    monkeypatch.setattr(etl_stocks, '_db_connection', db)
+    monkeypatch.setattr(etl_stocks, '_schema_ready', False)
+    monkeypatch.setattr(etl_stocks, '_ticker_ids', {})
+    monkeypatch.setattr(etl_stocks, 'get_table_type', sqlite_table_type)
+    # AAPL connu de TICKER_MAPPING, MSFT present uniquement dans l'ancienne table
+    monkeypatch.setattr(etl_stocks, 'TICKER_MAPPING', {'AAPL': {
+        'type': 'stock', 'sector': 'Technologie', 'name': 'Apple Inc.', 'country': 'USA', 'continent': 'North America'}})
+    etl_stocks.ensure_schema()
+    yield db
+    db.close()
+
+
+def historical_rows(db):
+    return pd.read_sql("SELECT * FROM historical_prices ORDER BY ticker, date", db.raw)
+
+
+def test_migration_keeps_rows_behind_compatibility_view(legacy_db):
+    df = make_prices(400)
+    msft = df.assign(ticker='MSFT', name='Microsoft', close=df['close'] * 2)
+    assert etl_stocks.save_to_mysql_optimized(pd.concat([df, msft]))
+    legacy = historical_rows(legacy_db)
+
+    assert migrate_to_normalized_schema()
+
+    assert sqlite_table_type(legacy_db.cursor(), 'historical_prices') == 'VIEW'
+    assert legacy_db.row_count('daily_prices') == 800
+    assert legacy_db.row_count(LEGACY_TABLE) == 800
+    pd.testing.assert_frame_equal(historical_rows(legacy_db), legacy)
+    tickers = pd.read_sql("SELECT ticker, name FROM tickers ORDER BY ticker", legacy_db.raw)
+    assert tickers.values.tolist() == [['AAPL', 'Apple Inc.'], ['MSFT', 'Microsoft']]
+    # Relance: schema deja normalise, rien n'est recopie
+    assert migrate_to_normalized_schema()
+    assert legacy_db.row_count('daily_prices') == 800
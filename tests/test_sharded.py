@@ -0,0 +1,84 @@
+"""Execution multi-processus: initialisation des processus fils et cumul de leurs mesures"""
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import etl_stocks
+from etl_stocks import _init_worker, merge_shard_memory, merge_shard_stats, record_checkpoint, start_checkpoint_run
+
+
+@pytest.fixture
+def worker_globals(pipeline_config, monkeypatch):
+    """Etat global modifie par _init_worker, restaure apres le test"""
+    monkeypatch.setattr(etl_stocks, '_stage_memory', {})
+    for name in ('MYSQL_CONFIG', 'TICKER_MAPPING', 'TICKERS', '_ticker_ids'):
+        monkeypatch.setattr(etl_stocks, name, type(getattr(etl_stocks, name))(getattr(etl_stocks, name)))
+    for name in ('_run_timestamp', '_checkpoint_run_id', '_schema_ready'):
+        monkeypatch.setattr(etl_stocks, name, getattr(etl_stocks, name))
+    monkeypatch.setattr(etl_stocks, 'setup_logging', lambda: None)
+    monkeypatch.setattr(etl_stocks, 'METRICS', etl_stocks.RunMetrics())
+
+
+def test_worker_reuses_parent_schema(worker_globals, pipeline_config, monkeypatch):
+    def fail_ddl():
+        raise AssertionError("DDL rejoue par un processus fils")
+    monkeypatch.setattr(etl_stocks, 'db_session', fail_ddl)
+
+    universe = {'AAA': dict(etl_stocks.UNIVERSE_DEFAULTS)}
+    _init_worker(dict(pipeline_config), {}, universe, '20240101_000000', 'run', True, {'AAA': 7})
+    etl_stocks.ensure_schema()
+    assert etl_stocks.TICKERS == ['AAA'] and etl_stocks._ticker_ids == {'AAA': 7}
+
+
+def test_shard_stats_and_memory_are_merged(worker_globals):
+    stats = {'success': 1, 'errors': 0, 'rows': 10, 'sectors': {'Energie': {'success': 1, 'rows': 10}}}
+    merge_shard_stats(stats, {'success': 2, 'errors': 1, 'rows': 5, 'skipped': 3,
+                              'sectors': {'Energie': {'success': 2, 'rows': 5}}, 'touched': {'BBB': '2024-01-02'}})
+    assert (stats['success'], stats['errors'], stats['rows'], stats['skipped']) == (3, 1, 15, 3)
+    assert stats['sectors']['Energie'] == {'success': 3, 'rows': 15}
+    assert stats['touched'] == {'BBB': '2024-01-02'}
+
+    etl_stocks.record_stage_memory('load', 100)
+    merge_shard_memory({'load': 50, 'extract': 300})
+    merge_shard_memory({'load': 400})
+    assert etl_stocks._stage_memory == {'load': 400, 'extract': 300}
+
+
+class CrashedPool:
+    """ProcessPoolExecutor de substitution: chaque partition echoue comme un processus tue"""
+
+    def __init__(self, max_workers, mp_context, initializer, initargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        future.set_exception(BrokenProcessPool("processus fils arrete brutalement"))
+        return future
+
+
+def test_crashed_shard_counts_only_unfinished_tickers(worker_globals, pipeline_config, monkeypatch, tmp_path):
+    pipeline_config.update(sink='parquet', checkpoint_path=str(tmp_path / 'etl_runs.sqlite'))
+    monkeypatch.setattr(etl_stocks, '_checkpoint_conn', None)
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', CrashedPool)
+    monkeypatch.setattr(etl_stocks, 'run_group_aggregates', lambda stats: None)
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD']
+    start_checkpoint_run(tickers)
+    # Termines par le processus fils avant son arret
+    record_checkpoint('AAA', 'success', 10)
+    record_checkpoint('DDD', 'up_to_date')
+    record_checkpoint('BBB', 'no_data')
+    stats = {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+
+    try:
+        etl_stocks.run_sharded(tickers, dict.fromkeys(tickers, ('2024-01-01', '2024-02-01')), 2, stats)
+    finally:
+        etl_stocks.close_checkpoint()
+
+    assert (stats['success'], stats['errors']) == (2, 2)
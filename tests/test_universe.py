@@ -0,0 +1,71 @@
+"""Univers de tickers: lecture CSV/YAML, filtres, priorite et partitions"""
+import pytest
+
+from etl_stocks import apply_ticker_universe, load_ticker_universe, read_universe_rows, shard_of
+import etl_stocks
+
+CSV_UNIVERSE = """ticker,sector,type,name,country,continent,priority
+MSFT,Technologie,stock,Microsoft,USA,Amerique du Nord,
+^FCHI,Indice,index,CAC 40,France,Europe,
+TTE.PA,Energie,stock,TotalEnergies,France,Europe,5
+ ,Energie,stock,Sans ticker,France,Europe,
+MSFT,Technologie,stock,Microsoft Corp,USA,Amerique du Nord,
+"""
+
+
+@pytest.fixture
+def universe_csv(tmp_path):
+    path = tmp_path / 'universe.csv'
+    path.write_text(CSV_UNIVERSE, encoding='utf-8')
+    return str(path)
+
+
+def test_csv_universe_orders_by_priority(pipeline_config, universe_csv):
+    universe = load_ticker_universe(universe_csv)
+    # Indice (priorite 0), priorite explicite 5, puis priorite par defaut
+    assert list(universe) == ['^FCHI', 'TTE.PA', 'MSFT']
+    # Doublon: la derniere ligne l'emporte
+    assert universe['MSFT']['name'] == 'Microsoft Corp'
+    assert set(universe['MSFT']) == set(etl_stocks.UNIVERSE_COLUMNS)
+
+
+def test_yaml_universe_matches_mapping_format(pipeline_config, tmp_path):
+    path = tmp_path / 'universe.yaml'
+    path.write_text("AAPL:\n  sector: Technologie\n  country: USA\nSAN.PA:\n", encoding='utf-8')
+    universe = load_ticker_universe(str(path))
+    assert list(universe) == ['AAPL', 'SAN.PA']
+    assert universe['AAPL']['country'] == 'USA'
+    assert universe['SAN.PA'] == etl_stocks.UNIVERSE_DEFAULTS
+
+
+def test_filters_and_unknown_source(pipeline_config, universe_csv):
+    pipeline_config.update(universe_countries=['France'], universe_types=['stock'])
+    assert list(load_ticker_universe(universe_csv)) == ['TTE.PA']
+    with pytest.raises(ValueError):
+        read_universe_rows('universe.json')
+
+
+def test_shards_partition_the_universe(pipeline_config):
+    full = load_ticker_universe('')
+    pipeline_config['shard_count'] = 3
+    seen = []
+    for index in range(3):
+        pipeline_config['shard_index'] = index
+        shard = load_ticker_universe('')
+        assert all(shard_of(ticker, 3) == index for ticker in shard)
+        seen.extend(shard)
+    assert sorted(seen) == sorted(full)
+    # Stable d'un processus a l'autre (crc32)
+    assert shard_of('AAPL', 3) == 0
+
+    pipeline_config['shard_index'] = 3
+    with pytest.raises(ValueError):
+        load_ticker_universe('')
+
+
+def test_apply_replaces_mapping_in_place(pipeline_config, universe_csv, monkeypatch):
+    monkeypatch.setattr(etl_stocks, 'TICKER_MAPPING', dict(etl_stocks.TICKER_MAPPING))
+    monkeypatch.setattr(etl_stocks, 'TICKERS', list(etl_stocks.TICKERS))
+    mapping, tickers = etl_stocks.TICKER_MAPPING, etl_stocks.TICKERS
+    apply_ticker_universe(universe_csv)
+    assert mapping is etl_stocks.TICKER_MAPPING and list(mapping) == tickers == ['^FCHI', 'TTE.PA', 'MSFT']
@@ -0,0 +1,96 @@
+"""Validation qualite: regles vectorisees, enchainement des blocs et table price_quarantine"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl_stocks
+from etl_stocks import validate_chunk, validate_prices
+from test_conversion import make_prices
+
+
+def days(dates):
+    return pd.to_datetime(dates).dt.strftime('%Y-%m-%d').tolist()
+
+
+def rejected_reasons(quarantine):
+    return dict(zip(days(quarantine['date']), quarantine['reasons']))
+
+
+@pytest.mark.parametrize('column, value, reason', [
+    ('close', np.nan, 'missing_price'),
+    ('low', 0.0, 'non_positive_price'),
+    ('high', 50.0, 'high_below_open_close'),
+    ('low', 500.0, 'low_above_open_close'),
+    ('volume', -1, 'negative_volume'),
+])
+def test_each_rule_rejects_the_row(pipeline_config, column, value, reason):
+    df = make_prices(4)
+    df.loc[2, column] = value
+    valid, quarantine = validate_prices(df, {})
+    assert valid['date'].tolist() == df['date'].drop(index=2).tolist()
+    assert reason in quarantine['reasons'].iloc[0].split(';')
+    assert quarantine['rejected'].tolist() == [True]
+
+
+def test_state_chains_jumps_and_duplicates_across_chunks(pipeline_config):
+    df = make_prices(4)
+    state = {}
+    validate_prices(df.iloc[:2], state)
+    # Premiere ligne du bloc suivant: doublon de la derniere date; derniere ligne: saut de cloture
+    second = pd.concat([df.iloc[[1]], df.iloc[2:]], ignore_index=True)
+    second.loc[2, ['open', 'high', 'low', 'close', 'adj_close']] *= 3
+    valid, quarantine = validate_prices(second, state)
+    assert rejected_reasons(quarantine) == {'2024-01-03': 'duplicate_date', '2024-01-05': 'price_jump'}
+    assert quarantine['occurrence'].tolist() == [1, 0]
+    assert days(valid['date']) == ['2024-01-04']
+
+
+def test_calendar_gap_is_flagged_but_loaded(pipeline_config):
+    df = make_prices(3)
+    df.loc[2, 'date'] = pd.Timestamp('2024-02-01').date()
+    valid, quarantine = validate_prices(df, {})
+    assert len(valid) == 3
+    assert quarantine['reasons'].tolist() == ['calendar_gap']
+    assert quarantine['rejected'].tolist() == [False]
+
+
+def test_duplicate_rejects_are_all_kept(sqlite_db, pipeline_config):
+    df = make_prices(3)
+    # Trois lignes a la meme date: la premiere a un prix manquant, les deux autres sont des doublons
+    duplicated = pd.concat([df.iloc[[0]], df.iloc[[0]], df.iloc[[0]], df.iloc[[1]]], ignore_index=True)
+    duplicated.loc[0, 'close'] = np.nan
+    stats = {}
+    for _ in range(2):
+        valid = validate_chunk('AAPL', duplicated, {}, stats)
+    assert days(valid['date']) == ['2024-01-03']
+
+    stored = pd.read_sql("SELECT date, occurrence, reasons FROM price_quarantine ORDER BY occurrence", sqlite_db.raw)
+    assert stored['occurrence'].tolist() == [0, 1, 2]
+    assert stored['reasons'].tolist() == ['missing_price', 'duplicate_date', 'duplicate_date']
+
+
+def test_missing_prices_reach_no_sink(sqlite_db, pipeline_config, tmp_path):
+    pipeline_config.update(sink='both', memmap_store=True,
+                           parquet_path=str(tmp_path / 'lake'), memmap_path=str(tmp_path / 'store'))
+    df = make_prices(4)
+    df.loc[1, 'close'] = np.nan
+    stats = {'success': 0, 'errors': 0, 'rows': 0, 'sectors': {}}
+    valid = validate_chunk('AAPL', df, {}, stats)
+    etl_stocks.flush_pending_loads([('AAPL', valid, True)], stats, {})
+
+    expected = ['2024-01-02', '2024-01-04', '2024-01-05']
+    assert stats['quarantined'] == 1 and stats['rows'] == 3
+    assert sorted(days(pd.read_sql("SELECT date FROM historical_prices", sqlite_db.raw)['date'])) == expected
+    assert sorted(days(etl_stocks.read_parquet_lake(columns=['close'])['date'])) == expected
+    stored = etl_stocks.TimeSeriesStore(str(tmp_path / 'store')).read('AAPL')
+    assert np.datetime_as_string(stored['date'], unit='D').tolist() == expected
+    assert not np.isnan(stored['close']).any()
+
+
+def test_missing_prices_default_to_zero_without_validation(sqlite_db, pipeline_config):
+    pipeline_config['validation_enabled'] = False
+    df = make_prices(2)
+    df.loc[1, ['close', 'adj_close']] = np.nan
+    assert etl_stocks.save_to_mysql_optimized(df)
+    closes = pd.read_sql("SELECT close, adj_close FROM historical_prices ORDER BY date", sqlite_db.raw)
+    assert closes.iloc[1].tolist() == [0.0, 0.0]